@@ -1,12 +1,12 @@
 """
 MCP Server Implementation for DingTalk CalDAV Calendar
-8 MCP tools: list_calendars, get_events, create_event, update_event, delete_event, get_todos, create_todo, delete_todo
+10 MCP tools: list_calendars, get_events, search_events, find_free_slots, create_event, update_event, delete_event, get_todos, create_todo, delete_todo
 """
 
 import os
 import sys
 import uuid
-from datetime import datetime
+from datetime import datetime, time, timedelta, timezone
 from pathlib import Path
 from typing import Optional
 
@@ -24,8 +24,35 @@ if str(_project_src_dir) not in sys.path:
 
 # Import from calendar_dingtalk_client (via sys.path)
 from calendar_dingtalk_client.caldav.client import CalDAVClient
+from calendar_dingtalk_client.caldav.fields import (
+    TODO_FIELDS,
+    parse_fields,
+    project,
+    required_properties,
+)
+from calendar_dingtalk_client.caldav.operations.todos import (
+    OPEN_STATUSES,
+    TODO_SORTS,
+    TodoQuery,
+    parse_status,
+    query_todos,
+)
+from calendar_dingtalk_client.caldav.sync import get_sync_store
 from calendar_dingtalk_client.icalendar.builder import build_event, build_todo
+from calendar_dingtalk_client.icalendar.canonical import canonical_hash
 from calendar_dingtalk_client.icalendar.parser import parse_event, parse_todo
+from calendar_dingtalk_client.icalendar.patcher import get_property, patch_component
+from calendar_dingtalk_client.icalendar.timezones import to_epoch
+from calendar_dingtalk_client.index.analytics import BUSY_STATUSES
+from calendar_dingtalk_client.index.people import get_people_index
+from calendar_dingtalk_client.index.search import get_search_index
+# Imported under another name: the find_free_slots tool below would shadow it
+from calendar_dingtalk_client.index.slots import (
+    WorkingHours,
+    as_intervals,
+    find_free_slots as compute_free_slots,
+)
+from calendar_dingtalk_client.index.snapshot import get_event_snapshot
 
 mcp = FastMCP("dingtalk-caldav-calendar")
 _client_cache: Optional[CalDAVClient] = None
@@ -158,7 +185,10 @@ async def list_calendars() -> str:
 
 @mcp.tool()
 async def get_events(
-    calendar_name: str, start: Optional[str] = None, end: Optional[str] = None
+    calendar_name: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    fields: Optional[str] = None,
 ) -> str:
     """
     Get events from a specific calendar.
@@ -167,12 +197,15 @@ async def get_events(
         calendar_name: Name of the calendar (e.g., "Calendar", "工作日历")
         start: Start date/time in ISO format (optional, e.g., "2024-01-01T00:00:00Z")
         end: End date/time in ISO format (optional, e.g., "2024-12-31T23:59:59Z")
+        fields: Comma-separated fields to return (optional, e.g., "uid,dtstart,dtend").
+            Omitting description avoids fetching large event bodies.
 
     Returns:
         Formatted list of events with their details
     """
     client = await get_caldav_client()
     calendar_url = await find_calendar_url(calendar_name)
+    selected = parse_fields(fields)
 
     # Parse dates if provided
     start_dt = None
@@ -182,15 +215,19 @@ async def get_events(
     if end:
         end_dt = datetime.fromisoformat(end.replace("Z", "+00:00"))
 
-    events = await client.get_calendar_events(calendar_url, start_dt, end_dt)
+    events = await client.get_calendar_events(
+        calendar_url, start_dt, end_dt, properties=required_properties(selected)
+    )
 
     if not events:
         return f"No events found in calendar '{calendar_name}'"
 
     result = f"## Events in '{calendar_name}'\n\n"
     for i, evt in enumerate(events, 1):
-        result += f"{i}. {evt['summary']}\n"
-        result += f"   UID: {evt['uid']}\n"
+        evt = project(evt, selected)
+        result += f"{i}. {evt.get('summary') or evt.get('uid', '')}\n"
+        if evt.get("uid"):
+            result += f"   UID: {evt['uid']}\n"
         if evt.get("dtstart"):
             result += f"   Start: {evt['dtstart']}\n"
         if evt.get("dtend"):
@@ -208,6 +245,155 @@ async def get_events(
     return result
 
 
+@mcp.tool()
+async def search_events(
+    query: str,
+    calendar_name: Optional[str] = None,
+    limit: int = 10,
+) -> str:
+    """
+    Full-text search over event titles, locations and descriptions.
+    Chinese text is matched by characters/bigrams, other text by words
+    (the last word also matches as a prefix). Only changed events are
+    downloaded before searching.
+
+    Args:
+        query: Search text (e.g., "周会", "design rev")
+        calendar_name: Only search this calendar (optional, default all calendars)
+        limit: Maximum number of results (default 10)
+
+    Returns:
+        Matching events ranked by relevance
+    """
+    client = await get_caldav_client()
+    calendars = await client.list_calendars()
+    if calendar_name:
+        calendar_url = await find_calendar_url(calendar_name)
+        calendars = [cal for cal in calendars if cal["url"] == calendar_url]
+    index = get_search_index()
+    _, errors = await get_sync_store().sync(client, calendars)
+    events, total = index.search(
+        query, limit=limit, calendars=[cal["name"] for cal in calendars]
+    )
+
+    result = ""
+    for error in errors:
+        result += f"> Warning: calendar '{error['calendar']}' could not be synced: {error['error']}\n"
+    if not events:
+        return result + f"No events matching '{query}'"
+
+    result += f"## {total} events matching '{query}'\n\n"
+    for i, evt in enumerate(events, 1):
+        result += f"{i}. {evt.get('summary') or evt.get('uid', '')}\n"
+        result += f"   UID: {evt['uid']}\n"
+        result += f"   Calendar: {evt['calendar']}\n"
+        if evt.get("dtstart"):
+            result += f"   Start: {evt['dtstart']}\n"
+        if evt.get("location"):
+            result += f"   Location: {evt['location']}\n"
+        result += f"   Score: {evt['score']}\n\n"
+    return result
+
+
+@mcp.tool()
+async def find_free_slots(
+    duration_minutes: int = 30,
+    calendar_names: Optional[str] = None,
+    people: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    work_start: str = "09:00",
+    work_end: str = "18:00",
+    limit: int = 10,
+) -> str:
+    """
+    Find time slots when all given calendars and people are free.
+    Busy time comes from the locally synced copy (only changed events are
+    downloaded, recurring events are expanded); cancelled events and events
+    a person declined do not count as busy. Slots are
+    limited to working hours on weekdays in the default timezone.
+
+    Args:
+        duration_minutes: Meeting length in minutes (default 30)
+        calendar_names: Comma-separated calendar names (optional, e.g., "工作日历,个人")
+        people: Comma-separated attendee emails or names (optional, e.g., "alice@example.com,李四")
+        start: Window start in ISO format (optional, default now)
+        end: Window end in ISO format (optional, default start + 7 days)
+        work_start: Working day start, HH:MM (default "09:00"); use "00:00" with
+            work_end "23:59" to allow any time of day
+        work_end: Working day end, HH:MM (default "18:00")
+        limit: Maximum number of slots (default 10)
+
+    Returns:
+        Free slots; the meeting can be placed anywhere inside each slot
+    """
+    if not calendar_names and not people:
+        return "Error: specify calendar_names or people"
+    client = await get_caldav_client()
+    calendars = await client.list_calendars()
+    _, errors = await get_sync_store().sync(client, calendars)
+    index = get_people_index()
+
+    start_dt = (
+        datetime.fromisoformat(start.replace("Z", "+00:00"))
+        if start
+        else datetime.now(timezone.utc)
+    )
+    end_dt = (
+        datetime.fromisoformat(end.replace("Z", "+00:00"))
+        if end
+        else start_dt + timedelta(days=7)
+    )
+    window_start, window_end = to_epoch(start_dt), to_epoch(end_dt)
+
+    busy = []
+    if calendar_names:
+        names = []
+        for name in (part.strip() for part in calendar_names.split(",")):
+            if name:
+                calendar_url = await find_calendar_url(name)
+                names.extend(cal["name"] for cal in calendars if cal["url"] == calendar_url)
+        snapshot = get_event_snapshot()
+        mask = snapshot.mask(
+            window_start,
+            window_end,
+            calendars=names,
+            statuses=BUSY_STATUSES,
+        )
+        busy.append(snapshot.intervals(mask))
+    for person in (part.strip() for part in (people or "").split(",")):
+        if not person:
+            continue
+        person_key = index.resolve(person)
+        if person_key is None:
+            return f"Error: person '{person}' not found in any synced event"
+        busy.append(as_intervals(index.busy(person_key, window_start, window_end)))
+
+    slots = compute_free_slots(
+        busy,
+        window_start,
+        window_end,
+        duration_minutes * 60,
+        working_hours=WorkingHours(
+            start=time.fromisoformat(work_start), end=time.fromisoformat(work_end)
+        ),
+        limit=limit,
+    )
+
+    result = ""
+    for error in errors:
+        result += f"> Warning: calendar '{error['calendar']}' could not be synced: {error['error']}\n"
+    if not slots:
+        return result + f"No free {duration_minutes}-minute slots in the window"
+
+    result += f"## Free {duration_minutes}-minute slots\n\n"
+    for i, (slot_start, slot_end) in enumerate(slots, 1):
+        slot_from = datetime.fromtimestamp(slot_start, timezone.utc).isoformat()
+        slot_to = datetime.fromtimestamp(slot_end, timezone.utc).isoformat()
+        result += f"{i}. {slot_from} - {slot_to}\n"
+    return result
+
+
 @mcp.tool()
 async def create_event(
     calendar_name: str,
@@ -285,38 +471,32 @@ async def update_event(
 
     # Get existing event data
     ical_data, _ = await client.get_object(event_url)
-    existing_event = parse_event(ical_data)
-
-    if not existing_event:
-        raise ValueError(f"Event with UID '{uid}' not found")
 
-    # Build updated event
-    updated_event = {
-        "uid": uid,
-        "summary": summary
-        if summary is not None
-        else existing_event.get("summary", ""),
-        "dtstart": datetime.fromisoformat(start.replace("Z", "+00:00"))
-        if start
-        else existing_event.get("dtstart"),
-        "dtend": datetime.fromisoformat(end.replace("Z", "+00:00"))
-        if end
-        else existing_event.get("dtend"),
-    }
+    # Patch only the given properties; attendees, alarms, RRULE etc. are kept
+    changes = {}
+    if summary is not None:
+        changes["SUMMARY"] = summary
+    if start:
+        changes["DTSTART"] = datetime.fromisoformat(start.replace("Z", "+00:00"))
+    if end:
+        changes["DTEND"] = datetime.fromisoformat(end.replace("Z", "+00:00"))
     if location is not None:
-        updated_event["location"] = location
-    else:
-        updated_event["location"] = existing_event.get("location", "")
-
+        changes["LOCATION"] = location or None
     if description is not None:
-        updated_event["description"] = description
-    else:
-        updated_event["description"] = existing_event.get("description", "")
+        changes["DESCRIPTION"] = description or None
+
+    try:
+        new_ical_data = patch_component(ical_data, changes, "VEVENT")
+    except ValueError:
+        raise ValueError(f"Event with UID '{uid}' not found")
+    new_summary = get_property(new_ical_data, "SUMMARY", "VEVENT") or ""
 
-    ical_data = build_event(updated_event)
+    # Skip the PUT for idempotent replays so the calendar ctag does not change
+    if canonical_hash(new_ical_data) == canonical_hash(ical_data):
+        return f"Event unchanged.\n- UID: {uid}\n- Summary: {new_summary}\n- ETag: {etag}"
 
-    await client.update_object(event_url, ical_data.decode("utf-8"), etag)
-    return f"Event updated successfully.\n- UID: {uid}\n- Summary: {updated_event['summary']}"
+    await client.update_object(event_url, new_ical_data, etag)
+    return f"Event updated successfully.\n- UID: {uid}\n- Summary: {new_summary}"
 
 
 @mcp.tool()
@@ -340,113 +520,78 @@ async def delete_event(calendar_name: str, uid: str) -> str:
 
 @mcp.tool()
 async def get_todos(
-    calendar_name: str, start: Optional[str] = None, end: Optional[str] = None
+    calendar_name: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    fields: Optional[str] = None,
+    status: Optional[str] = None,
+    overdue: bool = False,
+    max_priority: Optional[int] = None,
+    sort: str = "due",
 ) -> str:
     """
     Get todo items from a specific calendar.
-    This fetches all items and filters for VTODO components.
+    Todos are indexed by due date and priority; repeated queries are answered
+    from the index until the calendar changes.
 
     Args:
         calendar_name: Name of the calendar
-        start: Start date/time in ISO format (optional)
-        end: End date/time in ISO format (optional)
+        start: Only todos due at or after this ISO date/time (optional)
+        end: Only todos due before this ISO date/time (optional)
+        fields: Comma-separated fields to return (optional, e.g., "uid,summary,due")
+        status: Comma-separated statuses (optional, e.g., "open", "COMPLETED")
+        overdue: Only open todos whose due time has passed (optional)
+        max_priority: Only todos with priority 1..max_priority, 1 is highest (optional)
+        sort: "due" (default) or "priority"
 
     Returns:
         Formatted list of todo items
     """
     client = await get_caldav_client()
     calendar_url = await find_calendar_url(calendar_name)
+    selected = parse_fields(fields, TODO_FIELDS)
+    if sort not in TODO_SORTS:
+        raise ValueError(f"Invalid sort '{sort}', expected one of: {', '.join(TODO_SORTS)}")
 
-    # Get all events (we'll filter for VTODO manually)
-    events = await client.get_calendar_events(calendar_url)
-
-    # Filter for VTODO items by fetching content type
-    todos = []
-
-    # Get all calendar objects to check content type
-    xml = (
-        '<?xml version="1.0" encoding="utf-8" ?>'
-        '<D:propfind xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">'
-        "<D:prop><D:resourcetype/><D:getcontenttype/><D:getetag/></D:prop>"
-        "</D:propfind>"
+    statuses = parse_status(status)
+    due_after = None
+    due_before = None
+    if start:
+        due_after = to_epoch(datetime.fromisoformat(start.replace("Z", "+00:00")))
+    if end:
+        due_before = to_epoch(datetime.fromisoformat(end.replace("Z", "+00:00")))
+    if overdue:
+        statuses = (statuses or OPEN_STATUSES) & OPEN_STATUSES
+        now = int(datetime.now(timezone.utc).timestamp())
+        due_before = now if due_before is None else min(due_before, now)
+    query = TodoQuery(
+        status=statuses,
+        due_after=due_after,
+        due_before=due_before,
+        max_priority=max_priority,
+        sort=sort,
     )
-
-    from lxml import etree
-
-    response = await client._client.request(
-        "PROPFIND",
-        calendar_url,
-        content=xml,
-        headers={
-            "Content-Type": "application/xml; charset=utf-8",
-            "Depth": "1",
-        },
+    todos = await query_todos(
+        client, calendar_url, query, properties=required_properties(selected, TODO_FIELDS)
     )
 
-    root = etree.fromstring(response.text.encode())
-    ns = {"D": "DAV:", "C": "urn:ietf:params:xml:ns:caldav"}
-
-    for response_elem in root.findall(".//D:response", ns):
-        href_elem = response_elem.find("D:href", ns)
-        if href_elem is None or href_elem.text is None:
-            continue
-
-        href = href_elem.text
-        if href.endswith("/"):
-            continue
-
-        # Check content type
-        ok_propstat = None
-        for propstat in response_elem.findall("D:propstat", ns):
-            status = propstat.find("D:status", ns)
-            if status is not None and "200" in status.text:
-                ok_propstat = propstat
-                break
-
-        if ok_propstat is None:
-            continue
-
-        prop = ok_propstat.find("D:prop", ns)
-        if prop is None:
-            continue
-
-        contenttype_elem = prop.find("D:getcontenttype", ns)
-        if contenttype_elem is None or contenttype_elem.text is None:
-            continue
-
-        # Filter for VTODO
-        if "vtodo" not in contenttype_elem.text.lower():
-            continue
-
-        # Fetch the todo data
-        from urllib.parse import urlparse
-
-        parsed = urlparse(client.base_url)
-        todo_url = f"{parsed.scheme}://{parsed.netloc}{href}"
-
-        try:
-            ical_data, etag = await client.get_object(todo_url)
-            todo_data = parse_todo(ical_data)
-
-            if todo_data:
-                todo_data["url"] = todo_url
-                todo_data["etag"] = etag
-                todos.append(todo_data)
-        except Exception:
-            continue
-
     if not todos:
         return f"No todos found in calendar '{calendar_name}'"
 
     result = f"## Todos in '{calendar_name}'\n\n"
     for i, todo in enumerate(todos, 1):
-        result += f"{i}. {todo['summary']}\n"
-        result += f"   UID: {todo['uid']}\n"
-        result += f"   Status: {todo.get('status', 'NEEDS-ACTION')}\n"
+        todo = project(todo, selected)
+        result += f"{i}. {todo.get('summary') or todo.get('uid', '')}\n"
+        if todo.get("uid"):
+            result += f"   UID: {todo['uid']}\n"
+        if todo.get("status"):
+            result += f"   Status: {todo['status']}\n"
         if todo.get("due"):
             result += f"   Due: {todo['due']}\n"
         if todo.get("priority"):
             result += f"   Priority: {todo['priority']}\n"
+        if todo.get("percent_complete") is not None:
+            result += f"   Progress: {todo['percent_complete']}%\n"
         result += "\n"
     return result
 
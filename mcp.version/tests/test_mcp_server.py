@@ -1,6 +1,6 @@
 """
 Smoke tests for MCP server
-Tests that the MCP server module can be loaded.
+Tests that the MCP server module can be loaded and its tools run.
 """
 
 import sys
@@ -10,6 +10,9 @@ from pathlib import Path
 _project_src_dir = Path(__file__).resolve().parent.parent.parent / "src"
 if str(_project_src_dir) not in sys.path:
     sys.path.insert(0, str(_project_src_dir))
+_mcp_src_dir = Path(__file__).resolve().parent.parent / "src"
+if str(_mcp_src_dir) not in sys.path:
+    sys.path.insert(0, str(_mcp_src_dir))
 
 
 def test_mcp_server_file_parses():
@@ -40,10 +43,12 @@ def test_mcp_has_tools_defined():
     with open(mcp_server_path, "r", encoding="utf-8") as f:
         code = f.read()
 
-    # Check for the 8 tool function definitions
+    # Check for the 10 tool function definitions
     expected_tools = [
         "list_calendars",
         "get_events",
+        "search_events",
+        "find_free_slots",
         "create_event",
         "update_event",
         "delete_event",
@@ -55,8 +60,8 @@ def test_mcp_has_tools_defined():
     for tool in expected_tools:
         assert f"async def {tool}(" in code, f"Tool {tool} not found in source"
 
-    assert code.count("@mcp.tool()") == 8, (
-        f"Expected 8 @mcp.tool() decorators, found {code.count('@mcp.tool()')}"
+    assert code.count("@mcp.tool()") == 10, (
+        f"Expected 10 @mcp.tool() decorators, found {code.count('@mcp.tool()')}"
     )
 
 
@@ -76,6 +81,69 @@ def test_fastmcp_instance():
     assert 'mcp.run(transport="stdio")' in code
 
 
+EVENT = (
+    "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nBEGIN:VEVENT\r\n"
+    "UID:standup\r\nSUMMARY:Standup\r\n"
+    "DTSTART:20240108T100000Z\r\nDTEND:20240108T110000Z\r\n"
+    "END:VEVENT\r\nEND:VCALENDAR\r\n"
+)
+
+
+class StubClient:
+    """In-memory CalDAV client with a single calendar"""
+
+    calendars = [{"name": "work", "displayname": "Work", "url": "https://example.com/work/"}]
+
+    async def list_calendars(self):
+        return self.calendars
+
+    async def get_ctag(self, calendar_url):
+        return "1"
+
+    async def get_etags(self, calendar_url):
+        return {"https://example.com/work/standup.ics": "e1"}
+
+    async def multiget(self, calendar_url, urls):
+        return [(url, "e1", EVENT) for url in urls]
+
+
+def test_find_free_slots_tool_runs(monkeypatch):
+    """The find_free_slots tool computes slots from the synced calendar"""
+    import asyncio
+    from datetime import datetime, timezone
+
+    from calendar_dingtalk_client.caldav.sync import SyncStore
+    from calendar_dingtalk_client.index.people import PeopleIndex
+    from calendar_dingtalk_client.index.snapshot import EventSnapshot
+    from calendar_dingtalk_mcp import mcp_server
+
+    store, snapshot, people = SyncStore(), EventSnapshot(), PeopleIndex()
+    store.subscribe(snapshot.update)
+    store.subscribe(people.update)
+    monkeypatch.setattr(mcp_server, "_client_cache", StubClient())
+    monkeypatch.setattr(mcp_server, "get_sync_store", lambda: store)
+    monkeypatch.setattr(mcp_server, "get_event_snapshot", lambda: snapshot)
+    monkeypatch.setattr(mcp_server, "get_people_index", lambda: people)
+    monkeypatch.setenv("CALDAV_DEFAULT_TIMEZONE", "UTC")
+
+    result = asyncio.run(
+        mcp_server.find_free_slots(
+            duration_minutes=60,
+            calendar_names="work",
+            start="2024-01-08T00:00:00Z",
+            end="2024-01-09T00:00:00Z",
+        )
+    )
+    assert "## Free 60-minute slots" in result
+    slot = lambda h1, h2: (
+        f"{datetime(2024, 1, 8, h1, tzinfo=timezone.utc).isoformat()} - "
+        f"{datetime(2024, 1, 8, h2, tzinfo=timezone.utc).isoformat()}"
+    )
+    # Working hours 09:00-18:00 UTC around the 10:00-11:00 standup
+    assert f"1. {slot(9, 10)}" in result
+    assert f"2. {slot(11, 18)}" in result
+
+
 if __name__ == "__main__":
     import pytest
 
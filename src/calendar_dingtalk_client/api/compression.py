@@ -0,0 +1,192 @@
+"""
+响应压缩协商
+
+按 Accept-Encoding（含 q 值）在 zstd / br / gzip 中选择编码；brotli 和
+zstandard 为可选依赖，未安装时不参与协商。小于阈值的响应不压缩，流式
+响应逐块压缩并同步刷新，NDJSON 的每一行都能及时送达。
+"""
+
+import zlib
+from typing import Callable, Dict, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 取决于安装环境
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 取决于安装环境
+    zstandard = None
+
+# 已经压缩或不适合压缩的内容类型
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "image/", "application/zip", "application/gzip")
+
+
+class _GzipEncoder:
+    def __init__(self) -> None:
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self) -> None:
+        self._compressor = brotli.Compressor(quality=5)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def available_encodings() -> Dict[str, Callable[[], object]]:
+    """当前环境可用的编码，按服务端偏好排序"""
+    encoders: Dict[str, Callable[[], object]] = {}
+    if zstandard is not None:
+        encoders["zstd"] = _ZstdEncoder
+    if brotli is not None:
+        encoders["br"] = _BrotliEncoder
+    encoders["gzip"] = _GzipEncoder
+    return encoders
+
+
+def negotiate_encoding(
+    accept_encoding: Optional[str], supported: Sequence[str]
+) -> Optional[str]:
+    """
+    选择响应编码
+
+    q 值最高者优先，相同时按 supported 中的顺序；都不可接受时返回 None
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    """按 Accept-Encoding 压缩响应"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding"), list(self.encoders)
+        )
+        responder = _CompressionResponder(
+            send, encoding, self.encoders.get(encoding), self.minimum_size
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(
+        self,
+        send: Send,
+        encoding: Optional[str],
+        factory: Optional[Callable[[], object]],
+        minimum_size: int,
+    ) -> None:
+        self._send = send
+        self.encoding = encoding
+        self.factory = factory
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.encoder = None
+
+    def _compressible(self, status: int, headers: MutableHeaders) -> bool:
+        if self.factory is None or status < 200 or status in (204, 206, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        return not headers.get("content-type", "").startswith(EXCLUDED_CONTENT_TYPES)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # 等第一块响应体到达后再决定是否压缩
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            if self.start is not None:
+                await self._send(self.start)
+                self.start = None
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if self._compressible(start["status"], headers) and (
+                more_body or len(body) >= self.minimum_size
+            ):
+                self.encoder = self.factory()
+                headers["Content-Encoding"] = self.encoding
+                del headers["Content-Length"]
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # 压缩后字节不同，强 ETag 降为弱 ETag
+                    headers["ETag"] = f"W/{etag}"
+                if not more_body:
+                    body = self.encoder.finish(body)
+                    headers["Content-Length"] = str(len(body))
+                    await self._send(start)
+                    await self._send({**message, "body": body})
+                    return
+            await self._send(start)
+
+        if self.encoder is not None:
+            body = self.encoder.chunk(body) if more_body else self.encoder.finish(body)
+            message = {**message, "body": body}
+        await self._send(message)
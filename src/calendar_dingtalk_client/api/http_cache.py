@@ -0,0 +1,63 @@
+"""
+HTTP 条件请求
+
+根据日历 ctag 或对象 ETag 生成强 ETag，处理 If-None-Match 并返回 304，
+轮询方只需交换响应头。
+"""
+
+import hashlib
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi.responses import Response
+
+from ..config import get_config
+
+
+def strong_etag(*parts: Any) -> str:
+    """由若干组成部分计算强 ETag"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def objects_etag(items: Iterable[Dict[str, Any]], *parts: Any) -> Optional[str]:
+    """
+    由对象的 (URL, RECURRENCE-ID, ETag) 计算列表 ETag
+
+    任一对象缺少 ETag 时无法判断是否变化，返回 None
+    """
+    keys = []
+    for item in items:
+        if not item.get("etag"):
+            return None
+        keys.append((item.get("url"), item.get("recurrence_id"), item["etag"]))
+    return strong_etag(*parts, *sorted(keys, key=repr))
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """If-None-Match 是否命中（弱比较，RFC 9110 13.1.2）"""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        if candidate.strip().removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def cache_headers(etag: Optional[str]) -> Dict[str, str]:
+    """条件请求相关的响应头"""
+    # 同一 URL 按 Accept 返回 JSON / NDJSON / MessagePack
+    headers = {"Cache-Control": get_config().http_cache_control, "Vary": "Accept"}
+    if etag:
+        headers["ETag"] = etag
+    return headers
+
+
+def not_modified(etag: str) -> Response:
+    """304 响应"""
+    return Response(status_code=304, headers=cache_headers(etag))
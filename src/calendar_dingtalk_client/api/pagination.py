@@ -0,0 +1,125 @@
+"""
+游标分页与 NDJSON 输出
+"""
+
+import base64
+import json
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from ..caldav.operations.todos import priority_rank
+from ..icalendar.timezones import to_epoch
+from .responses import dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# 没有开始时间的条目排在最前面
+_MISSING_EPOCH = -(1 << 62)
+
+# 最后一项为对象 URL：同一邀请可能出现在多个日历中，没有 UID 的条目也可能
+# 同时开始，只有加上 URL 排序键才唯一，游标不会跳过这些条目
+SortKey = Tuple[int, str, str, str]
+
+
+def event_sort_key(event: Dict[str, Any]) -> SortKey:
+    """事件排序键：(开始纪元秒, UID, RECURRENCE-ID, URL)"""
+    epoch = event.get("dtstart_epoch")
+    return (
+        _MISSING_EPOCH if epoch is None else epoch,
+        event.get("uid") or "",
+        event.get("recurrence_id") or "",
+        event.get("url") or "",
+    )
+
+
+def todo_sort_key(todo: Dict[str, Any]) -> SortKey:
+    """待办排序键：(截止纪元秒, UID, "", URL)"""
+    epoch = todo.get("due_epoch")
+    if epoch is None:
+        epoch = to_epoch(todo.get("due"))
+    return (
+        _MISSING_EPOCH if epoch is None else epoch,
+        todo.get("uid") or "",
+        "",
+        todo.get("url") or "",
+    )
+
+
+def todo_priority_key(todo: Dict[str, Any]) -> SortKey:
+    """待办按优先级排序的键：(优先级, 截止纪元秒（定长字符串）, UID, URL)"""
+    epoch = todo_sort_key(todo)[0]
+    return (
+        priority_rank(todo),
+        f"{epoch - _MISSING_EPOCH:020d}",
+        todo.get("uid") or "",
+        todo.get("url") or "",
+    )
+
+
+def encode_cursor(key: SortKey) -> str:
+    """把排序键编码为不透明游标"""
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """解码游标，格式错误时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        epoch, uid, recurrence_id, url = json.loads(raw)
+        return int(epoch), str(uid), str(recurrence_id), str(url)
+    except Exception:
+        raise ValueError(f"Invalid cursor: '{cursor}'")
+
+
+def paginate_sorted(
+    items: Iterable[Dict[str, Any]],
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    key: Callable[[Dict[str, Any]], SortKey] = event_sort_key,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    对已按排序键有序的（可惰性产出的）序列分页
+
+    只消费到当前页后一项为止
+    """
+    after = decode_cursor(cursor) if cursor else None
+    page: List[Dict[str, Any]] = []
+    for item in items:
+        item_key = key(item)
+        if after is not None and item_key <= after:
+            continue
+        if limit is not None and len(page) == limit:
+            return page, encode_cursor(key(page[-1]))
+        page.append(item)
+    return page, None
+
+
+def wants_ndjson(accept: Optional[str]) -> bool:
+    """客户端是否请求 NDJSON 流"""
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept
+
+
+async def iterate(items: Iterable[Any]) -> AsyncIterator[Any]:
+    """把普通可迭代对象包装为异步迭代器"""
+    for item in items:
+        yield item
+
+
+async def ndjson_lines(
+    items: AsyncIterable[Dict[str, Any]],
+    encode: Optional[Callable[[Dict[str, Any]], bytes]] = None,
+) -> AsyncIterator[bytes]:
+    """逐项输出 NDJSON 行，encode 默认使用 responses.dumps"""
+    encode = encode or dumps
+    async for item in items:
+        yield encode(item) + b"\n"
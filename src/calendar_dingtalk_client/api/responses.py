@@ -0,0 +1,197 @@
+"""
+快速 JSON / MessagePack 响应与序列化片段缓存
+
+安装 orjson 时使用 orjson 编码，否则回退到标准库 json；两者输出一致
+（日期时间与 FastAPI 默认序列化相同，按 ISO 8601 输出，UTC 为 Z）。安装 msgpack 时，Accept 为 application/msgpack
+的客户端得到 MessagePack 响应。未变化的对象按 (href, RECURRENCE-ID, ETag, 字段, 格式)
+缓存编码后的字节，列表响应直接拼接缓存片段，不再重复编码。
+"""
+
+import json
+from collections import OrderedDict
+from datetime import date, time
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse, Response
+from pydantic_core import to_jsonable_python
+
+from ..caldav.fields import project
+from ..config import get_config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于安装环境
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 取决于安装环境
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_ACCEPT = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+
+def _default(value: Any) -> Any:
+    """JSON 原生不支持的值：日期时间按 pydantic 的格式，其余按 str()"""
+    if isinstance(value, (date, time)):
+        return to_jsonable_python(value)
+    return str(value)
+
+
+def dumps(value: Any) -> bytes:
+    """编码为紧凑的 UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(
+            value,
+            default=_default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(
+        value, ensure_ascii=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+def packb(value: Any) -> bytes:
+    """编码为 MessagePack"""
+    return msgpack.packb(value, default=_default, use_bin_type=True)
+
+
+def response_format(accept: Optional[str]) -> str:
+    """按 Accept 选择响应格式："msgpack" 或 "json"（msgpack 未安装时总是 json）"""
+    if msgpack is not None and accept and any(t in accept for t in _MSGPACK_ACCEPT):
+        return "msgpack"
+    return "json"
+
+
+_ENCODERS = {"json": dumps, "msgpack": packb}
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 dumps 编码的 JSON 响应"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class MsgPackResponse(Response):
+    """MessagePack 响应"""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+
+def make_response(
+    content: Any, fmt: str = "json", headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """按格式构造响应"""
+    if fmt == "msgpack":
+        return MsgPackResponse(content, headers=headers)
+    return FastJSONResponse(content, headers=headers)
+
+
+FragmentKey = Tuple[str, Optional[str], str, Optional[FrozenSet[str]], str]
+
+
+class FragmentCache:
+    """已编码片段的 LRU 缓存"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(
+        item: Dict[str, Any],
+        fields: Optional[FrozenSet[str]] = None,
+        fmt: str = "json",
+    ) -> Optional[FragmentKey]:
+        """缓存键；没有 URL 或 ETag 的对象无法判断是否变化，不缓存"""
+        href = item.get("url")
+        etag = item.get("etag")
+        if not href or not etag:
+            return None
+        return href, item.get("recurrence_id"), etag, fields, fmt
+
+    def encode(
+        self,
+        item: Dict[str, Any],
+        fields: Optional[FrozenSet[str]] = None,
+        fmt: str = "json",
+    ) -> bytes:
+        """返回对象（按字段投影后）的编码，优先取缓存"""
+        key = self.key_for(item, fields, fmt)
+        if key is not None:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+        self.misses += 1
+        encoded = _ENCODERS[fmt](project(item, fields))
+        if key is not None and self.max_entries > 0:
+            self._entries[key] = encoded
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return encoded
+
+    def encode_array(
+        self,
+        items: List[Dict[str, Any]],
+        fields: Optional[FrozenSet[str]] = None,
+        fmt: str = "json",
+    ) -> bytes:
+        """拼接为数组"""
+        encoded = [self.encode(item, fields, fmt) for item in items]
+        if fmt == "msgpack":
+            return msgpack.Packer().pack_array_header(len(encoded)) + b"".join(encoded)
+        return b"[" + b",".join(encoded) + b"]"
+
+
+_fragment_cache: Optional[FragmentCache] = None
+
+
+def get_fragment_cache() -> FragmentCache:
+    """获取片段缓存实例（单例）"""
+    global _fragment_cache
+    if _fragment_cache is None:
+        _fragment_cache = FragmentCache(get_config().json_fragment_cache_size)
+    return _fragment_cache
+
+
+def list_response(
+    name: str,
+    items: List[Dict[str, Any]],
+    fields: Optional[FrozenSet[str]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    fmt: str = "json",
+    **extra: Any,
+) -> Response:
+    """
+    组装列表响应：{name: [...], "count": n, **extra}
+
+    列表部分由缓存片段拼接，其余字段正常编码
+    """
+    rest = {"count": len(items), **extra}
+    array = get_fragment_cache().encode_array(items, fields, fmt)
+    if fmt == "msgpack":
+        packer = msgpack.Packer(default=str, use_bin_type=True)
+        content = packer.pack_map_header(len(rest) + 1) + packer.pack(name) + array
+        content += b"".join(packer.pack(k) + packer.pack(v) for k, v in rest.items())
+        return Response(content=content, media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    body = dumps(rest)
+    content = b'{"' + name.encode("utf-8") + b'":' + array + b"," + body[1:]
+    return Response(content=content, media_type=JSON_MEDIA_TYPE, headers=headers)
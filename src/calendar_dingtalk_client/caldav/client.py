@@ -2,12 +2,26 @@
 CALDAV 客户端核心类
 """
 
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from typing import (
+    TYPE_CHECKING,
+    Optional,
+    List,
+    Dict,
+    Any,
+    AsyncIterator,
+    Sequence,
+    Tuple,
+)
+from datetime import date, datetime, timezone
 import httpx
 import logging
 from lxml import etree
 
+from .fields import calendar_data_xml
+
+if TYPE_CHECKING:
+    from .query import CalendarQuery, PropFilter
+
 logger = logging.getLogger(__name__)
 
 
@@ -86,61 +100,297 @@ class CalDAVClient:
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         component_type: str = "VEVENT",
+        properties: Optional[Sequence[str]] = None,
     ) -> List[Dict[str, Any]]:
-        """获取事件列表 - 使用 REPORT calendar-query 方法（钉钉服务器兼容）"""
+        """
+        获取事件列表 - 使用 REPORT calendar-query 方法（钉钉服务器兼容）
+
+        properties 指定时只请求这些 iCalendar 属性
+        """
         logger.info(f"Fetching events from {calendar_url}")
 
+        xml = self._calendar_query_xml(start_date, end_date, component_type, properties)
+
+        try:
+            response = await self._client.request(
+                "REPORT",
+                calendar_url,
+                content=xml,
+                headers={
+                    "Content-Type": "application/xml; charset=utf-8",
+                    "Depth": "1",
+                },
+            )
+            response.raise_for_status()
+            events = await self._parse_events_from_report(response.text, calendar_url)
+            logger.info(f"Found {len(events)} events")
+            return events
+        except Exception as e:
+            logger.error(f"Error fetching events: {e}")
+            import traceback
+
+            traceback.print_exc()
+            return []
+
+    def _calendar_query_xml(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        component_type: str = "VEVENT",
+        properties: Optional[Sequence[str]] = None,
+        prop_filters: str = "",
+    ) -> str:
+        """构建 REPORT calendar-query 请求体，prop_filters 为附加的 C:prop-filter 片段"""
         # 构建日期范围字符串
         time_range_filter = ""
-        if start_date and end_date:
-            start_str = start_date.strftime("%Y%m%dT%H%M%SZ")
-            end_str = end_date.strftime("%Y%m%dT%H%M%SZ")
-            time_range_filter = f"<C:time-range start=\"{start_str}\" end=\"{end_str}\"/>"
-        elif start_date:
+        if start_date and not end_date:
             # 只有开始日期，向后查一年
             end_date = start_date.replace(year=start_date.year + 1)
-            start_str = start_date.strftime("%Y%m%dT%H%M%SZ")
-            end_str = end_date.strftime("%Y%m%dT%H%M%SZ")
+        if start_date and end_date:
+            start_str = _format_utc(start_date)
+            end_str = _format_utc(end_date)
             time_range_filter = f"<C:time-range start=\"{start_str}\" end=\"{end_str}\"/>"
 
         # 使用 REPORT calendar-query 方法
-        xml = (
+        return (
             '<?xml version="1.0" encoding="utf-8" ?>'
             '<C:calendar-query xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">'
             "<D:prop>"
             "<D:getetag/>"
-            "<C:calendar-data/>"
+            f"{calendar_data_xml(component_type, properties)}"
             "</D:prop>"
             "<C:filter>"
             "<C:comp-filter name=\"VCALENDAR\">"
             f"<C:comp-filter name=\"{component_type}\">"
             f"{time_range_filter}"
+            f"{prop_filters}"
             "</C:comp-filter>"
             "</C:comp-filter>"
             "</C:filter>"
             "</C:calendar-query>"
         )
 
+    async def iter_calendar_objects(
+        self,
+        calendar_url: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        component_type: str = "VEVENT",
+        properties: Optional[Sequence[str]] = None,
+        prop_filters: str = "",
+    ) -> AsyncIterator[Tuple[str, Optional[str], str]]:
+        """
+        流式执行 REPORT calendar-query
+
+        边接收边解析响应 XML，每解析完一个 D:response 就产出
+        (对象 URL, ETag, calendar-data 原文)，已处理的元素随即释放。
+        """
+        xml = self._calendar_query_xml(
+            start_date, end_date, component_type, properties, prop_filters
+        )
+        async with self._client.stream(
+            "REPORT",
+            calendar_url,
+            content=xml,
+            headers={
+                "Content-Type": "application/xml; charset=utf-8",
+                "Depth": "1",
+            },
+        ) as response:
+            response.raise_for_status()
+            parser = etree.XMLPullParser(events=("end",), tag=f"{{{self.NS_DAV}}}response")
+            async for chunk in response.aiter_bytes():
+                parser.feed(chunk)
+                for _, elem in parser.read_events():
+                    item = self._object_from_response(elem)
+                    # 释放已处理的元素，保持内存占用恒定
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del elem.getparent()[0]
+                    if item is not None:
+                        yield item
+            parser.close()
+            for _, elem in parser.read_events():
+                item = self._object_from_response(elem)
+                if item is not None:
+                    yield item
+
+    async def iter_events(
+        self,
+        calendar_url: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        properties: Optional[Sequence[str]] = None,
+        filters: Sequence["PropFilter"] = (),
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """流式获取事件，每解析出一个事件就产出；filters 尽量交给服务器筛选"""
+        query = self.query(calendar_url).between(start_date, end_date).select(properties)
+        async for event in query.filter(*filters):
+            yield event
+
+    def query(self, calendar_url: str, component: str = "VEVENT") -> "CalendarQuery":
+        """创建 calendar-query 构建器，见 caldav.query"""
+        from .query import CalendarQuery
+
+        return CalendarQuery(self, calendar_url, component)
+
+    async def multiget(
+        self, calendar_url: str, object_urls: Sequence[str]
+    ) -> List[Tuple[str, Optional[str], str]]:
+        """
+        用一次 REPORT calendar-multiget 获取多个对象
+
+        返回存在的对象 (URL, ETag, calendar-data)，不存在的对象不出现在结果中
+        """
+        if not object_urls:
+            return []
+        from urllib.parse import urlparse
+        from xml.sax.saxutils import escape
+
+        hrefs = "".join(
+            f"<D:href>{escape(urlparse(url).path)}</D:href>" for url in object_urls
+        )
+        xml = (
+            '<?xml version="1.0" encoding="utf-8" ?>'
+            '<C:calendar-multiget xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">'
+            "<D:prop><D:getetag/><C:calendar-data/></D:prop>"
+            f"{hrefs}"
+            "</C:calendar-multiget>"
+        )
+        response = await self._client.request(
+            "REPORT",
+            calendar_url,
+            content=xml,
+            headers={
+                "Content-Type": "application/xml; charset=utf-8",
+                "Depth": "1",
+            },
+        )
+        response.raise_for_status()
+        root = etree.fromstring(response.content)
+        objects = []
+        for elem in root.iter(f"{{{self.NS_DAV}}}response"):
+            item = self._object_from_response(elem)
+            if item is not None:
+                objects.append(item)
+        return objects
+
+    async def get_etags(
+        self, calendar_url: str, component_type: str = "VEVENT"
+    ) -> Dict[str, Optional[str]]:
+        """
+        只获取对象 URL 和 ETag（不带 calendar-data 的 calendar-query）
+
+        用于增量同步：与本地 ETag 比较后只 multiget 变化的对象
+        """
+        from urllib.parse import urlparse
+
+        xml = (
+            '<?xml version="1.0" encoding="utf-8" ?>'
+            '<C:calendar-query xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">'
+            "<D:prop><D:getetag/></D:prop>"
+            "<C:filter>"
+            '<C:comp-filter name="VCALENDAR">'
+            f'<C:comp-filter name="{component_type}"/>'
+            "</C:comp-filter>"
+            "</C:filter>"
+            "</C:calendar-query>"
+        )
+        response = await self._client.request(
+            "REPORT",
+            calendar_url,
+            content=xml,
+            headers={
+                "Content-Type": "application/xml; charset=utf-8",
+                "Depth": "1",
+            },
+        )
+        response.raise_for_status()
+        root = etree.fromstring(response.content)
+        ns = {"D": "DAV:"}
+        parsed = urlparse(self.base_url)
+        etags: Dict[str, Optional[str]] = {}
+        for elem in root.iter(f"{{{self.NS_DAV}}}response"):
+            href = elem.findtext("D:href", namespaces=ns)
+            if not href or href.endswith("/"):
+                continue
+            etag = elem.findtext("D:propstat/D:prop/D:getetag", namespaces=ns)
+            etags[f"{parsed.scheme}://{parsed.netloc}{href}"] = (
+                etag.strip().strip('"') if etag else None
+            )
+        return etags
+
+    async def get_ctag(self, calendar_url: str) -> Optional[str]:
+        """
+        获取日历集合的 ctag（PROPFIND Depth 0）
+
+        日历内任一对象变化时 ctag 随之变化；服务器不支持 getctag 时
+        回退到 sync-token，都没有时返回 None
+        """
+        xml = (
+            '<?xml version="1.0" encoding="utf-8" ?>'
+            '<D:propfind xmlns:D="DAV:" xmlns:CS="http://calendarserver.org/ns/">'
+            "<D:prop><CS:getctag/><D:sync-token/></D:prop>"
+            "</D:propfind>"
+        )
         try:
             response = await self._client.request(
-                "REPORT",
+                "PROPFIND",
                 calendar_url,
                 content=xml,
                 headers={
                     "Content-Type": "application/xml; charset=utf-8",
-                    "Depth": "1",
+                    "Depth": "0",
                 },
             )
             response.raise_for_status()
-            events = await self._parse_events_from_report(response.text, calendar_url)
-            logger.info(f"Found {len(events)} events")
-            return events
+            root = etree.fromstring(response.content)
         except Exception as e:
-            logger.error(f"Error fetching events: {e}")
-            import traceback
+            logger.warning(f"Failed to fetch ctag for {calendar_url}: {e}")
+            return None
+
+        ns = {"D": "DAV:", "CS": "http://calendarserver.org/ns/"}
+        for path in (".//CS:getctag", ".//D:sync-token"):
+            elem = root.find(path, ns)
+            if elem is not None and elem.text and elem.text.strip():
+                return elem.text.strip().strip('"')
+        return None
+
+    async def head_object(self, object_url: str) -> Optional[str]:
+        """只获取对象的 ETag（HEAD），对象不存在时抛出 HTTPStatusError"""
+        response = await self._client.head(object_url)
+        response.raise_for_status()
+        etag = response.headers.get("ETag")
+        return etag.strip('"') if etag else None
 
-            traceback.print_exc()
-            return []
+    async def iter_todos(
+        self,
+        calendar_url: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        properties: Optional[Sequence[str]] = None,
+        filters: Sequence["PropFilter"] = (),
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """流式获取待办：直接解析 VTODO REPORT 中的 calendar-data，不再逐个 GET"""
+        query = self.query(calendar_url, "VTODO").between(start_date, end_date)
+        async for todo in query.select(properties).filter(*filters):
+            yield todo
+
+    async def get_todos(
+        self,
+        calendar_url: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        properties: Optional[Sequence[str]] = None,
+        filters: Sequence["PropFilter"] = (),
+    ) -> List[Dict[str, Any]]:
+        """获取待办列表（一次 REPORT），请求失败时抛出异常"""
+        return [
+            todo
+            async for todo in self.iter_todos(
+                calendar_url, start_date, end_date, properties, filters
+            )
+        ]
 
     async def get_object(self, object_url: str) -> tuple[str, str]:
         """获取单个对象"""
@@ -149,19 +399,29 @@ class CalDAVClient:
         return response.text, response.headers.get("ETag", "").strip('"')
 
     async def create_object(self, calendar_url: str, uid: str, ical_data: str) -> str:
-        """创建对象"""
+        """
+        创建对象
+
+        请求带 If-None-Match: *，同一 URL 已有对象时服务器返回 412，
+        不会覆盖已有对象；服务器拒绝时抛出 HTTPStatusError
+        """
         object_url = f"{calendar_url}/{uid}.ics"
         response = await self._client.put(
             object_url,
             content=ical_data,
-            headers={"Content-Type": "text/calendar; charset=utf-8"},
+            headers={
+                "Content-Type": "text/calendar; charset=utf-8",
+                "If-None-Match": "*",
+            },
         )
         response.raise_for_status()
         return response.headers.get("Location", object_url)
 
-    async def update_object(self, object_url: str, ical_data: str, etag: str) -> None:
-        """更新对象"""
-        await self._client.put(
+    async def update_object(
+        self, object_url: str, ical_data: str, etag: str
+    ) -> Optional[str]:
+        """更新对象，返回服务器给出的新 ETag（如有），服务器拒绝时抛出 HTTPStatusError"""
+        response = await self._client.put(
             object_url,
             content=ical_data,
             headers={
@@ -169,10 +429,14 @@ class CalDAVClient:
                 "If-Match": f'"{etag}"',
             },
         )
+        response.raise_for_status()
+        new_etag = response.headers.get("ETag")
+        return new_etag.strip('"') if new_etag else None
 
     async def delete_object(self, object_url: str, etag: str) -> None:
-        """删除对象"""
-        await self._client.delete(object_url, headers={"If-Match": f'"{etag}"'})
+        """删除对象，服务器拒绝时抛出 HTTPStatusError"""
+        response = await self._client.delete(object_url, headers={"If-Match": f'"{etag}"'})
+        response.raise_for_status()
 
     def _parse_calendars(self, xml_text: str) -> List[Dict[str, Any]]:
         """解析日历响应"""
@@ -373,74 +637,24 @@ class CalDAVClient:
             ns = {"D": "DAV:", "C": "urn:ietf:params:xml:ns:caldav"}
 
             for response in root.findall(".//D:response", ns):
-                href_elem = response.find("D:href", ns)
-                if href_elem is None or href_elem.text is None:
-                    continue
-
-                href = href_elem.text
-
-                if href == "/" or href.endswith("/"):
-                    continue
-
-                ok_propstat = None
-                for propstat in response.findall("D:propstat", ns):
-                    status = propstat.find("D:status", ns)
-                    if status is not None and "200" in status.text:
-                        ok_propstat = propstat
-                        break
-
-                if ok_propstat is None:
-                    continue
-
-                prop = ok_propstat.find("D:prop", ns)
-                if prop is None:
-                    continue
-
-                # REPORT 响应直接包含 calendar-data
-                caldata_elem = prop.find("C:calendar-data", ns)
-                etag_elem = prop.find("D:getetag", ns)
-
-                if caldata_elem is None or caldata_elem.text is None:
+                item = self._object_from_response(response)
+                if item is None:
                     continue
+                event_url, etag, ical_data = item
 
                 try:
-                    # 解析 iCalendar 数据
-                    from ..icalendar.parser import parse_event
-
-                    ical_data = caldata_elem.text
-                    event_data = parse_event(ical_data)
-
-                    if event_data:
-                        from urllib.parse import urlparse
-
-                        parsed = urlparse(self.base_url)
-                        event_url = f"{parsed.scheme}://{parsed.netloc}{href}"
+                    # 解析 iCalendar 数据：同一资源中的主事件和重复实例覆盖都会返回
+                    from ..icalendar.parser import iter_components
 
-                        event = {
-                            "url": event_url,
-                            "etag": etag_elem.text.strip('"') if etag_elem is not None and etag_elem.text else None,
-                            "uid": event_data.get("uid", ""),
-                            "summary": str(event_data.get("summary", "")),
-                            "dtstart": str(event_data.get("dtstart"))
-                            if event_data.get("dtstart")
-                            else None,
-                            "dtend": str(event_data.get("dtend"))
-                            if event_data.get("dtend")
-                            else None,
-                            "location": str(event_data.get("location", ""))
-                            if event_data.get("location")
-                            else None,
-                            "description": str(event_data.get("description", ""))
-                            if event_data.get("description")
-                            else None,
-                        }
+                    for component, _ in iter_components(ical_data, ("VEVENT",)):
+                        event = _event_entry(event_url, etag, component)
                         events.append(event)
                         print(
                             f"[DEBUG] Parsed event: {event.get('summary', 'unknown')}, url: {event['url'][:50]}..."
                         )
 
                 except Exception as e:
-                    print(f"[ERROR] Error parsing event {href}: {e}")
+                    print(f"[ERROR] Error parsing event {event_url}: {e}")
                     continue
 
         except Exception as e:
@@ -451,3 +665,113 @@ class CalDAVClient:
 
         print(f"[DEBUG] Returning {len(events)} events")
         return events
+
+    def _object_from_response(
+        self, response: Any
+    ) -> Optional[Tuple[str, Optional[str], str]]:
+        """从 REPORT 的 D:response 元素提取 (对象 URL, ETag, calendar-data)"""
+        ns = {"D": "DAV:", "C": "urn:ietf:params:xml:ns:caldav"}
+        href_elem = response.find("D:href", ns)
+        if href_elem is None or href_elem.text is None:
+            return None
+
+        href = href_elem.text
+
+        if href == "/" or href.endswith("/"):
+            return None
+
+        ok_propstat = None
+        for propstat in response.findall("D:propstat", ns):
+            status = propstat.find("D:status", ns)
+            if status is not None and "200" in status.text:
+                ok_propstat = propstat
+                break
+
+        if ok_propstat is None:
+            return None
+
+        prop = ok_propstat.find("D:prop", ns)
+        if prop is None:
+            return None
+
+        # REPORT 响应直接包含 calendar-data
+        caldata_elem = prop.find("C:calendar-data", ns)
+        etag_elem = prop.find("D:getetag", ns)
+
+        if caldata_elem is None or caldata_elem.text is None:
+            return None
+
+        from urllib.parse import urlparse
+
+        parsed = urlparse(self.base_url)
+        object_url = f"{parsed.scheme}://{parsed.netloc}{href}"
+        etag = (
+            etag_elem.text.strip('"')
+            if etag_elem is not None and etag_elem.text
+            else None
+        )
+        return object_url, etag, caldata_elem.text
+
+
+def _format_utc(value: datetime) -> str:
+    """格式化为 CalDAV time-range 使用的 UTC 时间"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def _event_entry(event_url: str, etag: Optional[str], component: Any) -> Dict[str, Any]:
+    """把 VEVENT 组件转换为接口返回的事件字典"""
+    from ..icalendar.parser import event_epochs, event_from_component
+    from ..icalendar.recurrence import event_recurrence
+
+    event_data = event_from_component(component)
+    recurrence_id = component.get("recurrence-id")
+    dtstart_epoch, dtend_epoch = event_epochs(component, event_data)
+    return {
+        "url": event_url,
+        "etag": etag,
+        "uid": event_data.get("uid", ""),
+        "summary": str(event_data.get("summary", "")),
+        "dtstart": str(event_data.get("dtstart"))
+        if event_data.get("dtstart")
+        else None,
+        "dtend": str(event_data.get("dtend"))
+        if event_data.get("dtend")
+        else None,
+        "location": str(event_data.get("location", ""))
+        if event_data.get("location")
+        else None,
+        "description": str(event_data.get("description", ""))
+        if event_data.get("description")
+        else None,
+        "recurrence_id": str(recurrence_id.dt) if recurrence_id else None,
+        "dtstart_epoch": dtstart_epoch,
+        "dtend_epoch": dtend_epoch,
+        "organizer": event_data["organizer"],
+        "attendees": event_data["attendees"],
+        "status": event_data["status"],
+        "all_day": isinstance(event_data.get("dtstart"), date)
+        and not isinstance(event_data.get("dtstart"), datetime),
+        "recurrence": event_recurrence(component),
+    }
+
+
+def _todo_entry(todo_url: str, etag: Optional[str], component: Any) -> Dict[str, Any]:
+    """把 VTODO 组件转换为接口返回的待办字典"""
+    from ..icalendar.parser import todo_from_component
+    from ..icalendar.timezones import to_epoch
+
+    todo = todo_from_component(component)
+    return {
+        "url": todo_url,
+        "etag": etag,
+        "uid": todo["uid"],
+        "summary": todo["summary"],
+        "status": todo["status"],
+        "due": str(todo["due"]) if todo["due"] else None,
+        "priority": todo["priority"],
+        "completed": str(todo["completed"]) if todo["completed"] else None,
+        "percent_complete": todo["percent_complete"],
+        "due_epoch": to_epoch(todo["due"]),
+    }
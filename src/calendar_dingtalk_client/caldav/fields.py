@@ -0,0 +1,109 @@
+"""
+稀疏字段选择
+
+把接口的 fields= 参数映射为返回字段集合，以及 calendar-query 中
+C:calendar-data 的 C:prop 投影（RFC 4791 9.6），只向服务器请求需要的属性。
+"""
+
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+# 返回字段 -> 计算该字段需要的 iCalendar 属性
+EVENT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "url": (),
+    "etag": (),
+    "uid": ("UID",),
+    "summary": ("SUMMARY",),
+    "dtstart": ("DTSTART",),
+    "dtend": ("DTEND", "DURATION"),
+    "location": ("LOCATION",),
+    "description": ("DESCRIPTION",),
+    "recurrence_id": ("RECURRENCE-ID",),
+    "dtstart_epoch": ("DTSTART",),
+    "dtend_epoch": ("DTSTART", "DTEND", "DURATION"),
+    "organizer": ("ORGANIZER",),
+    "attendees": ("ATTENDEE",),
+    "status": ("STATUS",),
+    "all_day": ("DTSTART",),
+    "recurrence": ("DTSTART", "RRULE", "RDATE", "EXDATE"),
+    # 多日历查询时标注事件所属日历
+    "calendar": (),
+}
+
+TODO_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "url": (),
+    "etag": (),
+    "uid": ("UID",),
+    "summary": ("SUMMARY",),
+    "status": ("STATUS",),
+    "due": ("DUE",),
+    "priority": ("PRIORITY",),
+    "completed": ("COMPLETED",),
+    "percent_complete": ("PERCENT-COMPLETE",),
+    "due_epoch": ("DUE",),
+}
+
+# 全文检索结果附带相关度
+SEARCH_FIELDS: Dict[str, Tuple[str, ...]] = {**EVENT_FIELDS, "score": ()}
+
+# 人员日程附带该人员的角色和参与状态
+AGENDA_FIELDS: Dict[str, Tuple[str, ...]] = {**EVENT_FIELDS, "role": (), "partstat": ()}
+
+# 排序、分页和区分重复实例始终需要的属性
+_REQUIRED_PROPERTIES = ("UID", "RECURRENCE-ID", "DTSTART", "DUE")
+
+
+def parse_fields(
+    value: Optional[str], available: Dict[str, Tuple[str, ...]] = EVENT_FIELDS
+) -> Optional[FrozenSet[str]]:
+    """
+    解析逗号分隔的字段列表
+
+    未指定时返回 None（表示全部字段），包含未知字段时抛出 ValueError
+    """
+    if value is None or not value.strip():
+        return None
+    fields = frozenset(part.strip() for part in value.split(",") if part.strip())
+    unknown = sorted(fields - available.keys())
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)} (available: {', '.join(available)})"
+        )
+    return fields
+
+
+def required_properties(
+    fields: Optional[Iterable[str]], available: Dict[str, Tuple[str, ...]] = EVENT_FIELDS
+) -> Optional[Tuple[str, ...]]:
+    """返回需要向服务器请求的 iCalendar 属性，None 表示请求完整数据"""
+    if fields is None:
+        return None
+    properties = set(_REQUIRED_PROPERTIES)
+    for field in fields:
+        properties.update(available.get(field, ()))
+    return tuple(sorted(properties))
+
+
+def project(item: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """只保留选中的字段"""
+    if fields is None:
+        return item
+    return {key: value for key, value in item.items() if key in fields}
+
+
+def calendar_data_xml(
+    component_type: str, properties: Optional[Iterable[str]] = None
+) -> str:
+    """构建 C:calendar-data 元素；指定属性时附带 C:comp/C:prop 投影"""
+    if properties is None:
+        return "<C:calendar-data/>"
+    props = "".join(f'<C:prop name="{name}"/>' for name in properties)
+    # VTIMEZONE 完整返回，TZID 时间才能正确换算
+    return (
+        "<C:calendar-data>"
+        '<C:comp name="VCALENDAR">'
+        '<C:prop name="VERSION"/>'
+        f'<C:comp name="{component_type}">{props}</C:comp>'
+        '<C:comp name="VTIMEZONE"><C:allprop/><C:allcomp/></C:comp>'
+        "</C:comp>"
+        "</C:calendar-data>"
+    )
@@ -0,0 +1,76 @@
+"""
+批量操作
+
+读操作按日历合并为 calendar-multiget 请求（每个日历一次 REPORT，各日历并发），
+其余操作在有界并发下独立执行，单个操作失败不影响其他操作。
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import unquote, urlparse
+
+from ..client import CalDAVClient
+
+DEFAULT_CONCURRENCY = 8
+
+CalendarObject = Tuple[str, Optional[str], str]
+
+
+def object_url(calendar_url: str, uid: str) -> str:
+    """UID 对应的对象 URL"""
+    return f"{calendar_url.rstrip('/')}/{uid}.ics"
+
+
+def _uid_from_url(url: str) -> str:
+    name = unquote(urlparse(url).path.rstrip("/").rsplit("/", 1)[-1])
+    return name[: -len(".ics")] if name.endswith(".ics") else name
+
+
+async def multiget_by_uid(
+    client: CalDAVClient, calendar_urls: Sequence[str], uids: Sequence[str]
+) -> Tuple[Dict[str, CalendarObject], List[Dict[str, str]]]:
+    """
+    在多个日历中按 UID 批量获取对象
+
+    每个日历一次 calendar-multiget，并发执行；同一 UID 在多个日历中存在时
+    取 calendar_urls 中靠前的日历。返回 ({UID: (URL, ETag, 数据)}, 失败的日历)
+    """
+    uids = list(dict.fromkeys(uids))
+    if not uids:
+        return {}, []
+    results = await asyncio.gather(
+        *(
+            client.multiget(url, [object_url(url, uid) for uid in uids])
+            for url in calendar_urls
+        ),
+        return_exceptions=True,
+    )
+
+    found: Dict[str, CalendarObject] = {}
+    errors: List[Dict[str, str]] = []
+    for url, result in zip(calendar_urls, results):
+        if isinstance(result, BaseException):
+            message = str(result).splitlines()[0] if str(result) else type(result).__name__
+            errors.append({"calendar": url, "error": message})
+            continue
+        for item in result:
+            found.setdefault(_uid_from_url(item[0]), item)
+    return found, errors
+
+
+async def run_bounded(
+    jobs: Sequence[Callable[[], Awaitable[Any]]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> List[Any]:
+    """
+    在并发上限内执行任务
+
+    结果按任务顺序返回，任务抛出的异常作为结果返回而不向外传播
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(job: Callable[[], Awaitable[Any]]) -> Any:
+        async with semaphore:
+            return await job()
+
+    return await asyncio.gather(*(run(job) for job in jobs), return_exceptions=True)
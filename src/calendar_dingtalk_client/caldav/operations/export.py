@@ -0,0 +1,73 @@
+"""
+流式批量导出
+
+从 REPORT 流逐个取出日历对象，按 ICS、NDJSON 或 CSV 格式逐块产出文本，
+导出过程不在内存中累积整个日历。
+"""
+
+import csv
+import io
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Optional, Set, Tuple
+
+from ...icalendar.stream import iter_text
+
+EXPORT_FORMATS = {
+    "ics": "text/calendar; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+CSV_COLUMNS = (
+    "uid",
+    "summary",
+    "dtstart",
+    "dtend",
+    "location",
+    "description",
+    "recurrence_id",
+    "url",
+    "etag",
+)
+
+
+async def export_ics(
+    objects: AsyncIterable[Tuple[str, Optional[str], str]],
+    prodid: str = "-//DingTalk CalDAV Client//CN",
+) -> AsyncIterator[str]:
+    """
+    导出为单个 VCALENDAR
+
+    组件按服务器返回的原文直接输出，VTIMEZONE 按 TZID 只输出一次
+    """
+    yield f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{prodid}\r\n"
+    emitted_tzids: Set[str] = set()
+    async for _, _, ical_data in objects:
+        parts = []
+        for component in iter_text(ical_data):
+            for tzid, definition in component.timezones.items():
+                if tzid not in emitted_tzids:
+                    emitted_tzids.add(tzid)
+                    parts.append(definition)
+            parts.append(component.raw)
+        if parts:
+            yield "".join(parts)
+    yield "END:VCALENDAR\r\n"
+
+
+async def export_ndjson(events: AsyncIterable[Dict[str, Any]]) -> AsyncIterator[str]:
+    """导出为每行一个 JSON 对象"""
+    async for event in events:
+        yield json.dumps(event, ensure_ascii=False) + "\n"
+
+
+async def export_csv(events: AsyncIterable[Dict[str, Any]]) -> AsyncIterator[str]:
+    """导出为 CSV（带表头）"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue()
+    async for event in events:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([event.get(column) or "" for column in CSV_COLUMNS])
+        yield buffer.getvalue()
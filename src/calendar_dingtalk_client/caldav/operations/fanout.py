@@ -0,0 +1,82 @@
+"""
+多日历并发查询
+
+对每个日历并发发起 REPORT，各自带超时：超时或失败的日历记入错误列表，
+不影响其他日历。每个日历的结果在本地排序后用堆做 k 路归并，
+总耗时约等于最慢的单个查询。
+"""
+
+import asyncio
+import heapq
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..client import CalDAVClient
+from ..query import PropFilter
+
+DEFAULT_TIMEOUT = 10.0
+
+
+async def _collect_events(
+    client: CalDAVClient,
+    calendar: Dict[str, Any],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    properties: Optional[Sequence[str]],
+    filters: Sequence[PropFilter],
+) -> List[Dict[str, Any]]:
+    events = []
+    async for event in client.iter_events(calendar["url"], start, end, properties, filters):
+        event["calendar"] = calendar["name"]
+        events.append(event)
+    return events
+
+
+async def fan_out_events(
+    client: CalDAVClient,
+    calendars: Sequence[Dict[str, Any]],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    properties: Optional[Sequence[str]] = None,
+    key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    filters: Sequence[PropFilter] = (),
+) -> Tuple[List[List[Dict[str, Any]]], List[Dict[str, str]]]:
+    """
+    并发查询多个日历的事件
+
+    filters 为属性过滤条件（见 caldav.query）。
+    返回 (每个成功日历按 key 排序的事件列表, [{"calendar", "error"}])
+    """
+
+    async def one(calendar: Dict[str, Any]) -> List[Dict[str, Any]]:
+        events = await asyncio.wait_for(
+            _collect_events(client, calendar, start, end, properties, filters), timeout
+        )
+        if key is not None:
+            events.sort(key=key)
+        return events
+
+    results = await asyncio.gather(
+        *(one(calendar) for calendar in calendars), return_exceptions=True
+    )
+
+    runs: List[List[Dict[str, Any]]] = []
+    errors: List[Dict[str, str]] = []
+    for calendar, result in zip(calendars, results):
+        if isinstance(result, BaseException):
+            if isinstance(result, asyncio.TimeoutError):
+                message = f"Timed out after {timeout}s"
+            else:
+                message = str(result).splitlines()[0] if str(result) else type(result).__name__
+            errors.append({"calendar": calendar["name"], "error": message})
+        else:
+            runs.append(result)
+    return runs, errors
+
+
+def merge_sorted(
+    runs: Sequence[List[Dict[str, Any]]], key: Callable[[Dict[str, Any]], Any]
+) -> Iterator[Dict[str, Any]]:
+    """k 路归并已排序的结果，惰性产出"""
+    return heapq.merge(*runs, key=key)
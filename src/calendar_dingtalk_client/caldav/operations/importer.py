@@ -0,0 +1,127 @@
+"""
+批量导入 .ics
+
+流式解析上传的日历文件，按 UID 拆分为独立资源（主事件与其重复实例覆盖
+放在同一资源中），通过有界队列交给固定数量的工作协程并发 PUT。
+队列满时暂停读取输入，内存占用与文件大小无关。
+写入不覆盖日历中已有的同 UID 对象，这些条目报告为 exists。
+"""
+
+import asyncio
+from typing import Any, AsyncIterable, Dict, List, Optional
+from urllib.parse import quote
+
+import httpx
+
+from ..client import CalDAVClient
+from ...icalendar.stream import StreamComponent, aiter_ics, wrap_calendar
+
+DEFAULT_CONCURRENCY = 8
+# 并发写入数上限，避免单个请求启动大量工作协程
+MAX_CONCURRENCY = 32
+
+
+async def _group_by_uid(
+    stream: AsyncIterable[bytes],
+) -> AsyncIterable[List[StreamComponent]]:
+    """把相邻的同 UID 组件合并为一组"""
+    group: List[StreamComponent] = []
+    async for component in aiter_ics(stream):
+        if group and component.uid != group[0].uid:
+            yield group
+            group = []
+        group.append(component)
+    if group:
+        yield group
+
+
+async def import_ics(
+    client: CalDAVClient,
+    calendar_url: str,
+    stream: AsyncIterable[bytes],
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> Dict[str, Any]:
+    """
+    导入 .ics 字节流到指定日历
+
+    返回报告：{"total", "created", "failed", "items": [{index, uid, status, ...}]}，
+    status 为 created、exists（日历中已有同 UID 的对象，未写入）或 failed，
+    failed 计数包含 exists
+    """
+    concurrency = min(max(1, concurrency), MAX_CONCURRENCY)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    items: List[Dict[str, Any]] = []
+    base_url = calendar_url.rstrip("/")
+
+    async def worker() -> None:
+        while True:
+            job = await queue.get()
+            if job is None:
+                queue.task_done()
+                return
+            index, group = job
+            uid = group[0].uid
+            item: Dict[str, Any] = {
+                "index": index,
+                "uid": uid,
+                "components": len(group),
+            }
+            try:
+                ical_data = wrap_calendar(group)
+                item["url"] = await client.create_object(
+                    base_url, quote(uid, safe="@"), ical_data
+                )
+                item["status"] = "created"
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 412:
+                    item["status"] = "exists"
+                    item["error"] = f"Object with UID '{uid}' already exists"
+                else:
+                    item["status"] = "failed"
+                    item["error"] = str(e)
+            except Exception as e:
+                item["status"] = "failed"
+                item["error"] = str(e)
+            items.append(item)
+            queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    seen_uids = set()
+    index = 0
+    try:
+        async for group in _group_by_uid(stream):
+            uid = group[0].uid
+            error: Optional[str] = None
+            if not uid:
+                error = "Component has no UID"
+            elif uid in seen_uids:
+                # 同一 UID 的组件不相邻时无法合并，避免覆盖前一次写入
+                error = f"Duplicate UID '{uid}' not adjacent to its first occurrence"
+            if error:
+                items.append(
+                    {
+                        "index": index,
+                        "uid": uid,
+                        "components": len(group),
+                        "status": "failed",
+                        "error": error,
+                    }
+                )
+            else:
+                seen_uids.add(uid)
+                # 队列满时在此等待，形成对输入读取的背压
+                await queue.put((index, group))
+            index += 1
+    finally:
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    items.sort(key=lambda item: item["index"])
+    created = sum(1 for item in items if item["status"] == "created")
+    return {
+        "total": len(items),
+        "created": created,
+        "failed": len(items) - created,
+        "items": items,
+    }
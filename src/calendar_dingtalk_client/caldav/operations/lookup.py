@@ -0,0 +1,60 @@
+"""
+按 UID 并发定位对象
+
+不知道对象在哪个日历时，同时向所有日历探测 {日历}/{UID}.ics，
+第一个命中即返回并取消其余请求；全部未命中时总耗时约为一次往返。
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Optional, Sequence, Tuple
+
+import httpx
+
+from ..client import CalDAVClient
+from .batch import object_url
+
+_NOT_FOUND = (404, 410)
+
+
+def _is_not_found(error: BaseException) -> bool:
+    return (
+        isinstance(error, httpx.HTTPStatusError)
+        and error.response.status_code in _NOT_FOUND
+    )
+
+
+async def locate(
+    client: CalDAVClient,
+    calendar_urls: Sequence[str],
+    uid: str,
+    fetch: Optional[Callable[[str], Awaitable[Any]]] = None,
+) -> Optional[Tuple[str, Any]]:
+    """
+    并发探测 UID 所在的日历
+
+    fetch 默认为 client.get_object（也可传入 client.head_object）。
+    返回 (对象 URL, fetch 结果)；全部 404 时返回 None；
+    没有命中且存在其他错误时抛出该错误
+    """
+    fetch = fetch or client.get_object
+    urls = [object_url(calendar_url, uid) for calendar_url in calendar_urls]
+    tasks = [asyncio.create_task(fetch(url)) for url in urls]
+    error: Optional[BaseException] = None
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # 同时完成时按日历顺序取第一个
+            for task in sorted(done, key=tasks.index):
+                exc = task.exception()
+                if exc is None:
+                    return urls[tasks.index(task)], task.result()
+                if not _is_not_found(exc):
+                    error = exc
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    if error is not None:
+        raise error
+    return None
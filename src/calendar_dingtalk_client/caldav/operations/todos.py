@@ -0,0 +1,231 @@
+"""
+待办查询
+
+按截止时间和优先级排序的内存索引：截止时间范围用二分查找定位，
+状态、优先级在区间内过滤。索引按日历 ctag 缓存，ctag 未变化时
+"逾期"、"本周到期按优先级"等查询不再下载待办；服务器不提供 ctag 时
+把状态和截止时间条件交给服务器筛选（见 caldav.query），结果再在本地校验一遍。
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from ..client import CalDAVClient
+from ..query import PropFilter, TextMatch
+
+TODO_STATUSES = ("NEEDS-ACTION", "IN-PROCESS", "COMPLETED", "CANCELLED")
+OPEN_STATUSES = frozenset({"NEEDS-ACTION", "IN-PROCESS"})
+
+# 没有截止时间的待办排在最前面（与 api.pagination.todo_sort_key 一致）
+_MISSING_EPOCH = -(1 << 62)
+# PRIORITY 缺失或为 0 表示未定义，排在 9 之后
+_UNDEFINED_PRIORITY = 10
+
+TODO_SORTS = ("due", "priority")
+
+# 过滤和排序需要的属性：只请求部分属性（fields=）时也始终请求
+_QUERY_PROPERTIES = ("DUE", "PRIORITY", "STATUS", "UID")
+
+
+def priority_rank(todo: Dict[str, Any]) -> int:
+    """优先级排序值：1 最高，未定义为 10"""
+    priority = todo.get("priority") or 0
+    return priority if 1 <= priority <= 9 else _UNDEFINED_PRIORITY
+
+
+def _due(todo: Dict[str, Any]) -> int:
+    epoch = todo.get("due_epoch")
+    return _MISSING_EPOCH if epoch is None else epoch
+
+
+def parse_status(value: Optional[str]) -> Optional[FrozenSet[str]]:
+    """
+    解析逗号分隔的状态列表，"open" 表示未完成（NEEDS-ACTION, IN-PROCESS）
+
+    未指定时返回 None，未知状态抛出 ValueError
+    """
+    if not value:
+        return None
+    statuses = set()
+    for name in value.split(","):
+        name = name.strip().upper()
+        if not name:
+            continue
+        if name == "OPEN":
+            statuses |= OPEN_STATUSES
+        elif name in TODO_STATUSES:
+            statuses.add(name)
+        else:
+            raise ValueError(
+                f"Unknown status '{name}', expected one of: open, {', '.join(TODO_STATUSES)}"
+            )
+    return frozenset(statuses) or None
+
+
+@dataclass(frozen=True)
+class TodoQuery:
+    """待办查询条件，截止时间为纪元秒，区间左闭右开"""
+
+    status: Optional[FrozenSet[str]] = None
+    due_after: Optional[int] = None
+    due_before: Optional[int] = None
+    max_priority: Optional[int] = None
+    sort: str = "due"
+
+    @property
+    def has_due_range(self) -> bool:
+        return self.due_after is not None or self.due_before is not None
+
+    def matches(self, todo: Dict[str, Any]) -> bool:
+        """待办是否满足条件"""
+        if self.status is not None and (todo.get("status") or "NEEDS-ACTION") not in self.status:
+            return False
+        if self.has_due_range:
+            due = todo.get("due_epoch")
+            if due is None:
+                return False
+            if self.due_after is not None and due < self.due_after:
+                return False
+            if self.due_before is not None and due >= self.due_before:
+                return False
+        if self.max_priority is not None and priority_rank(todo) > self.max_priority:
+            return False
+        return True
+
+
+class TodoIndex:
+    """
+    按 (截止时间, UID, URL) 和 (优先级, 截止时间, UID, URL) 排好序的待办
+
+    与 api.pagination 的排序键一致，游标分页可直接使用
+    """
+
+    def __init__(self, todos: List[Dict[str, Any]]):
+        self._by_due = sorted(
+            todos, key=lambda t: (_due(t), t.get("uid") or "", t.get("url") or "")
+        )
+        self._due_keys = [_due(t) for t in self._by_due]
+        self._by_priority = sorted(
+            todos,
+            key=lambda t: (priority_rank(t), _due(t), t.get("uid") or "", t.get("url") or ""),
+        )
+
+    def __len__(self) -> int:
+        return len(self._by_due)
+
+    def _due_range(self, query: TodoQuery) -> Tuple[int, int]:
+        if not query.has_due_range:
+            return 0, len(self._by_due)
+        # 有截止时间条件时跳过没有截止时间的待办
+        low = _MISSING_EPOCH + 1 if query.due_after is None else query.due_after
+        start = bisect_left(self._due_keys, low)
+        end = (
+            len(self._due_keys)
+            if query.due_before is None
+            else bisect_left(self._due_keys, query.due_before)
+        )
+        return start, end
+
+    def query(self, query: TodoQuery) -> List[Dict[str, Any]]:
+        """返回满足条件的待办，按 query.sort 排序"""
+        if query.sort == "priority":
+            return [todo for todo in self._by_priority if query.matches(todo)]
+        start, end = self._due_range(query)
+        return [todo for todo in self._by_due[start:end] if query.matches(todo)]
+
+
+def query_properties(properties: Optional[Sequence[str]]) -> Optional[Tuple[str, ...]]:
+    """在 C:prop 投影中补上过滤和排序需要的属性，None 表示请求完整数据"""
+    if properties is None:
+        return None
+    return tuple(sorted(set(properties).union(_QUERY_PROPERTIES)))
+
+
+def todo_prop_filters(query: TodoQuery) -> List[PropFilter]:
+    """
+    可下推给服务器的过滤条件
+
+    只下推服务器结果必为超集的条件：单一状态（NEEDS-ACTION 的待办可以不写
+    STATUS，不下推）和 DUE 时间范围，其余条件在本地过滤
+    """
+    filters = []
+    if query.status is not None and len(query.status) == 1:
+        (status,) = query.status
+        if status != "NEEDS-ACTION":
+            filters.append(PropFilter("STATUS", text_match=TextMatch(status)))
+    if query.has_due_range:
+        filters.append(PropFilter("DUE", time_range=(query.due_after, query.due_before)))
+    return filters
+
+
+class TodoIndexCache:
+    """按 (日历 URL, 请求的属性) 缓存 (ctag, TodoIndex)"""
+
+    def __init__(self):
+        self._indexes: Dict[Tuple[str, Optional[Tuple[str, ...]]], Tuple[str, TodoIndex]] = {}
+
+    async def load(
+        self,
+        client: CalDAVClient,
+        calendar_url: str,
+        properties: Optional[Sequence[str]] = None,
+    ) -> Optional[TodoIndex]:
+        """
+        获取日历的待办索引，ctag 变化时重新下载
+
+        properties 为 C:prop 投影（None 表示完整数据），已有同一 ctag 的
+        完整索引时直接复用；服务器不提供 ctag 时无法判断索引是否过期，返回 None
+        """
+        properties = query_properties(properties)
+        ctag = await client.get_ctag(calendar_url)
+        if ctag is None:
+            for key in [key for key in self._indexes if key[0] == calendar_url]:
+                del self._indexes[key]
+            return None
+        for key in {(calendar_url, properties), (calendar_url, None)}:
+            cached = self._indexes.get(key)
+            if cached is not None and cached[0] == ctag:
+                return cached[1]
+        index = TodoIndex(await client.get_todos(calendar_url, properties=properties))
+        self._indexes[(calendar_url, properties)] = (ctag, index)
+        return index
+
+    def clear(self) -> None:
+        self._indexes.clear()
+
+
+_todo_index_cache: Optional[TodoIndexCache] = None
+
+
+def get_todo_index_cache() -> TodoIndexCache:
+    """获取待办索引缓存实例（单例）"""
+    global _todo_index_cache
+    if _todo_index_cache is None:
+        _todo_index_cache = TodoIndexCache()
+    return _todo_index_cache
+
+
+async def query_todos(
+    client: CalDAVClient,
+    calendar_url: str,
+    query: TodoQuery,
+    cache: Optional[TodoIndexCache] = None,
+    properties: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    查询日历中的待办，请求失败时抛出异常
+
+    properties 为只需返回的 iCalendar 属性（见 caldav.fields.required_properties），
+    用于缩小向服务器请求的 C:prop 投影
+    """
+    cache = cache or get_todo_index_cache()
+    index = await cache.load(client, calendar_url, properties)
+    if index is None:
+        todos = await client.get_todos(
+            calendar_url,
+            properties=query_properties(properties),
+            filters=todo_prop_filters(query),
+        )
+        index = TodoIndex(todos)
+    return index.query(query)
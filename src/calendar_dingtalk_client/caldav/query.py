@@ -0,0 +1,345 @@
+"""
+calendar-query 过滤条件
+
+把过滤条件编译为 RFC 4791 9.7 的 C:prop-filter / C:text-match / C:param-filter，
+由服务器筛选后只传回匹配的对象；同一组条件也可以在本地对组件求值。
+服务器拒绝过滤条件（4xx/501，如不满足 CALDAV:supported-filter）时
+去掉属性过滤重新查询，在本地筛选；服务器忽略过滤条件时本地求值同样兜底。
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from xml.sax.saxutils import escape, quoteattr
+
+import httpx
+
+from ..icalendar.timezones import to_epoch
+
+if TYPE_CHECKING:
+    from .client import CalDAVClient
+
+logger = logging.getLogger(__name__)
+
+# 服务器必须支持的两种排序规则之一（RFC 4791 7.5.1），ASCII 以外的字符按原样比较
+DEFAULT_COLLATION = "i;ascii-casemap"
+COLLATIONS = ("i;ascii-casemap", "i;octet", "i;unicode-casemap")
+
+# 服务器拒绝过滤条件时可能返回的状态码
+_UNSUPPORTED_FILTER = (400, 403, 412, 422, 501)
+
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def _fold(text: str, collation: str) -> str:
+    if collation == "i;octet":
+        return text
+    if collation == "i;unicode-casemap":
+        return text.casefold()
+    return text.translate(_ASCII_LOWER)
+
+
+def _format_epoch(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+@dataclass(frozen=True)
+class TextMatch:
+    """子串匹配（C:text-match）"""
+
+    value: str
+    collation: str = DEFAULT_COLLATION
+    negate: bool = False
+
+    def __post_init__(self):
+        if self.collation not in COLLATIONS:
+            raise ValueError(
+                f"Unknown collation '{self.collation}', expected one of: {', '.join(COLLATIONS)}"
+            )
+
+    def to_xml(self) -> str:
+        negate = ' negate-condition="yes"' if self.negate else ""
+        return (
+            f"<C:text-match collation={quoteattr(self.collation)}{negate}>"
+            f"{escape(self.value)}</C:text-match>"
+        )
+
+    def matches(self, text: str) -> bool:
+        found = _fold(self.value, self.collation) in _fold(text, self.collation)
+        return found != self.negate
+
+
+@dataclass(frozen=True)
+class ParamFilter:
+    """属性参数过滤（C:param-filter）"""
+
+    name: str
+    text_match: Optional[TextMatch] = None
+    is_not_defined: bool = False
+
+    def to_xml(self) -> str:
+        if self.is_not_defined:
+            body = "<C:is-not-defined/>"
+        else:
+            body = self.text_match.to_xml() if self.text_match else ""
+        return f"<C:param-filter name={quoteattr(self.name.upper())}>{body}</C:param-filter>"
+
+    def matches(self, prop: Any) -> bool:
+        params = getattr(prop, "params", None) or {}
+        value = params.get(self.name.upper())
+        if self.is_not_defined:
+            return value is None
+        if value is None:
+            return False
+        if self.text_match is None:
+            return True
+        values = value if isinstance(value, (list, tuple)) else [value]
+        return any(self.text_match.matches(str(item)) for item in values)
+
+
+@dataclass(frozen=True)
+class PropFilter:
+    """
+    属性过滤（C:prop-filter）
+
+    time_range 为 (开始纪元秒, 结束纪元秒)，区间左闭右开，任一端可为 None
+    """
+
+    name: str
+    text_match: Optional[TextMatch] = None
+    time_range: Optional[Tuple[Optional[int], Optional[int]]] = None
+    is_not_defined: bool = False
+    param_filters: Tuple[ParamFilter, ...] = ()
+
+    def to_xml(self) -> str:
+        if self.is_not_defined:
+            body = "<C:is-not-defined/>"
+        else:
+            body = ""
+            if self.time_range is not None:
+                start, end = self.time_range
+                bounds = ""
+                if start is not None:
+                    bounds += f' start="{_format_epoch(start)}"'
+                if end is not None:
+                    bounds += f' end="{_format_epoch(end)}"'
+                body += f"<C:time-range{bounds}/>"
+            if self.text_match is not None:
+                body += self.text_match.to_xml()
+            body += "".join(param.to_xml() for param in self.param_filters)
+        return f"<C:prop-filter name={quoteattr(self.name.upper())}>{body}</C:prop-filter>"
+
+    def _instance_matches(self, prop: Any) -> bool:
+        if self.text_match is not None and not self.text_match.matches(_property_text(prop)):
+            return False
+        if self.time_range is not None:
+            epoch = to_epoch(getattr(prop, "dt", None))
+            start, end = self.time_range
+            if epoch is None:
+                return False
+            if start is not None and epoch < start:
+                return False
+            if end is not None and epoch >= end:
+                return False
+        return all(param.matches(prop) for param in self.param_filters)
+
+    def matches(self, component: Any) -> bool:
+        """组件是否满足条件：任一同名属性满足即可"""
+        value = component.get(self.name.upper())
+        if self.is_not_defined:
+            return value is None
+        if value is None:
+            return False
+        instances = value if isinstance(value, list) else [value]
+        return any(self._instance_matches(prop) for prop in instances)
+
+
+def _property_text(prop: Any) -> str:
+    """属性值的文本形式，CATEGORIES 等多值属性以逗号连接"""
+    cats = getattr(prop, "cats", None)
+    if cats is not None:
+        return ",".join(str(item) for item in cats)
+    if isinstance(prop, str):
+        return str(prop)
+    try:
+        return prop.to_ical().decode("utf-8")
+    except Exception:
+        return str(prop)
+
+
+def prop_filters_xml(filters: Iterable[PropFilter]) -> str:
+    """编译为 comp-filter 内的 C:prop-filter 片段"""
+    return "".join(prop_filter.to_xml() for prop_filter in filters)
+
+
+def matches_all(component: Any, filters: Iterable[PropFilter]) -> bool:
+    """组件是否满足全部条件"""
+    return all(prop_filter.matches(component) for prop_filter in filters)
+
+
+@dataclass
+class CalendarQuery:
+    """
+    calendar-query 构建器，通过 CalDAVClient.query() 创建
+
+        todos = await (
+            client.query(calendar_url, "VTODO")
+            .where("SUMMARY", "周报")
+            .where("STATUS", "COMPLETED", negate=True)
+            .fetch()
+        )
+    """
+
+    client: "CalDAVClient"
+    calendar_url: str
+    component: str = "VEVENT"
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    properties: Optional[Sequence[str]] = None
+    filters: List[PropFilter] = field(default_factory=list)
+    # 最近一次执行时过滤条件是否由服务器处理
+    pushed_down: Optional[bool] = None
+
+    def between(self, start: Optional[datetime], end: Optional[datetime]) -> "CalendarQuery":
+        """组件时间范围（C:time-range）"""
+        self.start, self.end = start, end
+        return self
+
+    def select(self, properties: Optional[Sequence[str]]) -> "CalendarQuery":
+        """只请求所选属性，None 表示完整数据"""
+        self.properties = properties
+        return self
+
+    def filter(self, *filters: PropFilter) -> "CalendarQuery":
+        """追加 PropFilter"""
+        self.filters.extend(filters)
+        return self
+
+    def where(
+        self,
+        name: str,
+        contains: Optional[str] = None,
+        *,
+        negate: bool = False,
+        collation: str = DEFAULT_COLLATION,
+        defined: bool = True,
+    ) -> "CalendarQuery":
+        """
+        属性条件：contains 为子串匹配，negate=True 取反；
+        只给出 name 时要求属性存在，defined=False 时要求属性不存在
+        """
+        if not defined:
+            return self.filter(PropFilter(name, is_not_defined=True))
+        text_match = (
+            TextMatch(contains, collation=collation, negate=negate)
+            if contains is not None
+            else None
+        )
+        return self.filter(PropFilter(name, text_match=text_match))
+
+    def where_time(
+        self, name: str, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> "CalendarQuery":
+        """日期属性（如 DUE、COMPLETED）落在 [start, end) 内"""
+        return self.filter(PropFilter(name, time_range=(to_epoch(start), to_epoch(end))))
+
+    def where_param(
+        self,
+        name: str,
+        param: str,
+        contains: Optional[str] = None,
+        *,
+        negate: bool = False,
+        collation: str = DEFAULT_COLLATION,
+        defined: bool = True,
+    ) -> "CalendarQuery":
+        """属性参数条件，例如 where_param("ATTENDEE", "PARTSTAT", "ACCEPTED")"""
+        if not defined:
+            param_filter = ParamFilter(param, is_not_defined=True)
+        else:
+            text_match = (
+                TextMatch(contains, collation=collation, negate=negate)
+                if contains is not None
+                else None
+            )
+            param_filter = ParamFilter(param, text_match=text_match)
+        return self.filter(PropFilter(name, param_filters=(param_filter,)))
+
+    def _properties(self) -> Optional[List[str]]:
+        # 本地求值需要过滤条件涉及的属性
+        if self.properties is None:
+            return None
+        names = list(self.properties)
+        for prop_filter in self.filters:
+            if prop_filter.name.upper() not in names:
+                names.append(prop_filter.name.upper())
+        return names
+
+    async def objects(self) -> AsyncIterator[Tuple[str, Optional[str], str]]:
+        """
+        执行 REPORT，产出 (对象 URL, ETag, calendar-data)
+
+        服务器拒绝过滤条件时去掉属性过滤重试，此时返回的对象未经筛选
+        """
+        args = (self.calendar_url, self.start, self.end, self.component, self._properties())
+        self.pushed_down = bool(self.filters)
+        if not self.filters:
+            async for item in self.client.iter_calendar_objects(*args):
+                yield item
+            return
+
+        stream = self.client.iter_calendar_objects(*args, prop_filters_xml(self.filters))
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            return
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in _UNSUPPORTED_FILTER:
+                raise
+            logger.info(
+                f"Server rejected prop-filter for {self.calendar_url} "
+                f"({e.response.status_code}), filtering locally"
+            )
+            self.pushed_down = False
+            stream = self.client.iter_calendar_objects(*args)
+        else:
+            yield first
+        async for item in stream:
+            yield item
+
+    async def components(self) -> AsyncIterator[Tuple[str, Optional[str], Any]]:
+        """产出满足全部条件的 (对象 URL, ETag, 组件)"""
+        from ..icalendar.parser import iter_components
+
+        async for url, etag, ical_data in self.objects():
+            try:
+                components = list(iter_components(ical_data, (self.component,)))
+            except Exception as e:
+                print(f"[ERROR] Error parsing {self.component} {url}: {e}")
+                continue
+            for component, _ in components:
+                if matches_all(component, self.filters):
+                    yield url, etag, component
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        """产出事件/待办字典（与 iter_events / iter_todos 相同）"""
+        from .client import _event_entry, _todo_entry
+
+        entry = _todo_entry if self.component == "VTODO" else _event_entry
+        async for url, etag, component in self.components():
+            yield entry(url, etag, component)
+
+    async def fetch(self) -> List[Dict[str, Any]]:
+        """获取全部结果，请求失败时抛出异常"""
+        return [item async for item in self]
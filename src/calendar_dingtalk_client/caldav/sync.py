@@ -0,0 +1,217 @@
+"""
+增量同步
+
+在内存中保存各日历事件的本地副本：ctag 未变化时不访问服务器；
+ctag 变化时先取全部对象的 ETag，只对新增或 ETag 变化的对象发起
+calendar-multiget，并删除服务器上已不存在的对象。
+每个对象的变化通知给订阅者（搜索索引等），订阅者据此增量更新。
+"""
+
+import asyncio
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urljoin, urlparse
+
+from .client import CalDAVClient, _event_entry
+
+# 每次 calendar-multiget 请求的对象数
+MULTIGET_BATCH_SIZE = 100
+
+# 订阅者：(对象 URL, 该对象的事件列表)，列表为空表示对象已删除
+SyncListener = Callable[[str, List[Dict[str, Any]]], None]
+
+
+@dataclass
+class CalendarState:
+    """单个日历的本地副本"""
+
+    name: str
+    url: str
+    ctag: Optional[str] = None
+    # 对象 URL -> (ETag, 该对象中的事件)
+    objects: Dict[str, Tuple[Optional[str], List[Dict[str, Any]]]] = field(
+        default_factory=dict
+    )
+
+
+@dataclass
+class SyncResult:
+    """一次同步的变化"""
+
+    calendar: str
+    changed: int = 0
+    removed: int = 0
+
+
+def canonical_url(base: str, url: str) -> str:
+    """对象的规范 URL（与同步时 href 的形式一致），url 可以是相对地址"""
+    parsed = urlparse(urljoin(base, url))
+    return f"{parsed.scheme}://{parsed.netloc}{re.sub('/{2,}', '/', parsed.path)}"
+
+
+def parse_object(
+    calendar: str, url: str, etag: Optional[str], ical_data: str
+) -> List[Dict[str, Any]]:
+    """把对象数据解析为事件列表（主事件和重复实例覆盖），每个事件标注所属日历"""
+    from ..icalendar.parser import iter_components
+
+    try:
+        components = list(iter_components(ical_data, ("VEVENT",)))
+    except Exception as e:
+        print(f"[ERROR] Error parsing event {url}: {e}")
+        return []
+    events = []
+    for component, _ in components:
+        event = _event_entry(url, etag, component)
+        event["calendar"] = calendar
+        events.append(event)
+    return events
+
+
+class SyncStore:
+    """多个日历的本地副本"""
+
+    def __init__(self, batch_size: int = MULTIGET_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._calendars: Dict[str, CalendarState] = {}
+        self._listeners: List[SyncListener] = []
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def subscribe(self, listener: SyncListener) -> None:
+        """订阅对象变化，已同步的对象立即回放给新订阅者"""
+        self._listeners.append(listener)
+        for state in self._calendars.values():
+            for url, (_, events) in state.objects.items():
+                listener(url, events)
+
+    def _notify(self, url: str, events: List[Dict[str, Any]]) -> None:
+        for listener in self._listeners:
+            listener(url, events)
+
+    def ctag(self, calendar: str) -> Optional[str]:
+        """日历最近一次同步时的 ctag，未同步过返回 None"""
+        state = self._calendars.get(calendar)
+        return state.ctag if state is not None else None
+
+    def events(self, calendars: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """本地副本中的事件，calendars 为日历名称"""
+        names = self._calendars if calendars is None else calendars
+        for name in names:
+            state = self._calendars.get(name)
+            if state is None:
+                continue
+            for _, events in state.objects.values():
+                yield from events
+
+    def _owner(self, url: str) -> Optional[Tuple[CalendarState, str]]:
+        """对象所在的已同步日历及对象的规范 URL"""
+        for state in self._calendars.values():
+            key = canonical_url(state.url, url)
+            if key.startswith(canonical_url(state.url, "")):
+                return state, key
+        return None
+
+    def apply(self, url: str, etag: Optional[str], ical_data: Union[str, bytes]) -> bool:
+        """
+        写操作成功后直接更新本地副本并通知订阅者，不必等下次同步
+
+        对象所在日历尚未同步过时返回 False（下次同步会取回全部对象）；
+        etag 未知时传 None，下次同步会重新获取该对象
+        """
+        owner = self._owner(url)
+        if owner is None:
+            return False
+        state, key = owner
+        if isinstance(ical_data, bytes):
+            ical_data = ical_data.decode("utf-8")
+        events = parse_object(state.name, key, etag, ical_data)
+        state.objects[key] = (etag, events)
+        self._notify(key, events)
+        return True
+
+    def discard(self, url: str) -> bool:
+        """删除对象后从本地副本中移除并通知订阅者"""
+        owner = self._owner(url)
+        if owner is None or owner[1] not in owner[0].objects:
+            return False
+        state, key = owner
+        del state.objects[key]
+        self._notify(key, [])
+        return True
+
+    async def sync_calendar(
+        self, client: CalDAVClient, calendar: Dict[str, Any]
+    ) -> SyncResult:
+        """同步单个日历，请求失败时抛出异常，本地副本保持不变"""
+        name = calendar["name"]
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            state = self._calendars.get(name)
+            if state is not None and state.url != calendar["url"]:
+                # 同名日历换了地址，旧副本作废
+                for url in state.objects:
+                    self._notify(url, [])
+                del self._calendars[name]
+                state = None
+            if state is None:
+                state = CalendarState(name=name, url=calendar["url"])
+            result = SyncResult(calendar=name)
+
+            ctag = await client.get_ctag(state.url)
+            if ctag is not None and ctag == state.ctag:
+                return result
+
+            etags = await client.get_etags(state.url)
+            changed = [
+                url
+                for url, etag in etags.items()
+                if etag is None or url not in state.objects or state.objects[url][0] != etag
+            ]
+            fetched = []
+            for start in range(0, len(changed), self.batch_size):
+                fetched.extend(
+                    await client.multiget(state.url, changed[start : start + self.batch_size])
+                )
+
+            self._calendars[name] = state
+            for url, etag, ical_data in fetched:
+                events = parse_object(name, url, etag, ical_data)
+                state.objects[url] = (etag, events)
+                self._notify(url, events)
+            result.changed = len(fetched)
+            for url in [url for url in state.objects if url not in etags]:
+                del state.objects[url]
+                self._notify(url, [])
+                result.removed += 1
+            state.ctag = ctag
+            return result
+
+    async def sync(
+        self, client: CalDAVClient, calendars: Sequence[Dict[str, Any]]
+    ) -> Tuple[List[SyncResult], List[Dict[str, str]]]:
+        """并发同步多个日历，返回 (各日历的变化, 失败的日历)"""
+        results = await asyncio.gather(
+            *(self.sync_calendar(client, calendar) for calendar in calendars),
+            return_exceptions=True,
+        )
+        synced: List[SyncResult] = []
+        errors: List[Dict[str, str]] = []
+        for calendar, result in zip(calendars, results):
+            if isinstance(result, BaseException):
+                message = str(result).splitlines()[0] if str(result) else type(result).__name__
+                errors.append({"calendar": calendar["name"], "error": message})
+            else:
+                synced.append(result)
+        return synced, errors
+
+
+_sync_store: Optional[SyncStore] = None
+
+
+def get_sync_store() -> SyncStore:
+    """获取同步存储实例（单例）"""
+    global _sync_store
+    if _sync_store is None:
+        _sync_store = SyncStore()
+    return _sync_store
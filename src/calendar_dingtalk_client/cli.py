@@ -1,19 +1,64 @@
 """
 命令行工具
 """
+import argparse
 import asyncio
+import json
+from typing import List, Optional
 from .config import get_config
 from .caldav.client import CalDAVClient
+from .caldav.operations.importer import import_ics
+from .icalendar.stream import aiter_file
 
-async def main():
+async def list_calendars(client: CalDAVClient):
+    calendars = await client.list_calendars()
+    print(f"找到 {len(calendars)} 个日历:")
+    for cal in calendars:
+        print(f"  - {cal['displayname']}: {cal['url']}")
+
+async def import_file(client: CalDAVClient, args: argparse.Namespace) -> int:
+    calendars = await client.list_calendars()
+    target = None
+    for cal in calendars:
+        if args.calendar is None or args.calendar in (cal['name'], cal['displayname']):
+            target = cal
+            break
+    if target is None:
+        print(f"未找到日历: {args.calendar}")
+        return 1
+
+    print(f"导入 {args.file} -> {target['displayname']}")
+    report = await import_ics(client, target['url'], aiter_file(args.file), concurrency=args.concurrency)
+    print(f"共 {report['total']} 项，成功 {report['created']}，失败 {report['failed']}")
+    for item in report['items']:
+        if item['status'] != 'created':
+            print(f"  - [{item['index']}] {item['uid']}: {item.get('error')}")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0 if report['failed'] == 0 else 2
+
+async def run(args: argparse.Namespace) -> int:
     config = get_config()
     config.validate()
-    
-    async with CalDAVClient(config.caldav_base_url, config.caldav_username, config.caldav_password) as client:
-        calendars = await client.list_calendars()
-        print(f"找到 {len(calendars)} 个日历:")
-        for cal in calendars:
-            print(f"  - {cal['displayname']}: {cal['url']}")
+
+    async with CalDAVClient(config.caldav_base_url, config.caldav_username, config.caldav_password, config.caldav_timeout) as client:
+        if args.command == 'import':
+            return await import_file(client, args)
+        await list_calendars(client)
+        return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="calendar-dingtalk-client", description="钉钉 CALDAV 日历命令行工具")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("calendars", help="列出所有日历（默认）")
+    import_parser = subparsers.add_parser("import", help="批量导入 .ics 文件")
+    import_parser.add_argument("file", help=".ics 文件路径")
+    import_parser.add_argument("--calendar", help="目标日历名称，默认第一个日历")
+    import_parser.add_argument("--concurrency", type=int, default=get_config().import_concurrency, help="并发写入数")
+    import_parser.add_argument("--report", help="把逐条结果报告写入 JSON 文件")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    raise SystemExit(main())
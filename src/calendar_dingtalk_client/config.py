@@ -35,6 +35,56 @@ class Config:
         """CALDAV 超时时间（秒）"""
         return int(os.getenv("CALDAV_TIMEOUT", "30"))
 
+    @property
+    def caldav_fanout_timeout(self) -> float:
+        """多日历并发查询时单个日历的超时时间（秒）"""
+        return float(os.getenv("CALDAV_FANOUT_TIMEOUT", "10"))
+
+    @property
+    def default_timezone(self) -> str:
+        """浮动时间和全天事件使用的默认时区"""
+        return os.getenv("CALDAV_DEFAULT_TIMEZONE", "Asia/Shanghai")
+
+    @property
+    def import_concurrency(self) -> int:
+        """批量导入时的并发写入数"""
+        return int(os.getenv("IMPORT_CONCURRENCY", "8"))
+
+    @property
+    def batch_concurrency(self) -> int:
+        """批量接口中写操作的默认并发数"""
+        return int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+    @property
+    def batch_max_operations(self) -> int:
+        """单个批量请求最多包含的操作数"""
+        return int(os.getenv("BATCH_MAX_OPERATIONS", "100"))
+
+    @property
+    def json_fragment_cache_size(self) -> int:
+        """JSON 片段缓存最多保存的对象数"""
+        return int(os.getenv("JSON_FRAGMENT_CACHE_SIZE", "10000"))
+
+    @property
+    def http_cache_control(self) -> str:
+        """条件请求响应的 Cache-Control 头"""
+        return os.getenv("HTTP_CACHE_CONTROL", "private, no-cache")
+
+    @property
+    def http_compression_min_size(self) -> int:
+        """响应体小于该字节数时不压缩"""
+        return int(os.getenv("HTTP_COMPRESSION_MIN_SIZE", "1024"))
+
+    @property
+    def snapshot_past_days(self) -> int:
+        """事件快照展开重复事件时向前覆盖的天数"""
+        return int(os.getenv("SNAPSHOT_PAST_DAYS", "366"))
+
+    @property
+    def snapshot_future_days(self) -> int:
+        """事件快照展开重复事件时向后覆盖的天数"""
+        return int(os.getenv("SNAPSHOT_FUTURE_DAYS", "731"))
+
     @property
     def http_host(self) -> str:
         """HTTP 服务器主机"""
@@ -3,16 +3,90 @@ HTTP 服务器实现
 提供完整的 CalDAV REST API
 """
 
-from fastapi import FastAPI, HTTPException, Depends, Header
+from fastapi import FastAPI, HTTPException, Depends, Header, Path, Query, Request
 from fastapi.openapi.utils import get_openapi
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from fastapi.responses import StreamingResponse
+from typing import Optional, List, Dict, Any, AsyncIterator, Awaitable, Tuple, TypeVar
+from datetime import date, datetime, time, timedelta, timezone
+from functools import partial
+from urllib.parse import quote
+import asyncio
+import calendar as calendar_module
+import inspect
 import uuid
 
+import httpx
+
 from .config import get_config
+from .models.batch import BatchOperation, BatchRequest
 from .caldav.client import CalDAVClient
 from .icalendar.parser import parse_event, parse_todo
 from .icalendar.builder import build_event, build_todo
+from .icalendar.patcher import get_property, patch_component
+from .icalendar.canonical import canonical_hash
+from .icalendar.timezones import default_timezone, to_epoch
+from .caldav.fields import (
+    AGENDA_FIELDS,
+    EVENT_FIELDS,
+    SEARCH_FIELDS,
+    TODO_FIELDS,
+    parse_fields,
+    project,
+    required_properties,
+)
+from .caldav.query import PropFilter, TextMatch
+from .caldav.sync import get_sync_store
+from .caldav.operations.batch import multiget_by_uid, run_bounded
+from .caldav.operations.fanout import fan_out_events, merge_sorted
+from .caldav.operations.importer import (
+    MAX_CONCURRENCY as MAX_IMPORT_CONCURRENCY,
+    import_ics,
+)
+from .caldav.operations.lookup import locate
+from .caldav.operations.todos import OPEN_STATUSES, TodoQuery, parse_status, query_todos
+from .index.agenda import get_agenda_index
+from .index.analytics import (
+    BUSY_STATUSES,
+    UtilizationQuery,
+    calendar_utilization,
+    get_utilization_cache,
+)
+from .index.people import get_people_index
+from .index.search import get_search_index
+from .index.slots import WorkingHours, as_intervals, find_free_slots
+from .index.snapshot import get_event_snapshot
+from .api.http_cache import (
+    cache_headers,
+    etag_matches,
+    not_modified,
+    objects_etag,
+    strong_etag,
+)
+from .api.compression import CompressionMiddleware
+from .api.responses import (
+    FastJSONResponse,
+    get_fragment_cache,
+    list_response,
+    make_response,
+    response_format,
+)
+from .api.pagination import (
+    NDJSON_MEDIA_TYPE,
+    decode_cursor,
+    event_sort_key,
+    iterate,
+    ndjson_lines,
+    paginate_sorted,
+    todo_priority_key,
+    todo_sort_key,
+    wants_ndjson,
+)
+from .caldav.operations.export import (
+    EXPORT_FORMATS,
+    export_csv,
+    export_ics,
+    export_ndjson,
+)
 import uvicorn
 
 config = get_config()
@@ -24,7 +98,9 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=FastJSONResponse,
 )
+app.add_middleware(CompressionMiddleware, minimum_size=config.http_compression_min_size)
 
 _caldav_client: Optional[CalDAVClient] = None
 _calendars_cache: List[Dict[str, Any]] = []
@@ -71,7 +147,6 @@ async def health_check():
     return {"status": "healthy", "service": "calendar-dingtalk-client"}
 
 
-@app.get("/api/calendars", tags=["日历"])
 async def list_calendars() -> Dict[str, Any]:
     """获取日历列表"""
     global _calendars_cache
@@ -81,53 +156,685 @@ async def list_calendars() -> Dict[str, Any]:
     return {"calendars": _calendars_cache}
 
 
+@app.get("/api/calendars", tags=["日历"])
+async def read_calendars(
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+):
+    """获取日历列表，支持 If-None-Match 条件请求"""
+    calendars = await list_calendars()
+    fmt = response_format(accept)
+    etag = strong_etag(calendars["calendars"], fmt)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return make_response(calendars, fmt, headers=cache_headers(etag))
+
+
+def parse_datetime(value: Optional[str], name: str = "datetime") -> Optional[datetime]:
+    """解析 ISO 8601 时间参数"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: '{value}'")
+
+
+def event_filters(**conditions: Optional[str]) -> List[PropFilter]:
+    """把查询参数转换为属性过滤条件，参数名即 iCalendar 属性名"""
+    return [
+        PropFilter(name.upper(), text_match=TextMatch(value))
+        for name, value in conditions.items()
+        if value
+    ]
+
+
+async def prime_stream(stream: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    """预取第一项，使上游错误在发送响应头之前以 502 返回"""
+    try:
+        first = await stream.__anext__()
+    except StopAsyncIteration:
+        first = None
+        empty = True
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"CalDAV request failed: {e}")
+    else:
+        empty = False
+
+    async def primed():
+        if empty:
+            return
+        yield first
+        async for item in stream:
+            yield item
+
+    return primed()
+
+
+def select_fields(value: Optional[str], available: Dict[str, Any] = EVENT_FIELDS):
+    """解析 fields 参数，未知字段返回 400"""
+    try:
+        return parse_fields(value, available)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def get_calendar(calendar_name: Optional[str] = None) -> Dict[str, Any]:
+    """按名称查找日历，未指定时返回第一个日历（primary）"""
+    calendars = await list_calendars()
+    if not calendars["calendars"]:
+        raise HTTPException(status_code=404, detail="No calendar available")
+    if not calendar_name:
+        return calendars["calendars"][0]
+    for calendar in calendars["calendars"]:
+        if calendar_name in (calendar["name"], calendar["displayname"]):
+            return calendar
+    raise HTTPException(
+        status_code=404, detail=f"Calendar '{calendar_name}' not found"
+    )
+
+
+async def locate_object(
+    uid: str, kind: str = "Event", fetch: Optional[Any] = None
+) -> Tuple[str, Any]:
+    """在所有日历中并发查找 UID 对应的对象，返回 (对象 URL, fetch 结果)，未找到时 404"""
+    client = get_client()
+    calendar_urls = [calendar["url"] for calendar in (await list_calendars())["calendars"]]
+    try:
+        hit = await locate(client, calendar_urls, uid, fetch)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"CalDAV request failed: {e}")
+    if hit is None:
+        raise HTTPException(status_code=404, detail=f"{kind} '{uid}' not found")
+    return hit
+
+
+T = TypeVar("T")
+
+
+async def write_object(
+    request: Awaitable[T], precondition: str = "object has been modified"
+) -> T:
+    """
+    执行写请求：前置条件不满足时返回 412，其余失败返回 502
+
+    precondition 说明失败原因：更新、删除时 If-Match 不匹配（对象已被修改），
+    创建时 If-None-Match 不满足（对象已存在）
+    """
+    try:
+        return await request
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 412:
+            raise HTTPException(status_code=412, detail=f"Precondition failed: {precondition}")
+        raise HTTPException(status_code=502, detail=f"CalDAV request failed: {e}")
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"CalDAV request failed: {e}")
+
+
+def patch_object(ical_data: str, changes: Dict[str, Any], kind: str, uid: str) -> str:
+    """修改对象的主 VEVENT/VTODO，UID 对应的是其他类型的组件时 404"""
+    try:
+        return patch_component(ical_data, changes, f"V{kind.upper()}")
+    except ValueError:
+        raise HTTPException(status_code=404, detail=f"{kind} '{uid}' not found")
+
+
+async def select_calendars(value: Optional[str] = None) -> List[Dict[str, Any]]:
+    """解析 calendars 参数：未指定时为主日历，all 为全部日历，否则为逗号分隔的名称"""
+    calendars = (await list_calendars())["calendars"]
+    if not calendars:
+        return []
+    if not value:
+        return calendars[:1]
+    if value.strip().lower() == "all":
+        return list(calendars)
+    selected: List[Dict[str, Any]] = []
+    for name in (part.strip() for part in value.split(",")):
+        if not name:
+            continue
+        calendar = await get_calendar(name)
+        if calendar not in selected:
+            selected.append(calendar)
+    return selected
+
+
 @app.get("/api/events", tags=["事件"])
 async def list_events(
-    start_date: Optional[str] = None, end_date: Optional[str] = None
-) -> Dict[str, Any]:
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    calendars: Optional[str] = None,
+    summary: Optional[str] = None,
+    location: Optional[str] = None,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+):
     """
-    获取主日历下所有事件
-
-    默认使用第一个日历（primary），支持按日期范围筛选
+    获取事件列表
+
+    默认使用第一个日历（primary），calendars=all 或 calendars=a,b 时
+    并发查询多个日历并按开始时间归并，事件附带 calendar 字段；
+    单个日历超时或失败时记入 errors，不影响其他日历。支持按日期范围筛选，
+    summary / location / category / status 按子串（不区分 ASCII 大小写）筛选，
+    条件交给服务器处理，服务器不支持时在本地筛选。
+    结果按开始时间排序，可用 limit + cursor 游标分页；
+    fields=uid,dtstart,dtend 只返回（并只向服务器请求）所选字段；
+    请求头 Accept: application/x-ndjson 时以 NDJSON 流式返回，
+    application/msgpack 时返回 MessagePack。
+    响应 ETag 由日历 ctag 和查询参数生成，If-None-Match 命中时返回 304
     """
     client = get_client()
-    calendars = await list_calendars()
+    targets = await select_calendars(calendars)
+    start = parse_datetime(start_date, "start_date")
+    end = parse_datetime(end_date, "end_date")
+    selected = select_fields(fields)
+    properties = required_properties(selected)
+    filters = event_filters(summary=summary, location=location, categories=category, status=status)
+    fragments = get_fragment_cache()
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    if not targets:
+        return {"events": [], "count": 0, "next_cursor": None}
+
+    fmt = response_format(accept)
+    # 同一查询的不同表示需要不同的 ETag
+    representation = "ndjson" if wants_ndjson(accept) else fmt
+    urls = [calendar["url"] for calendar in targets]
+    variant = (*urls, start_date, end_date, filters, limit, cursor, fields, representation)
+    # 条件请求先比较 ctag，命中时不再查询事件；否则 ctag 与事件查询并发进行
+    ctag_requests = asyncio.gather(*(client.get_ctag(url) for url in urls))
+
+    async def ctag_etag() -> Optional[str]:
+        ctags = await ctag_requests
+        return strong_etag(*ctags, *variant) if all(ctags) else None
+
+    if if_none_match:
+        etag = await ctag_etag()
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    if wants_ndjson(accept) and limit is None and cursor is None and not calendars:
+        # 只查主日历且不分页时边解析边输出
+        events_stream = await prime_stream(
+            client.iter_events(urls[0], start, end, properties, filters)
+        )
+        etag = await ctag_etag()
+        return StreamingResponse(
+            ndjson_lines(events_stream, partial(fragments.encode, fields=selected)),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=cache_headers(etag),
+        )
 
-    if not calendars["calendars"]:
-        return {"events": [], "count": 0}
+    runs, errors = await fan_out_events(
+        client,
+        targets,
+        start,
+        end,
+        properties,
+        key=event_sort_key,
+        timeout=config.caldav_fanout_timeout,
+        filters=filters,
+    )
+    etag = await ctag_etag()
+    if errors and not runs:
+        raise HTTPException(
+            status_code=502,
+            detail="; ".join(f"{e['calendar']}: {e['error']}" for e in errors),
+        )
+
+    print(f"[DEBUG] list_events: got {sum(map(len, runs))} events from {len(runs)} calendars")
+
+    if errors:
+        # 部分结果不可缓存
+        etag = None
+    elif etag is None:
+        # 服务器不提供 ctag 时按对象 ETag 计算，至少省去响应体
+        etag = objects_etag((event for run in runs for event in run), *variant)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    page, next_cursor = paginate_sorted(merge_sorted(runs, event_sort_key), limit, cursor)
+
+    headers = cache_headers(etag)
+    if errors:
+        headers["X-Calendar-Errors"] = ",".join(quote(e["calendar"]) for e in errors)
+    if wants_ndjson(accept):
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return StreamingResponse(
+            ndjson_lines(iterate(page), partial(fragments.encode, fields=selected)),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=headers,
+        )
+    return list_response(
+        "events",
+        page,
+        selected,
+        headers=headers,
+        fmt=fmt,
+        next_cursor=next_cursor,
+        errors=errors,
+    )
+
+
+async def sync_calendars(
+    value: Optional[str], indexed: int
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+    """
+    按 ctag/ETag 增量同步所选日历（默认全部），返回 (日历, 失败的日历)
+
+    全部失败且索引为空（indexed 为索引条目数）时返回 502
+    """
+    targets = await select_calendars(value or "all")
+    _, errors = await get_sync_store().sync(get_client(), targets)
+    if errors and len(errors) == len(targets) and not indexed:
+        raise HTTPException(
+            status_code=502,
+            detail="; ".join(f"{e['calendar']}: {e['error']}" for e in errors),
+        )
+    return targets, errors
+
+
+@app.get("/api/search", tags=["事件"])
+async def search_events(
+    q: str = Query(..., min_length=1, description="检索词，中文按字词匹配，最后一个英文词按前缀匹配"),
+    calendars: Optional[str] = "all",
+    limit: int = Query(20, ge=1, le=200),
+    fields: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
+    """
+    全文检索事件标题、地点和描述
+
+    默认检索全部日历，calendars=a,b 限定日历。检索前按 ctag 增量同步，
+    只下载变化的对象；结果按相关度排序并附带 score，
+    total 为匹配总数。同步失败的日历记入 errors，仍使用已同步的数据
+    """
+    selected = select_fields(fields, SEARCH_FIELDS)
+    index = get_search_index()
+    targets, errors = await sync_calendars(calendars, len(index))
+
+    results, total = index.search(
+        q, limit=limit, calendars=[calendar["name"] for calendar in targets]
+    )
+    # score 随查询变化，不经过片段缓存
+    return make_response(
+        {
+            "events": [project(event, selected) for event in results],
+            "count": len(results),
+            "total": total,
+            "errors": errors,
+        },
+        response_format(accept),
+    )
+
+
+# 冲突列表中每个事件只返回的字段
+CONFLICT_FIELDS = ("uid", "summary", "dtstart", "dtend", "calendar")
+
+
+def query_window(
+    start_date: Optional[str], end_date: Optional[str]
+) -> Tuple[int, int]:
+    """人员和空闲时段查询的时间窗口（epoch 秒），默认从现在起 7 天"""
+    start = parse_datetime(start_date, "start_date") or datetime.now(timezone.utc)
+    end = parse_datetime(end_date, "end_date") or start + timedelta(days=7)
+    start_epoch, end_epoch = to_epoch(start), to_epoch(end)
+    if end_epoch <= start_epoch:
+        raise HTTPException(status_code=400, detail="end_date must be after start_date")
+    return start_epoch, end_epoch
 
-    primary_calendar = calendars["calendars"][0]
-    calendar_url = primary_calendar["url"]
 
-    events = await client.get_calendar_events(
-        calendar_url, start_date=start_date, end_date=end_date, component_type="VEVENT"
+def resolve_person(person: str) -> str:
+    person_key = get_people_index().resolve(person)
+    if person_key is None:
+        raise HTTPException(status_code=404, detail=f"Person not found: {person}")
+    return person_key
+
+
+def epoch_iso(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+@app.get("/api/people", tags=["人员"])
+async def list_people(
+    calendars: Optional[str] = "all",
+    accept: Optional[str] = Header(None),
+):
+    """列出所选日历（默认全部）的事件中出现过的组织者和参与者及其事件数"""
+    index = get_people_index()
+    targets, errors = await sync_calendars(calendars, len(index))
+    people = index.people(calendars=[calendar["name"] for calendar in targets])
+    return make_response(
+        {"people": people, "count": len(people), "errors": errors}, response_format(accept)
     )
 
-    print(f"[DEBUG] list_events: got {len(events)} events from client")
-    if events:
-        print(f"[DEBUG] First event: {events[0]}")
 
-    return {"events": events, "count": len(events)}
+@app.get("/api/people/conflicts", tags=["人员"])
+async def people_conflicts(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    people: Optional[str] = Query(None, description="逗号分隔的地址或名称，默认全部人员"),
+    accept: Optional[str] = Header(None),
+):
+    """列出窗口内日程相互重叠的人员（已拒绝的事件不计）"""
+    start, end = query_window(start_date, end_date)
+    index = get_people_index()
+    _, errors = await sync_calendars("all", len(index))
+    selected = None
+    if people:
+        selected = {resolve_person(p.strip()) for p in people.split(",") if p.strip()}
+    conflicts = [
+        {
+            "person": conflict["person"],
+            "name": conflict["name"],
+            "overlaps": [
+                [project(index.event(key), CONFLICT_FIELDS) for key in pair]
+                for pair in conflict["overlaps"]
+            ],
+        }
+        for conflict in index.conflicts(start, end, selected)
+    ]
+    return make_response(
+        {"conflicts": conflicts, "count": len(conflicts), "errors": errors},
+        response_format(accept),
+    )
+
+
+@app.get("/api/people/{person}/agenda", tags=["人员"])
+async def person_agenda(
+    person: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    fields: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
+    """
+    某人在时间窗口内参与或组织的事件
+
+    person 为邮箱地址（可带 mailto:）或唯一的显示名称，
+    每个事件附带该人员的 role 和 partstat
+    """
+    start, end = query_window(start_date, end_date)
+    index = get_people_index()
+    _, errors = await sync_calendars("all", len(index))
+    person_key = resolve_person(person)
+    selected = select_fields(fields, AGENDA_FIELDS)
+    events = [project(event, selected) for event in index.agenda(person_key, start, end)]
+    return make_response(
+        {"person": person_key, "events": events, "count": len(events), "errors": errors},
+        response_format(accept),
+    )
+
+
+@app.get("/api/people/{person}/busy", tags=["人员"])
+async def person_busy(
+    person: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
+    """某人在时间窗口内合并后的忙碌区间（已拒绝的事件不计）"""
+    start, end = query_window(start_date, end_date)
+    index = get_people_index()
+    _, errors = await sync_calendars("all", len(index))
+    person_key = resolve_person(person)
+    busy = [
+        {"start": epoch_iso(busy_start), "end": epoch_iso(busy_end)}
+        for busy_start, busy_end in index.busy(person_key, start, end)
+    ]
+    return make_response(
+        {"person": person_key, "busy": busy, "errors": errors}, response_format(accept)
+    )
+
+
+def parse_time_of_day(value: str, name: str) -> time:
+    try:
+        return time.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: '{value}'")
+
+
+def parse_weekdays(value: str) -> frozenset:
+    """逗号分隔的 ISO 星期（1=周一 ... 7=周日）"""
+    try:
+        weekdays = frozenset(int(part) for part in value.split(",") if part.strip())
+    except ValueError:
+        weekdays = frozenset({0})
+    if not weekdays or not weekdays <= set(range(1, 8)):
+        raise HTTPException(status_code=400, detail=f"Invalid weekdays: '{value}'")
+    return weekdays
+
+
+@app.get("/api/slots", tags=["人员"])
+async def find_slots(
+    calendars: Optional[str] = Query(None, description="逗号分隔的日历名称，all 为全部日历"),
+    people: Optional[str] = Query(None, description="逗号分隔的参与者地址或名称"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    duration: int = Query(30, ge=1, le=24 * 60, description="会议时长（分钟）"),
+    working_hours: bool = True,
+    work_start: str = "09:00",
+    work_end: str = "18:00",
+    weekdays: str = "1,2,3,4,5",
+    granularity: int = Query(15, ge=1, le=24 * 60, description="开始时间对齐粒度（分钟）"),
+    limit: int = Query(20, ge=1, le=500),
+    accept: Optional[str] = Header(None),
+):
+    """
+    查找所有日历和参与者都空闲的时段
+
+    忙碌区间来自增量同步的本地副本（日历中未取消的事件实例、参与者未拒绝的事件），
+    合并、求补并与工作时间（默认时区下的工作日 work_start-work_end）求交，
+    返回能容纳 duration 分钟的时段，会议可安排在时段内任意位置
+    """
+    if not calendars and not people:
+        raise HTTPException(status_code=400, detail="calendars or people is required")
+    start, end = query_window(start_date, end_date)
+    hours = None
+    if working_hours:
+        hours = WorkingHours(
+            start=parse_time_of_day(work_start, "work_start"),
+            end=parse_time_of_day(work_end, "work_end"),
+            weekdays=parse_weekdays(weekdays),
+        )
+
+    index = get_people_index()
+    _, errors = await sync_calendars("all" if people else calendars, len(index))
+    busy = []
+    if calendars:
+        names = [calendar["name"] for calendar in await select_calendars(calendars)]
+        snapshot = get_event_snapshot()
+        busy.append(
+            snapshot.intervals(snapshot.mask(start, end, calendars=names, statuses=BUSY_STATUSES))
+        )
+    for person in (part.strip() for part in (people or "").split(",")):
+        if person:
+            busy.append(as_intervals(index.busy(resolve_person(person), start, end)))
+
+    slots = find_free_slots(
+        busy,
+        start,
+        end,
+        duration * 60,
+        working_hours=hours,
+        granularity=granularity * 60,
+        limit=limit,
+    )
+    return make_response(
+        {
+            "slots": [
+                {"start": epoch_iso(slot_start), "end": epoch_iso(slot_end)}
+                for slot_start, slot_end in slots
+            ],
+            "count": len(slots),
+            "duration": duration,
+            "errors": errors,
+        },
+        response_format(accept),
+    )
+
+
+# 统计窗口的最大天数
+MAX_ANALYTICS_DAYS = 400
+
+
+@app.get("/api/analytics/utilization", tags=["分析"])
+async def analytics_utilization(
+    calendars: Optional[str] = "all",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    period: str = Query("day", pattern="^(day|week)$"),
+    work_start: str = "09:00",
+    work_end: str = "18:00",
+    weekdays: str = "1,2,3,4,5",
+    focus_minutes: int = Query(120, ge=1, le=24 * 60, description="专注时间的最短连续空闲（分钟）"),
+    include_all_day: bool = False,
+    accept: Optional[str] = Header(None),
+):
+    """
+    时间利用率统计
+
+    按日历和周期（day/week，默认时区）统计已安排时长（重叠的事件只计一次）、
+    工作时间内的占用比例、专注时间（工作时间内不短于 focus_minutes 的连续空闲）
+    占比，以及按小时统计的最忙时段。重复事件按实例统计，已取消的事件和全天事件
+    （include_all_day=true 时计入）不计。结果按日历 ctag 和参数缓存
+    """
+    start, end = query_window(start_date, end_date)
+    if end - start > MAX_ANALYTICS_DAYS * 86400:
+        raise HTTPException(
+            status_code=400, detail=f"Window must not exceed {MAX_ANALYTICS_DAYS} days"
+        )
+    query = UtilizationQuery(
+        start=start,
+        end=end,
+        period=period,
+        working_hours=WorkingHours(
+            start=parse_time_of_day(work_start, "work_start"),
+            end=parse_time_of_day(work_end, "work_end"),
+            weekdays=parse_weekdays(weekdays),
+        ),
+        focus_minutes=focus_minutes,
+        include_all_day=include_all_day,
+    )
+    snapshot = get_event_snapshot()
+    targets, errors = await sync_calendars(calendars, len(snapshot))
+    store = get_sync_store()
+    cache = get_utilization_cache()
+    tz = default_timezone()
+    results = [
+        calendar_utilization(
+            snapshot, calendar["name"], store.ctag(calendar["name"]), query, tz, cache
+        )
+        for calendar in targets
+    ]
+    return make_response(
+        {
+            "start": epoch_iso(start),
+            "end": epoch_iso(end),
+            "period": period,
+            "timezone": str(tz),
+            "calendars": results,
+            "errors": errors,
+        },
+        response_format(accept),
+    )
+
+
+@app.get("/api/agenda/{view}", tags=["事件"])
+async def agenda_view(
+    view: str = Path(..., pattern="^(day|week|month)$"),
+    day: Optional[str] = Query(None, alias="date", description="视图中的任意一天（YYYY-MM-DD），默认今天"),
+    calendars: Optional[str] = "all",
+    fields: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
+    """
+    日/周/月日程视图
+
+    按默认时区的本地日期返回每天的事件（重复事件按实例展开，跨天事件出现在
+    它覆盖的每一天），周从周一开始。视图读取增量维护的每日索引，
+    请求前按 ctag 增量同步所选日历
+    """
+    try:
+        anchor = date.fromisoformat(day) if day else datetime.now(default_timezone()).date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {day}")
+    if view == "week":
+        first = anchor - timedelta(days=anchor.weekday())
+        count = 7
+    elif view == "month":
+        first = anchor.replace(day=1)
+        count = calendar_module.monthrange(anchor.year, anchor.month)[1]
+    else:
+        first, count = anchor, 1
+
+    selected = select_fields(fields)
+    index = get_agenda_index()
+    targets, errors = await sync_calendars(calendars, len(index))
+    days = index.days(first, count, calendars=[calendar["name"] for calendar in targets])
+    return make_response(
+        {
+            "view": view,
+            "start": str(first),
+            "end": str(first + timedelta(days=count)),
+            "days": [
+                {"date": str(value), "events": [project(event, selected) for event in events]}
+                for value, events in days
+            ],
+            "count": sum(len(events) for _, events in days),
+            "errors": errors,
+        },
+        response_format(accept),
+    )
 
 
 @app.get("/api/events/{event_uid}", tags=["事件"])
-async def get_event(event_uid: str) -> Dict[str, Any]:
-    """获取单个事件详情"""
+async def get_event(
+    event_uid: str,
+    fields: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    获取单个事件详情
+
+    响应 ETag 由对象 ETag 生成；带 If-None-Match 时先用 HEAD 校验，命中返回 304
+    """
     client = get_client()
-    calendars = await list_calendars()
+    selected = select_fields(fields)
+    fmt = response_format(accept)
 
-    for calendar in calendars["calendars"]:
+    if if_none_match:
         try:
-            event_url = f"{calendar['url'].rstrip('/')}/{event_uid}.ics"
-            ical_data, etag = await client.get_object(event_url)
-            parsed = parse_event(ical_data)
-            parsed["url"] = event_url
-            parsed["etag"] = etag
-            return {"event": parsed}
-        except Exception:
-            continue
-
-    raise HTTPException(status_code=404, detail=f"Event '{event_uid}' not found")
+            _, object_etag = await locate_object(event_uid, "Event", client.head_object)
+        except HTTPException:
+            # HEAD 不可用或未找到时交给下面的 GET 处理
+            object_etag = None
+        etag = strong_etag(object_etag, fields, fmt) if object_etag else None
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    event_url, (ical_data, object_etag) = await locate_object(event_uid, "Event")
+    parsed = parse_event(ical_data)
+    if not parsed:
+        raise HTTPException(status_code=404, detail=f"Event '{event_uid}' not found")
+    parsed["url"] = event_url
+    parsed["etag"] = object_etag
+    etag = strong_etag(object_etag, fields, fmt) if object_etag else None
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return make_response(
+        {"event": project(parsed, selected)}, fmt, headers=cache_headers(etag)
+    )
 
 
 @app.post("/api/events", tags=["事件"])
@@ -158,8 +865,8 @@ async def create_event(
     event_data = {
         "uid": event_uid,
         "summary": summary,
-        "dtstart": datetime.fromisoformat(dtstart.replace("Z", "+00:00")),
-        "dtend": datetime.fromisoformat(dtend.replace("Z", "+00:00")),
+        "dtstart": parse_datetime(dtstart, "dtstart"),
+        "dtend": parse_datetime(dtend, "dtend"),
     }
     if description:
         event_data["description"] = description
@@ -167,7 +874,11 @@ async def create_event(
         event_data["location"] = location
 
     ical_data = build_event(event_data)
-    event_url = await client.create_object(calendar_url, event_uid, ical_data)
+    event_url = await write_object(
+        client.create_object(calendar_url, event_uid, ical_data), "object already exists"
+    )
+    # 直接更新本地副本，日程视图等索引无需等待下次同步
+    get_sync_store().apply(event_url, None, ical_data)
 
     return {
         "success": True,
@@ -194,115 +905,161 @@ async def update_event(
 ) -> Dict[str, Any]:
     """更新事件"""
     client = get_client()
-    calendars = await list_calendars()
-
-    for calendar in calendars["calendars"]:
-        try:
-            event_url = f"{calendar['url'].rstrip('/')}/{event_uid}.ics"
-            old_ical_data, old_etag = await client.get_object(event_url)
-            parsed = parse_event(old_ical_data)
-
-            update_data = {
-                "uid": event_uid,
-                "summary": summary or parsed.get("summary", ""),
-                "dtstart": datetime.fromisoformat(dtstart.replace("Z", "+00:00"))
-                if dtstart
-                else parsed.get("dtstart"),
-                "dtend": datetime.fromisoformat(dtend.replace("Z", "+00:00"))
-                if dtend
-                else parsed.get("dtend"),
-            }
-            if description is not None:
-                update_data["description"] = description
-            else:
-                update_data["description"] = parsed.get("description", "")
-            if location is not None:
-                update_data["location"] = location
-            else:
-                update_data["location"] = parsed.get("location", "")
-
-            etag = if_match or old_etag
-            ical_data = build_event(update_data)
-            await client.update_object(event_url, ical_data, etag)
-
-            return {
-                "success": True,
-                "message": "Event updated successfully",
-                "event": {"uid": event_uid, "summary": update_data["summary"]},
-                "url": event_url,
-            }
-        except Exception:
-            continue
+    event_url, (old_ical_data, old_etag) = await locate_object(event_uid, "Event")
+
+    # 只修改传入的属性，其余内容（参与人、提醒、重复规则等）原样保留
+    changes: Dict[str, Any] = {}
+    if summary:
+        changes["SUMMARY"] = summary
+    if dtstart:
+        changes["DTSTART"] = parse_datetime(dtstart, "dtstart")
+    if dtend:
+        changes["DTEND"] = parse_datetime(dtend, "dtend")
+    if description is not None:
+        changes["DESCRIPTION"] = description or None
+    if location is not None:
+        changes["LOCATION"] = location or None
+
+    etag = if_match or old_etag
+    ical_data = patch_object(old_ical_data, changes, "Event", event_uid)
+    new_summary = summary or get_property(ical_data, "SUMMARY", "VEVENT") or ""
+
+    # 内容与已存储版本等价时不再 PUT，避免 ctag 变化触发其他客户端重新同步
+    if canonical_hash(ical_data) == canonical_hash(old_ical_data):
+        return {
+            "success": True,
+            "message": "Event unchanged",
+            "changed": False,
+            "event": {"uid": event_uid, "summary": new_summary},
+            "url": event_url,
+            "etag": old_etag,
+        }
+
+    new_etag = await write_object(client.update_object(event_url, ical_data, etag))
+    # 服务器确认写入（2xx）后才更新本地副本，被拒绝时 write_object 已抛出
+    get_sync_store().apply(event_url, new_etag, ical_data)
 
-    raise HTTPException(status_code=404, detail=f"Event '{event_uid}' not found")
+    return {
+        "success": True,
+        "message": "Event updated successfully",
+        "changed": True,
+        "event": {"uid": event_uid, "summary": new_summary},
+        "url": event_url,
+        "etag": new_etag,
+    }
 
 
 @app.delete("/api/events/{event_uid}", tags=["事件"])
 async def delete_event(event_uid: str, if_match: Optional[str] = Header(None)):
     """删除事件"""
     client = get_client()
-    calendars = await list_calendars()
+    event_url, (_, etag) = await locate_object(event_uid, "Event")
+    final_etag = if_match or etag
 
-    for calendar in calendars["calendars"]:
-        try:
-            event_url = f"{calendar['url'].rstrip('/')}/{event_uid}.ics"
-            _, etag = await client.get_object(event_url)
-            final_etag = if_match or etag
-
-            await client.delete_object(event_url, final_etag)
-            return {"success": True, "message": "Event deleted successfully"}
-        except Exception:
-            continue
-
-    raise HTTPException(status_code=404, detail=f"Event '{event_uid}' not found")
+    await write_object(client.delete_object(event_url, final_etag))
+    get_sync_store().discard(event_url)
+    return {"success": True, "message": "Event deleted successfully"}
 
 
 @app.get("/api/todos", tags=["待办"])
-async def list_todos() -> Dict[str, Any]:
-    """获取待办列表"""
+async def list_todos(
+    status: Optional[str] = Query(None, description="逗号分隔的状态，open 表示未完成"),
+    due_after: Optional[str] = None,
+    due_before: Optional[str] = None,
+    overdue: bool = False,
+    max_priority: Optional[int] = Query(None, ge=1, le=9),
+    sort: str = Query("due", pattern="^(due|priority)$"),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
+    """
+    获取待办列表
+
+    一次 VTODO REPORT 直接解析出全部待办，并按日历 ctag 建立索引，
+    ctag 未变化时的后续查询直接读索引。
+    status / due_after / due_before / max_priority 过滤待办，
+    overdue=true 等价于 status=open 且 due_before=当前时间；
+    sort=due（默认）按截止时间、sort=priority 按优先级排序，
+    可用 limit + cursor 游标分页；
+    fields= 只返回所选字段；
+    请求头 Accept: application/x-ndjson 时以 NDJSON 流式返回，
+    application/msgpack 时返回 MessagePack
+    """
     client = get_client()
     calendars = await list_calendars()
+    selected = select_fields(fields, TODO_FIELDS)
+    fragments = get_fragment_cache()
+
+    try:
+        statuses = parse_status(status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    due_before_epoch = to_epoch(parse_datetime(due_before, "due_before"))
+    if overdue:
+        statuses = (statuses or OPEN_STATUSES) & OPEN_STATUSES
+        now = int(datetime.now(timezone.utc).timestamp())
+        due_before_epoch = now if due_before_epoch is None else min(due_before_epoch, now)
+    query = TodoQuery(
+        status=statuses,
+        due_after=to_epoch(parse_datetime(due_after, "due_after")),
+        due_before=due_before_epoch,
+        max_priority=max_priority,
+        sort=sort,
+    )
 
     if not calendars["calendars"]:
-        return {"todos": [], "count": 0}
+        return {"todos": [], "count": 0, "next_cursor": None}
 
     primary_calendar = calendars["calendars"][0]
     calendar_url = primary_calendar["url"]
 
-    todos = await client.get_calendar_events(calendar_url, component_type="VTODO")
+    properties = required_properties(selected, TODO_FIELDS)
+    if wants_ndjson(accept) and limit is None and cursor is None and query == TodoQuery():
+        todos_stream = await prime_stream(client.iter_todos(calendar_url, properties=properties))
+        return StreamingResponse(
+            ndjson_lines(todos_stream, partial(fragments.encode, fields=selected)),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
 
-    parsed_todos = []
-    for todo in todos:
-        try:
-            ical_data, etag = await client.get_object(todo["url"])
-            parsed = parse_todo(ical_data)
-            parsed["url"] = todo["url"]
-            parsed["etag"] = etag
-            parsed_todos.append(parsed)
-        except Exception:
-            continue
+    try:
+        todos = await query_todos(client, calendar_url, query, properties=properties)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"CalDAV request failed: {e}")
 
-    return {"todos": parsed_todos, "count": len(parsed_todos)}
+    key = todo_priority_key if sort == "priority" else todo_sort_key
+    try:
+        page, next_cursor = paginate_sorted(todos, limit, cursor, key=key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if wants_ndjson(accept):
+        return StreamingResponse(
+            ndjson_lines(iterate(page), partial(fragments.encode, fields=selected)),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={"X-Next-Cursor": next_cursor} if next_cursor else None,
+        )
+    return list_response(
+        "todos", page, selected, fmt=response_format(accept), next_cursor=next_cursor
+    )
 
 
 @app.get("/api/todos/{todo_uid}", tags=["待办"])
-async def get_todo(todo_uid: str) -> Dict[str, Any]:
+async def get_todo(
+    todo_uid: str,
+    fields: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
     """获取待办详情"""
-    client = get_client()
-    calendars = await list_calendars()
-
-    for calendar in calendars["calendars"]:
-        try:
-            todo_url = f"{calendar['url'].rstrip('/')}/{todo_uid}.ics"
-            ical_data, etag = await client.get_object(todo_url)
-            parsed = parse_todo(ical_data)
-            parsed["url"] = todo_url
-            parsed["etag"] = etag
-            return {"todo": parsed}
-        except Exception:
-            continue
-
-    raise HTTPException(status_code=404, detail=f"Todo '{todo_uid}' not found")
+    selected = select_fields(fields, TODO_FIELDS)
+    todo_url, (ical_data, etag) = await locate_object(todo_uid, "Todo")
+    parsed = parse_todo(ical_data)
+    if not parsed:
+        raise HTTPException(status_code=404, detail=f"Todo '{todo_uid}' not found")
+    parsed["url"] = todo_url
+    parsed["etag"] = etag
+    return make_response({"todo": project(parsed, selected)}, response_format(accept))
 
 
 @app.post("/api/todos", tags=["待办"])
@@ -327,14 +1084,16 @@ async def create_todo(
 
     todo_data = {"uid": todo_uid, "summary": summary}
     if due:
-        todo_data["due"] = datetime.fromisoformat(due.replace("Z", "+00:00"))
+        todo_data["due"] = parse_datetime(due, "due")
     if priority:
         todo_data["priority"] = priority
     if status:
         todo_data["status"] = status
 
     ical_data = build_todo(todo_data)
-    todo_url = await client.create_object(calendar_url, todo_uid, ical_data)
+    todo_url = await write_object(
+        client.create_object(calendar_url, todo_uid, ical_data), "object already exists"
+    )
 
     return {
         "success": True,
@@ -355,59 +1114,224 @@ async def update_todo(
 ) -> Dict[str, Any]:
     """更新待办"""
     client = get_client()
-    calendars = await list_calendars()
+    todo_url, (old_ical_data, old_etag) = await locate_object(todo_uid, "Todo")
 
-    for calendar in calendars["calendars"]:
-        try:
-            todo_url = f"{calendar['url'].rstrip('/')}/{todo_uid}.ics"
-            old_ical_data, old_etag = await client.get_object(todo_url)
-            parsed = parse_todo(old_ical_data)
-
-            update_data = {
-                "uid": todo_uid,
-                "summary": summary or parsed.get("summary", ""),
-            }
-            if due:
-                update_data["due"] = datetime.fromisoformat(due.replace("Z", "+00:00"))
-            if priority is not None:
-                update_data["priority"] = priority
-            if status:
-                update_data["status"] = status
-
-            etag = if_match or old_etag
-            ical_data = build_todo(update_data)
-            await client.update_object(todo_url, ical_data, etag)
-
-            return {
-                "success": True,
-                "message": "Todo updated successfully",
-                "todo": {"uid": todo_uid, "summary": update_data["summary"]},
-                "url": todo_url,
-            }
-        except Exception:
-            continue
+    changes: Dict[str, Any] = {}
+    if summary:
+        changes["SUMMARY"] = summary
+    if due:
+        changes["DUE"] = parse_datetime(due, "due")
+    if priority is not None:
+        changes["PRIORITY"] = priority
+    if status:
+        changes["STATUS"] = status
+
+    etag = if_match or old_etag
+    ical_data = patch_object(old_ical_data, changes, "Todo", todo_uid)
+    new_summary = summary or get_property(ical_data, "SUMMARY", "VTODO") or ""
+
+    # 内容与已存储版本等价时不再 PUT，避免 ctag 变化触发其他客户端重新同步
+    if canonical_hash(ical_data) == canonical_hash(old_ical_data):
+        return {
+            "success": True,
+            "message": "Todo unchanged",
+            "changed": False,
+            "todo": {"uid": todo_uid, "summary": new_summary},
+            "url": todo_url,
+            "etag": old_etag,
+        }
 
-    raise HTTPException(status_code=404, detail=f"Todo '{todo_uid}' not found")
+    new_etag = await write_object(client.update_object(todo_url, ical_data, etag))
+
+    return {
+        "success": True,
+        "message": "Todo updated successfully",
+        "changed": True,
+        "todo": {"uid": todo_uid, "summary": new_summary},
+        "url": todo_url,
+        "etag": new_etag,
+    }
 
 
 @app.delete("/api/todos/{todo_uid}", tags=["待办"])
 async def delete_todo(todo_uid: str, if_match: Optional[str] = Header(None)):
     """删除待办"""
     client = get_client()
-    calendars = await list_calendars()
+    todo_url, (_, etag) = await locate_object(todo_uid, "Todo")
+    final_etag = if_match or etag
+
+    await write_object(client.delete_object(todo_url, final_etag))
+    return {"success": True, "message": "Todo deleted successfully"}
+
+
+# 批量写操作：op -> (处理函数, 允许的参数)
+_BATCH_WRITES = {
+    "create_event": (create_event, {"summary", "dtstart", "dtend", "description", "location"}),
+    "update_event": (update_event, {"summary", "dtstart", "dtend", "description", "location"}),
+    "delete_event": (delete_event, set()),
+    "create_todo": (create_todo, {"summary", "due", "priority", "status"}),
+    "update_todo": (update_todo, {"summary", "due", "priority", "status"}),
+    "delete_todo": (delete_todo, set()),
+}
+_BATCH_READS = {"get_event": (parse_event, EVENT_FIELDS), "get_todo": (parse_todo, TODO_FIELDS)}
+
+
+async def _run_batch_write(operation: BatchOperation) -> Dict[str, Any]:
+    handler, allowed = _BATCH_WRITES[operation.op]
+    unknown = sorted(set(operation.params) - allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown params: {', '.join(unknown)}")
+    if operation.op.startswith("create_"):
+        args, kwargs = (), {**operation.params, "uid": operation.uid}
+    elif not operation.uid:
+        raise HTTPException(status_code=400, detail="uid is required")
+    else:
+        args, kwargs = (operation.uid,), {**operation.params, "if_match": operation.if_match}
+    try:
+        inspect.signature(handler).bind(*args, **kwargs)
+    except TypeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return await handler(*args, **kwargs)
+    except ValueError as e:
+        # 参数值无法解析（如时间格式错误）是调用方的错误
+        raise HTTPException(status_code=400, detail=str(e))
 
-    for calendar in calendars["calendars"]:
-        try:
-            todo_url = f"{calendar['url'].rstrip('/')}/{todo_uid}.ics"
-            _, etag = await client.get_object(todo_url)
-            final_etag = if_match or etag
 
-            await client.delete_object(todo_url, final_etag)
-            return {"success": True, "message": "Todo deleted successfully"}
-        except Exception:
-            continue
+@app.post("/api/batch", tags=["批量"])
+async def batch(request: BatchRequest) -> Dict[str, Any]:
+    """
+    批量执行相互独立的操作
+
+    读操作（get_event/get_todo）合并为每个日历一次 calendar-multiget；
+    写操作在并发上限内执行。返回与 operations 顺序一致的逐条结果
+    """
+    if len(request.operations) > config.batch_max_operations:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {config.batch_max_operations} operations per batch",
+        )
+    client = get_client()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(request.operations)
+
+    def result(index: int, status: int, **body: Any) -> None:
+        operation = request.operations[index]
+        results[index] = {"id": operation.id, "op": operation.op, "status": status, **body}
+
+    reads = [
+        (i, op) for i, op in enumerate(request.operations) if op.op in _BATCH_READS
+    ]
+    writes = [
+        (i, op) for i, op in enumerate(request.operations) if op.op in _BATCH_WRITES
+    ]
+
+    async def run_reads() -> None:
+        uids = [op.uid for _, op in reads if op.uid]
+        urls = [calendar["url"] for calendar in await select_calendars("all")]
+        found, errors = await multiget_by_uid(client, urls, uids)
+        for index, operation in reads:
+            parse, available = _BATCH_READS[operation.op]
+            name = operation.op.split("_", 1)[1]
+            try:
+                selected = parse_fields(operation.params.get("fields"), available)
+            except ValueError as e:
+                result(index, 400, error=str(e))
+                continue
+            item = found.get(operation.uid or "")
+            parsed = parse(item[2]) if item else None
+            if not parsed:
+                if errors:
+                    result(index, 502, error="; ".join(e["error"] for e in errors))
+                else:
+                    result(index, 404, error=f"{name.capitalize()} '{operation.uid}' not found")
+                continue
+            parsed["url"], parsed["etag"] = item[0], item[1]
+            result(index, 200, body={name: project(parsed, selected)})
+
+    async def run_writes() -> None:
+        outcomes = await run_bounded(
+            [partial(_run_batch_write, op) for _, op in writes],
+            request.concurrency or config.batch_concurrency,
+        )
+        for (index, operation), outcome in zip(writes, outcomes):
+            if isinstance(outcome, HTTPException):
+                result(index, outcome.status_code, error=outcome.detail)
+            elif isinstance(outcome, BaseException):
+                result(index, 502, error=str(outcome) or type(outcome).__name__)
+            else:
+                result(index, 201 if operation.op.startswith("create_") else 200, body=outcome)
+
+    await asyncio.gather(run_reads() if reads else asyncio.sleep(0), run_writes())
+
+    succeeded = sum(1 for r in results if r and r["status"] < 400)
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+
+@app.post("/api/import", tags=["导入导出"])
+async def import_calendar(
+    request: Request,
+    calendar: Optional[str] = None,
+    concurrency: Optional[int] = Query(
+        None, ge=1, le=MAX_IMPORT_CONCURRENCY, description="并发写入数，默认 IMPORT_CONCURRENCY"
+    ),
+) -> Dict[str, Any]:
+    """
+    批量导入 .ics 文件
 
-    raise HTTPException(status_code=404, detail=f"Todo '{todo_uid}' not found")
+    请求体为原始 iCalendar 数据（text/calendar），边接收边解析，
+    按 UID 拆分后并发写入日历，返回逐条结果报告
+    """
+    client = get_client()
+    target = await get_calendar(calendar)
+    report = await import_ics(
+        client,
+        target["url"],
+        request.stream(),
+        concurrency=concurrency or config.import_concurrency,
+    )
+    report["calendar"] = target["name"]
+    return report
+
+
+@app.get("/api/export", tags=["导入导出"])
+async def export_calendar(
+    format: str = "ics",
+    calendar: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    流式导出日历事件
+
+    format 支持 ics（原样输出服务器数据）、ndjson、csv；
+    响应边从 CalDAV REPORT 读取边输出
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format '{format}', expected one of: {', '.join(EXPORT_FORMATS)}",
+        )
+    client = get_client()
+    target = await get_calendar(calendar)
+    start = parse_datetime(start_date, "start_date")
+    end = parse_datetime(end_date, "end_date")
+
+    if format == "ics":
+        objects = await prime_stream(
+            client.iter_calendar_objects(target["url"], start, end, "VEVENT")
+        )
+        body = export_ics(objects)
+    else:
+        events = await prime_stream(client.iter_events(target["url"], start, end))
+        body = export_ndjson(events) if format == "ndjson" else export_csv(events)
+
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{target["name"]}.{format}"'
+        },
+    )
 
 
 def custom_openapi():
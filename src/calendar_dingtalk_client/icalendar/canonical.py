@@ -0,0 +1,106 @@
+"""
+iCalendar 规范化哈希
+
+对日历对象中有语义的内容计算稳定哈希，用于判断两次写入是否等价：
+忽略 DTSTAMP/LAST-MODIFIED 等易变属性、参数顺序、折行方式和组件顺序，
+不重复的组件中带 TZID 的时间统一换算为 UTC。重复事件保留 TZID：
+同一时刻换成其他时区表示时，夏令时切换后的实例会整体偏移一小时。
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from .patcher import property_name, split_content_lines
+from .timezones import resolve_tzid
+
+# 每次写入都可能变化、但不影响日程语义的属性
+VOLATILE_PROPERTIES = frozenset(
+    ("DTSTAMP", "LAST-MODIFIED", "CREATED", "SEQUENCE", "PRODID")
+)
+_DATETIME_PROPERTIES = frozenset(
+    ("DTSTART", "DTEND", "DUE", "RECURRENCE-ID", "COMPLETED")
+)
+# 组件包含这些属性时按 TZID 本地时间展开，时间不能换算为 UTC
+_RECURRENCE_PROPERTIES = frozenset(("RRULE", "RDATE"))
+
+
+def _split_property(line: str) -> Tuple[str, List[Tuple[str, str]], str]:
+    """拆分内容行为 (属性名, [(参数名, 参数值)], 值)"""
+    parts: List[str] = []
+    start = 0
+    in_quotes = False
+    value = ""
+    for i, ch in enumerate(line):
+        if ch == '"':
+            in_quotes = not in_quotes
+        elif not in_quotes and ch in ";:":
+            parts.append(line[start:i])
+            start = i + 1
+            if ch == ":":
+                value = line[i + 1 :]
+                break
+    else:
+        parts.append(line[start:])
+    name = parts[0].upper()
+    params = []
+    for param in parts[1:]:
+        key, _, val = param.partition("=")
+        params.append((key.upper(), val.strip('"')))
+    return name, params, value
+
+
+def _to_utc(value: str, tzid: str) -> Optional[str]:
+    """把 TZID 本地时间换算为 UTC 文本，无法识别时返回 None"""
+    tz = resolve_tzid(tzid)
+    if tz is None:
+        return None
+    try:
+        local = datetime.strptime(value, "%Y%m%dT%H%M%S").replace(tzinfo=tz)
+    except ValueError:
+        return None
+    return local.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _canonical_line(line: str, recurring: bool = False) -> Optional[str]:
+    name, params, value = _split_property(line)
+    if name in VOLATILE_PROPERTIES:
+        return None
+    if name in _DATETIME_PROPERTIES:
+        tzid = next((val for key, val in params if key == "TZID"), None)
+        if tzid and not recurring:
+            utc = _to_utc(value, tzid)
+            if utc is not None:
+                value = utc
+                params = [(key, val) for key, val in params if key != "TZID"]
+        params = [p for p in params if p != ("VALUE", "DATE-TIME")]
+    rendered = ";".join(f"{key}={val}" for key, val in sorted(params))
+    return f"{name};{rendered}:{value}" if rendered else f"{name}:{value}"
+
+
+def canonical_form(ical_data: str) -> str:
+    """返回规范化后的文本表示（组件内属性、子组件均排序）"""
+    # 每层：[组件名, 属性原始行列表, 子组件规范文本列表]
+    stack: List[Tuple[str, List[str], List[str]]] = [("", [], [])]
+    for line, _ in split_content_lines(ical_data):
+        if not line:
+            continue
+        name = property_name(line)
+        if name == "BEGIN":
+            stack.append((line.partition(":")[2].upper(), [], []))
+        elif name == "END":
+            if len(stack) == 1:
+                continue
+            comp, lines, children = stack.pop()
+            recurring = any(property_name(prop) in _RECURRENCE_PROPERTIES for prop in lines)
+            props = [_canonical_line(prop, recurring) for prop in lines]
+            body = "\n".join(sorted(p for p in props if p is not None) + sorted(children))
+            stack[-1][2].append(f"BEGIN:{comp}\n{body}\nEND:{comp}")
+        else:
+            stack[-1][1].append(line)
+    return "\n".join(sorted(stack[0][2]))
+
+
+def canonical_hash(ical_data: str) -> str:
+    """计算规范化哈希（SHA-256 十六进制）"""
+    return hashlib.sha256(canonical_form(ical_data).encode("utf-8")).hexdigest()
@@ -1,34 +1,148 @@
 """
 iCalendar 解析器
 """
-from typing import Dict, Any
+import sys
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Iterator, Optional, Tuple, Sequence
 from icalendar import Calendar as ICalendar
+from icalendar.cal import Component
+from .timezones import extract_timezones, resolve_tzid, to_epoch
 
-def parse_event(ical_data: str) -> Dict[str, Any]:
-    """解析事件"""
+def person_id(address: Any) -> str:
+    """日历用户地址的规范标识：去掉 mailto: 并转小写，驻留以便大量事件共享"""
+    value = str(address).strip()
+    if value[:7].lower() == 'mailto:':
+        value = value[7:]
+    return sys.intern(value.lower())
+
+def _person(prop: Any) -> Dict[str, Any]:
+    params = getattr(prop, 'params', {})
+    name = params.get('CN')
+    return {
+        'id': person_id(prop),
+        'name': str(name) if name else None,
+        'partstat': str(params.get('PARTSTAT', 'NEEDS-ACTION')).upper(),
+        'role': str(params.get('ROLE', 'REQ-PARTICIPANT')).upper(),
+    }
+
+def event_people(component: Component) -> Tuple[Optional[Dict[str, Any]], list]:
+    """提取组织者和参与者 (organizer, [attendee, ...])"""
+    organizer = component.get('organizer')
+    attendees = component.get('attendee') or []
+    if not isinstance(attendees, list):
+        attendees = [attendees]
+    return (
+        _person(organizer) if organizer is not None else None,
+        [_person(attendee) for attendee in attendees],
+    )
+
+def event_from_component(component: Component) -> Dict[str, Any]:
+    """从 VEVENT 组件提取事件字段"""
+    organizer, attendees = event_people(component)
+    return {
+        'uid': str(component.get('uid', '')),
+        'summary': str(component.get('summary', '')),
+        'dtstart': component.get('dtstart').dt if component.get('dtstart') else None,
+        'dtend': component.get('dtend').dt if component.get('dtend') else None,
+        'description': str(component.get('description', '')),
+        'location': str(component.get('location', '')),
+        'status': str(component.get('status')).upper() if component.get('status') else None,
+        'organizer': organizer,
+        'attendees': attendees,
+    }
+
+def todo_from_component(component: Component) -> Dict[str, Any]:
+    """从 VTODO 组件提取待办字段"""
+    percent = component.get('percent-complete')
+    return {
+        'uid': str(component.get('uid', '')),
+        'summary': str(component.get('summary', '')),
+        'status': str(component.get('status', 'NEEDS-ACTION')),
+        'due': component.get('due').dt if component.get('due') else None,
+        'priority': int(component.get('priority', 5)),
+        'completed': component.get('completed').dt if component.get('completed') else None,
+        'percent_complete': int(percent) if percent is not None else None,
+    }
+
+def event_epochs(
+    component: Component, event: Dict[str, Any]
+) -> Tuple[Optional[int], Optional[int]]:
+    """计算事件开始/结束的 UTC 纪元秒（无 DTEND 时按 DURATION 或 RFC 5545 默认时长）"""
+    dtstart = event.get('dtstart')
+    dtend = event.get('dtend')
+    if dtstart is None:
+        return None, None
+    if dtend is None:
+        duration = component.get('duration')
+        if duration is not None:
+            dtend = dtstart + duration.dt
+        elif isinstance(dtstart, date) and not isinstance(dtstart, datetime):
+            dtend = dtstart + timedelta(days=1)
+        else:
+            dtend = dtstart
+    return to_epoch(dtstart), to_epoch(dtend)
+
+def _referenced_tzids(component: Component) -> set:
+    """组件属性中引用到的 TZID"""
+    tzids = set()
+    for value in component.values():
+        for item in value if isinstance(value, list) else (value,):
+            params = getattr(item, 'params', None)
+            if params and 'TZID' in params:
+                tzids.add(str(params['TZID']))
+    return tzids
+
+def _bind_timezones(component: Component, zones: Dict[str, Any]) -> None:
+    """
+    带 TZID 的时间改用本对象 VTIMEZONE 定义的时区
+
+    icalendar 按 TZID 全局缓存第一次见到的自定义定义，同名的不同定义需要在此纠正
+    """
+    for value in component.values():
+        for item in value if isinstance(value, list) else (value,):
+            params = getattr(item, 'params', None)
+            tz = zones.get(str(params['TZID'])) if params and 'TZID' in params else None
+            if tz is None:
+                continue
+            for prop in getattr(item, 'dts', None) or (item,):
+                dt = getattr(prop, 'dt', None)
+                if isinstance(dt, datetime) and dt.tzinfo is not tz:
+                    prop.dt = dt.replace(tzinfo=tz)
+
+def iter_components(
+    ical_data: str, names: Sequence[str] = ("VEVENT", "VTODO")
+) -> Iterator[Tuple[Component, Dict[str, Component]]]:
+    """
+    逐个返回日历数据中的所有组件（主组件和重复实例覆盖）
+
+    只解析一次，按需产出 (组件, 该组件引用的 VTIMEZONE 字典 {TZID: 组件})。
+    """
+    # 已解析过的 VTIMEZONE 直接从进程级缓存获取，不再交给 from_ical 重复解析
+    ical_data, timezones, zones = extract_timezones(ical_data)
     cal = ICalendar.from_ical(ical_data)
-    for component in cal.walk():
-        if component.name == "VEVENT":
-            return {
-                'uid': str(component.get('uid', '')),
-                'summary': str(component.get('summary', '')),
-                'dtstart': component.get('dtstart').dt if component.get('dtstart') else None,
-                'dtend': component.get('dtend').dt if component.get('dtend') else None,
-                'description': str(component.get('description', '')),
-                'location': str(component.get('location', '')),
+    for component in cal.subcomponents:
+        if component.name == "VTIMEZONE":
+            tzid = str(component.get('tzid', ''))
+            timezones[tzid] = component
+            zones[tzid] = resolve_tzid(tzid) or component.to_tz(lookup_tzid=False)
+    for component in cal.subcomponents:
+        if component.name in names:
+            _bind_timezones(component, zones)
+            context = {
+                tzid: timezones[tzid]
+                for tzid in _referenced_tzids(component)
+                if tzid in timezones
             }
+            yield component, context
+
+def parse_event(ical_data: str) -> Dict[str, Any]:
+    """解析事件"""
+    for component, _ in iter_components(ical_data, ("VEVENT",)):
+        return event_from_component(component)
     return {}
 
 def parse_todo(ical_data: str) -> Dict[str, Any]:
     """解析待办"""
-    cal = ICalendar.from_ical(ical_data)
-    for component in cal.walk():
-        if component.name == "VTODO":
-            return {
-                'uid': str(component.get('uid', '')),
-                'summary': str(component.get('summary', '')),
-                'status': str(component.get('status', 'NEEDS-ACTION')),
-                'due': component.get('due').dt if component.get('due') else None,
-                'priority': component.get('priority', 5),
-            }
+    for component, _ in iter_components(ical_data, ("VTODO",)):
+        return todo_from_component(component)
     return {}
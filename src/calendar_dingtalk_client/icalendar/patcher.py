@@ -0,0 +1,169 @@
+"""
+iCalendar 属性补丁
+
+在原始 iCalendar 文本上按内容行（展开折行后）替换、插入或删除属性，
+未涉及的内容行保持逐字节不变，因此 ATTENDEE、VALARM、RRULE 等
+未建模的属性在更新时不会丢失。
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .serializer import fold_line, format_property
+
+_UNESCAPE = re.compile(r"\\([\\;,nN])")
+
+# 设置这些属性时需要同时删除的互斥属性（RFC 5545 3.6.1 / 3.6.2）
+_EXCLUSIVE = {"DTEND": "DURATION", "DUE": "DURATION"}
+
+
+def split_content_lines(text: str) -> List[Tuple[str, str]]:
+    """
+    把 iCalendar 文本拆分为内容行
+
+    返回 [(展开后的内容行, 原始文本)]，原始文本包含折行和换行符，
+    全部拼接后与输入完全一致。
+    """
+    entries: List[Tuple[str, str]] = []
+    for physical in text.splitlines(keepends=True):
+        if physical[:1] in (" ", "\t") and entries:
+            line, raw = entries[-1]
+            entries[-1] = (line + physical[1:].rstrip("\r\n"), raw + physical)
+        else:
+            entries.append((physical.rstrip("\r\n"), physical))
+    return entries
+
+
+def property_name(line: str) -> str:
+    """返回内容行的属性名（大写）"""
+    end = len(line)
+    for sep in (";", ":"):
+        pos = line.find(sep)
+        if pos != -1 and pos < end:
+            end = pos
+    return line[:end].upper()
+
+
+def property_value(line: str) -> str:
+    """返回内容行的原始值（不做反转义）"""
+    in_quotes = False
+    for i, ch in enumerate(line):
+        if ch == '"':
+            in_quotes = not in_quotes
+        elif ch == ":" and not in_quotes:
+            return line[i + 1 :]
+    return ""
+
+
+def unescape_text(value: str) -> str:
+    """反转义 TEXT 值"""
+    return _UNESCAPE.sub(lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def _find_component(
+    entries: List[Tuple[str, str]], component: str
+) -> Tuple[int, int, List[int]]:
+    """
+    定位需要修改的组件
+
+    返回 (BEGIN 行下标, END 行下标, 组件自身属性行下标列表)。
+    存在多个同名组件（重复实例覆盖）时选择不带 RECURRENCE-ID 的主组件。
+    """
+    candidates = []
+    stack: List[str] = []
+    current: Optional[List[Any]] = None
+    for idx, (line, _) in enumerate(entries):
+        name = property_name(line)
+        if name == "BEGIN":
+            comp = property_value(line).upper()
+            stack.append(comp)
+            if comp == component and stack[:-1] == ["VCALENDAR"]:
+                current = [idx, None, [], False]
+            continue
+        if name == "END":
+            if stack:
+                comp = stack.pop()
+                if current is not None and comp == component and len(stack) == 1:
+                    current[1] = idx
+                    candidates.append(current)
+                    current = None
+            continue
+        if current is not None and len(stack) == 2:
+            current[2].append(idx)
+            if name == "RECURRENCE-ID":
+                current[3] = True
+
+    if not candidates:
+        raise ValueError(f"{component} not found in calendar data")
+    for begin, end, props, is_override in candidates:
+        if not is_override:
+            return begin, end, props
+    begin, end, props, _ = candidates[0]
+    return begin, end, props
+
+
+def get_property(
+    ical_data: str, name: str, component: str = "VEVENT"
+) -> Optional[str]:
+    """读取主组件的属性值（TEXT 反转义后），不存在返回 None"""
+    entries = split_content_lines(ical_data)
+    _, _, props = _find_component(entries, component.upper())
+    name = name.upper()
+    for idx in props:
+        line = entries[idx][0]
+        if property_name(line) == name:
+            return unescape_text(property_value(line))
+    return None
+
+
+def patch_component(
+    ical_data: str, changes: Dict[str, Any], component: str = "VEVENT"
+) -> str:
+    """
+    修改主组件的属性
+
+    changes 的键为属性名，值为新值（按 serializer 规则格式化）；
+    值为 None 时删除该属性。其余内容行保持原样。
+    """
+    entries = split_content_lines(ical_data)
+    begin, end, props = _find_component(entries, component.upper())
+
+    changes = {name.upper(): value for name, value in changes.items()}
+    for name, exclusive in _EXCLUSIVE.items():
+        if changes.get(name) is not None and exclusive not in changes:
+            changes[exclusive] = None
+
+    newline = "\r\n" if "\r\n" in entries[begin][1] else "\n"
+
+    def render(name: str) -> str:
+        line = fold_line(format_property(name, changes[name]))
+        if newline != "\r\n":
+            line = line.replace("\r\n", newline)
+        return line + newline
+
+    # 新属性插入到第一个子组件（如 VALARM）之前，没有子组件则插入到 END 之前
+    insert_at = end
+    for idx in range(begin + 1, end):
+        if property_name(entries[idx][0]) == "BEGIN":
+            insert_at = idx
+            break
+
+    prop_set = set(props)
+    written = set()
+    output: List[str] = []
+    for idx, (line, raw) in enumerate(entries):
+        if idx == insert_at:
+            for name, value in changes.items():
+                if value is not None and name not in written:
+                    output.append(render(name))
+                    written.add(name)
+        if idx in prop_set:
+            name = property_name(line)
+            if name in changes:
+                # 原位替换第一次出现的属性，重复出现的删除
+                if changes[name] is not None and name not in written:
+                    output.append(render(name))
+                    written.add(name)
+                continue
+        output.append(raw)
+    return "".join(output)
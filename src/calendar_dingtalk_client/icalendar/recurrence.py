@@ -0,0 +1,222 @@
+"""
+重复事件展开
+
+主事件的重复规则（RRULE/RDATE/EXDATE）以可序列化的形式保存在事件字典中，
+展开时按 DTSTART 所在时区的墙上时间生成实例（跨夏令时保持本地时刻不变），
+再换算为 UTC 纪元秒。
+"""
+import re
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dateutil.rrule import rrulestr
+from icalendar.cal import Component
+
+from ..config import get_config
+from .timezones import (
+    default_timezone,
+    definition_timezone,
+    resolve_tzid,
+    timezone_key,
+    to_epoch,
+)
+
+# 单个重复事件最多展开的实例数，避免 FREQ=MINUTELY 之类的规则撑爆内存
+MAX_OCCURRENCES = 20000
+
+_DAY = 86400
+
+_UNTIL_UTC = re.compile(r"UNTIL=(\d{8}T\d{6})Z", re.IGNORECASE)
+
+
+def _date_epochs(prop: Any) -> List[int]:
+    """EXDATE/RDATE 的所有时间（可能是多行属性），PERIOD 值取开始时间"""
+    epochs = []
+    for item in prop if isinstance(prop, list) else [prop]:
+        for value in getattr(item, 'dts', ()):
+            dt = value.dt[0] if isinstance(value.dt, tuple) else value.dt
+            epochs.append(to_epoch(dt))
+    return epochs
+
+
+def event_recurrence(component: Component) -> Optional[Dict[str, Any]]:
+    """
+    主事件的重复规则 {rrule, tzid, timezone, rdate, exdate}，不重复的事件返回 None
+
+    timezone 为自定义 TZID 所用 VTIMEZONE 定义的内容哈希（标准时区为 None）
+    """
+    rrule = component.get('rrule')
+    rdate = component.get('rdate')
+    if (rrule is None and rdate is None) or component.get('recurrence-id') is not None:
+        return None
+    if isinstance(rrule, list):
+        rrule = rrule[0]
+    dtstart = component.get('dtstart')
+    tzid = None
+    key = None
+    if dtstart is not None and isinstance(dtstart.dt, datetime) and dtstart.dt.tzinfo is not None:
+        tzid = str(dtstart.params.get('TZID') or 'UTC')
+        key = timezone_key(dtstart.dt.tzinfo)
+    return {
+        'rrule': rrule.to_ical().decode() if rrule is not None else None,
+        'tzid': tzid,
+        'timezone': key,
+        'rdate': _date_epochs(rdate) if rdate is not None else [],
+        'exdate': _date_epochs(component.get('exdate')) if component.get('exdate') is not None else [],
+    }
+
+
+def _local_until(rule: str, tz: Any) -> str:
+    """UTC 的 UNTIL 换算为本地墙上时间，与无时区的 DTSTART 一致"""
+    def replace(match):
+        until = datetime.strptime(match.group(1), "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
+        return "UNTIL=" + until.astimezone(tz).strftime("%Y%m%dT%H%M%S")
+    return _UNTIL_UTC.sub(replace, rule)
+
+
+def occurrence_timezone(recurrence: Dict[str, Any]) -> Any:
+    """展开使用的时区：DTSTART 的 TZID，浮动时间和全天事件使用默认时区"""
+    tzid = recurrence.get('tzid')
+    if tzid == 'UTC':
+        return timezone.utc
+    key = recurrence.get('timezone')
+    tz = definition_timezone(key) if key else None
+    return tz or (resolve_tzid(tzid) if tzid else None) or default_timezone()
+
+
+def expand(
+    event: Dict[str, Any],
+    window_start: int,
+    window_end: int,
+    skip: Iterable[int] = (),
+    limit: int = MAX_OCCURRENCES,
+) -> List[Tuple[int, int]]:
+    """
+    展开主事件在 [window_start, window_end) 内的实例 [(开始, 结束), ...]
+
+    skip 为已被覆盖实例（RECURRENCE-ID）替换的原始开始时间；
+    不重复的事件原样返回自身
+    """
+    start, end = event.get('dtstart_epoch'), event.get('dtend_epoch')
+    if start is None:
+        return []
+    end = start if end is None else end
+    recurrence = event.get('recurrence')
+    if not recurrence:
+        return [(start, end)] if end > window_start and start < window_end else []
+
+    duration = end - start
+    tz = occurrence_timezone(recurrence)
+    excluded = set(recurrence.get('exdate') or ()) | set(skip)
+    starts = set(recurrence.get('rdate') or ())
+    starts.add(start)
+    if recurrence.get('rrule'):
+        local = datetime.fromtimestamp(start, tz).replace(tzinfo=None)
+        rule = rrulestr(_local_until(recurrence['rrule'], tz), dtstart=local)
+        # 从能延续到窗口内的最早时刻开始
+        after = datetime.fromtimestamp(max(window_start - duration, start), tz).replace(tzinfo=None)
+        for value in rule.xafter(after, count=limit, inc=True):
+            epoch = int(value.replace(tzinfo=tz).timestamp())
+            if epoch >= window_end:
+                break
+            starts.add(epoch)
+    return sorted(
+        (s, s + duration)
+        for s in starts
+        if s not in excluded and s + duration > window_start and s < window_end
+    )
+
+
+def default_horizon() -> Tuple[int, int]:
+    """重复事件展开的默认时间范围：按配置相对今天向前、向后的天数"""
+    config = get_config()
+    today = int(time.time()) // _DAY * _DAY
+    return (
+        today - config.snapshot_past_days * _DAY,
+        today + config.snapshot_future_days * _DAY,
+    )
+
+
+def covering_horizon(
+    current: Tuple[int, int],
+    base: Tuple[int, int],
+    window_start: Optional[int] = None,
+    window_end: Optional[int] = None,
+) -> Optional[Tuple[int, int]]:
+    """
+    查询前需要的展开范围：基础范围（默认或固定）并上查询窗口
+
+    current 已覆盖时返回 None，无需重新展开；否则返回新的范围
+    （不保留 current 中多出的部分，内存只随基础范围和一个窗口增长）
+    """
+    start = base[0] if window_start is None else min(base[0], window_start)
+    end = base[1] if window_end is None else max(base[1], window_end)
+    if current[0] <= start and end <= current[1]:
+        return None
+    return start, end
+
+
+def _recurrence_epoch(value: Optional[str]) -> Optional[int]:
+    """事件字典中 recurrence_id（str(datetime) 或 str(date)）对应的纪元秒"""
+    if not value:
+        return None
+    try:
+        return to_epoch(datetime.fromisoformat(value))
+    except ValueError:
+        return None
+
+
+def expand_object(
+    events: List[Dict[str, Any]], window_start: int, window_end: int
+) -> List[Tuple[int, int, int]]:
+    """
+    展开同一对象中的事件，返回 [(事件下标, 开始, 结束), ...]
+
+    重复事件展开 [window_start, window_end) 内的实例并跳过被覆盖的实例；
+    不重复的事件（包括覆盖实例）不受范围限制
+    """
+    # 被覆盖实例替换掉的原始开始时间，按 UID 分组
+    overridden: Dict[str, List[int]] = {}
+    for event in events:
+        epoch = _recurrence_epoch(event.get('recurrence_id'))
+        if epoch is not None:
+            overridden.setdefault(event.get('uid') or '', []).append(epoch)
+    rows: List[Tuple[int, int, int]] = []
+    for row, event in enumerate(events):
+        if event.get('recurrence'):
+            skip = overridden.get(event.get('uid') or '', ())
+            for start, end in expand(event, window_start, window_end, skip=skip):
+                rows.append((row, start, end))
+            continue
+        start = event.get('dtstart_epoch')
+        if start is None:
+            continue
+        end = event.get('dtend_epoch')
+        rows.append((row, start, start if end is None else end))
+    return rows
+
+
+def local_value(epoch: int, recurrence: Optional[Dict[str, Any]], all_day: bool) -> str:
+    """实例开始/结束时间的文本形式，与事件字典中 dtstart/dtend 的格式一致"""
+    tz = occurrence_timezone(recurrence or {})
+    value = datetime.fromtimestamp(epoch, tz)
+    if all_day:
+        return str(date(value.year, value.month, value.day))
+    return str(value)
+
+
+def occurrence(event: Dict[str, Any], start: int, end: int) -> Dict[str, Any]:
+    """实例对应的事件字典，重复事件的实例替换为该次的时间和 RECURRENCE-ID"""
+    recurrence = event.get('recurrence')
+    if not recurrence:
+        return event
+    all_day = bool(event.get('all_day'))
+    return {
+        **event,
+        'dtstart': local_value(start, recurrence, all_day),
+        'dtend': local_value(end, recurrence, all_day),
+        'dtstart_epoch': start,
+        'dtend_epoch': end,
+        'recurrence_id': local_value(start, recurrence, all_day),
+    }
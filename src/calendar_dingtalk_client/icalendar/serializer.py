@@ -0,0 +1,222 @@
+"""
+iCalendar 快速序列化器
+
+直接把事件/待办字典写成 RFC 5545 文本，不再构建 icalendar 对象树。
+输出与 icalendar 库 ``Calendar.to_ical()`` 逐字节一致（属性顺序、转义、
+折行、UTC/TZID 格式均与库保持相同规则）。
+"""
+
+import re
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from icalendar.timezone.tzid import tzid_from_tzinfo
+
+PRODID = "-//DingTalk CalDAV Client//CN"
+
+# 与 icalendar.Event.canonical_order 一致：这些属性按固定顺序在前，其余按字母序
+_EVENT_PROPS: Tuple[Tuple[str, str], ...] = (
+    ("SUMMARY", "summary"),
+    ("DTSTART", "dtstart"),
+    ("DTEND", "dtend"),
+    ("UID", "uid"),
+    ("DESCRIPTION", "description"),
+    ("LOCATION", "location"),
+)
+# VTODO 没有 canonical_order，全部按字母序
+_TODO_PROPS: Tuple[Tuple[str, str], ...] = (
+    ("DUE", "due"),
+    ("PRIORITY", "priority"),
+    ("STATUS", "status"),
+    ("SUMMARY", "summary"),
+    ("UID", "uid"),
+)
+# build_event/build_todo 中始终写出的属性，其余属性仅在值为真时写出
+_EVENT_REQUIRED = frozenset(("uid", "summary"))
+_TODO_REQUIRED = frozenset(("uid", "summary"))
+
+_DATETIME_PROPS = frozenset(("DTSTART", "DTEND", "DUE", "COMPLETED", "RECURRENCE-ID"))
+_INT_PROPS = frozenset(("PRIORITY", "PERCENT-COMPLETE", "SEQUENCE"))
+
+_TEXT_SPECIAL = re.compile(r"[\\;,\n]")
+_PARAM_QUOTABLE = re.compile("[,;:’]")
+_PARAM_ESCAPE = re.compile(r'\^|\r\n|\r|\n|"')
+_PARAM_REPLACEMENTS = {"^": "^^", "\n": "^n", "\r": "^n", "\r\n": "^n", '"': "^'"}
+
+# tzinfo -> TZID 缓存（UTC 时区对应 "UTC"）
+_tzid_cache: Dict[Any, Optional[str]] = {}
+_UTC = "UTC"
+
+
+def escape_text(text: str) -> str:
+    """按 RFC 5545 TEXT 规则转义"""
+    if not _TEXT_SPECIAL.search(text):
+        return text
+    # 顺序与 icalendar.parser.escape_char 保持一致
+    return (
+        text.replace(r"\N", "\n")
+        .replace("\\", "\\\\")
+        .replace(";", r"\;")
+        .replace(",", r"\,")
+        .replace("\r\n", r"\n")
+        .replace("\n", r"\n")
+    )
+
+
+def escape_param(value: str) -> str:
+    """转义参数值（RFC 6868），必要时加双引号"""
+    value = _PARAM_ESCAPE.sub(lambda m: _PARAM_REPLACEMENTS[m.group(0)], value)
+    value = value.replace('"', "'")
+    if _PARAM_QUOTABLE.search(value):
+        return f'"{value}"'
+    return value
+
+
+def fold_line(line: str) -> str:
+    """按 75 字节折行（不会拆开多字节字符）"""
+    if len(line) < 75 and line.isascii():
+        return line
+    if line.isascii():
+        return "\r\n ".join(line[i : i + 74] for i in range(0, len(line), 74))
+
+    chars = []
+    byte_count = 0
+    for char in line:
+        char_len = len(char.encode("utf-8"))
+        byte_count += char_len
+        if byte_count >= 75:
+            chars.append("\r\n ")
+            byte_count = char_len
+        chars.append(char)
+    return "".join(chars)
+
+
+def _tzid(dt: datetime) -> Optional[str]:
+    """返回 datetime 对应的 TZID，UTC 返回 "UTC"，无时区返回 None"""
+    tzinfo = dt.tzinfo
+    if tzinfo is None:
+        return None
+    try:
+        tzid = _tzid_cache[tzinfo]
+    except (KeyError, TypeError):
+        tzid = tzid_from_tzinfo(tzinfo)
+        if tzid is not None:
+            try:
+                _tzid_cache[tzinfo] = tzid
+            except TypeError:
+                pass
+    if tzid is None:
+        # 无法识别的时区（如固定偏移），名称可能随日期变化，不缓存
+        return dt.tzname()
+    return tzid
+
+
+def format_datetime(value: Any) -> Tuple[str, str]:
+    """格式化日期时间，返回 (参数串, 值)"""
+    if isinstance(value, datetime):
+        text = (
+            f"{value.year:04}{value.month:02}{value.day:02}"
+            f"T{value.hour:02}{value.minute:02}{value.second:02}"
+        )
+        tzid = _tzid(value)
+        if tzid == _UTC:
+            return "", text + "Z"
+        if tzid:
+            return f";TZID={escape_param(tzid)}", text
+        return "", text
+    if isinstance(value, date):
+        return ";VALUE=DATE", f"{value.year:04}{value.month:02}{value.day:02}"
+    raise ValueError("You must use datetime, date, timedelta, time or tuple (for periods)")
+
+
+def format_property(name: str, value: Any) -> str:
+    """按属性类型格式化为一行未折行的内容行"""
+    if name in _DATETIME_PROPS:
+        params, text = format_datetime(value)
+        return f"{name}{params}:{text}"
+    if name in _INT_PROPS:
+        return f"{name}:{int(value)}"
+    return f"{name}:{escape_text(str(value))}"
+
+
+class ICalWriter:
+    """
+    RFC 5545 文本写入器
+
+    内部缓冲区可重复使用：批量写入时调用 ``reset()`` 后继续写下一个日历对象。
+    """
+
+    def __init__(self, prodid: str = PRODID):
+        self.prodid = prodid
+        self._parts: List[str] = []
+
+    def reset(self) -> None:
+        """清空缓冲区"""
+        self._parts.clear()
+
+    def getvalue(self) -> bytes:
+        """返回已写入内容（UTF-8 编码）"""
+        return "".join(self._parts).encode("utf-8")
+
+    def write_line(self, name: str, value: str, params: str = "") -> None:
+        """写入一行内容（value 需已转义）"""
+        self._parts.append(fold_line(f"{name}{params}:{value}"))
+        self._parts.append("\r\n")
+
+    def write_property(self, name: str, value: Any) -> None:
+        """按属性类型格式化并写入"""
+        self._parts.append(fold_line(format_property(name, value)))
+        self._parts.append("\r\n")
+
+    def begin_calendar(self) -> None:
+        """写入 VCALENDAR 头"""
+        self._parts.append("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n")
+        self.write_line("PRODID", escape_text(self.prodid))
+
+    def end_calendar(self) -> None:
+        """写入 VCALENDAR 尾"""
+        self._parts.append("END:VCALENDAR\r\n")
+
+    def write_event(self, event: Dict[str, Any]) -> None:
+        """写入一个 VEVENT"""
+        self._write_component("VEVENT", _EVENT_PROPS, _EVENT_REQUIRED, event)
+
+    def write_todo(self, todo: Dict[str, Any]) -> None:
+        """写入一个 VTODO"""
+        self._write_component("VTODO", _TODO_PROPS, _TODO_REQUIRED, todo)
+
+    def _write_component(
+        self,
+        name: str,
+        props: Tuple[Tuple[str, str], ...],
+        required: frozenset,
+        data: Dict[str, Any],
+    ) -> None:
+        self._parts.append(f"BEGIN:{name}\r\n")
+        for prop_name, key in props:
+            if key in required:
+                self.write_property(prop_name, data[key])
+            else:
+                value = data.get(key)
+                if value:
+                    self.write_property(prop_name, value)
+        self._parts.append(f"END:{name}\r\n")
+
+
+def serialize_calendar(
+    events: Iterable[Dict[str, Any]] = (),
+    todos: Iterable[Dict[str, Any]] = (),
+    writer: Optional[ICalWriter] = None,
+) -> bytes:
+    """把多个事件/待办写入同一个 VCALENDAR"""
+    if writer is None:
+        writer = ICalWriter()
+    else:
+        writer.reset()
+    writer.begin_calendar()
+    for event in events:
+        writer.write_event(event)
+    for todo in todos:
+        writer.write_todo(todo)
+    writer.end_calendar()
+    return writer.getvalue()
@@ -0,0 +1,256 @@
+"""
+iCalendar 流式解析器
+
+逐块读取 .ics 文件或异步字节流，增量展开折行，每读完一个
+VEVENT/VTODO 就立即产出，同时附带它所引用的 VTIMEZONE 定义。
+内存占用只与单个组件大小有关，与文件大小无关。
+"""
+
+import asyncio
+import codecs
+from dataclasses import dataclass, field
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .patcher import property_name, property_value
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class StreamComponent:
+    """流式解析得到的单个组件"""
+
+    name: str
+    uid: str
+    raw: str
+    recurrence_id: Optional[str] = None
+    timezones: Dict[str, str] = field(default_factory=dict)
+
+    def to_ical(self, prodid: str = "-//DingTalk CalDAV Client//CN") -> str:
+        """包装为只含本组件（及其时区）的 VCALENDAR 文本"""
+        return wrap_calendar([self], prodid)
+
+
+def wrap_calendar(
+    components: Sequence[StreamComponent],
+    prodid: str = "-//DingTalk CalDAV Client//CN",
+) -> str:
+    """把若干组件原文包装为一个 VCALENDAR，VTIMEZONE 按 TZID 去重"""
+    timezones: Dict[str, str] = {}
+    for component in components:
+        timezones.update(component.timezones)
+    parts = ["BEGIN:VCALENDAR\r\n", "VERSION:2.0\r\n", f"PRODID:{prodid}\r\n"]
+    parts.extend(timezones.values())
+    parts.extend(component.raw for component in components)
+    parts.append("END:VCALENDAR\r\n")
+    return "".join(parts)
+
+
+def _param_tzids(line: str) -> List[str]:
+    """内容行参数中的 TZID"""
+    head = line[: len(line) - len(property_value(line))]
+    if "TZID=" not in head.upper():
+        return []
+    tzids = []
+    for param in head.rstrip(":").split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.upper() == "TZID":
+            tzids.append(value.strip('"'))
+    return tzids
+
+
+class LineUnfolder:
+    """增量展开折行，产出 (内容行, 以 CRLF 结尾的原始文本)"""
+
+    def __init__(self):
+        self._buffer = ""
+        self._line: Optional[str] = None
+        self._raw: List[str] = []
+        self._started = False
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """输入一段文本，返回已确定完整的内容行"""
+        if not self._started and text:
+            text = text.lstrip("\ufeff")
+            self._started = True
+        self._buffer += text
+        physicals = self._buffer.split("\n")
+        self._buffer = physicals.pop()
+        return self._consume(physicals)
+
+    def close(self) -> List[Tuple[str, str]]:
+        """输入结束，返回剩余的内容行"""
+        physicals = [self._buffer] if self._buffer else []
+        self._buffer = ""
+        lines = self._consume(physicals)
+        if self._line is not None:
+            lines.append((self._line, "".join(self._raw)))
+            self._line = None
+            self._raw = []
+        return lines
+
+    def _consume(self, physicals: Iterable[str]) -> List[Tuple[str, str]]:
+        lines = []
+        for physical in physicals:
+            physical = physical.rstrip("\r")
+            if physical[:1] in (" ", "\t") and self._line is not None:
+                self._line += physical[1:]
+                self._raw.append(physical + "\r\n")
+                continue
+            if self._line is not None:
+                lines.append((self._line, "".join(self._raw)))
+            if physical:
+                self._line = physical
+                self._raw = [physical + "\r\n"]
+            else:
+                self._line = None
+                self._raw = []
+        return lines
+
+
+class ComponentAssembler:
+    """把内容行组装为组件，记录 VTIMEZONE 定义和 VCALENDAR 级属性"""
+
+    def __init__(self, names: Sequence[str] = ("VEVENT", "VTODO")):
+        self.names = frozenset(name.upper() for name in names)
+        self.timezones: Dict[str, str] = {}
+        self.calendar_properties: Dict[str, str] = {}
+        self._stack: List[str] = []
+        self._collecting: Optional[str] = None
+        self._raw: List[str] = []
+        self._uid = ""
+        self._recurrence_id: Optional[str] = None
+        self._tzids: List[str] = []
+
+    def feed(self, line: str, raw: str) -> Optional[StreamComponent]:
+        """输入一个内容行，组件结束时返回该组件"""
+        name = property_name(line)
+        if name == "BEGIN":
+            comp = property_value(line).upper()
+            self._stack.append(comp)
+            if len(self._stack) == 2 and (comp in self.names or comp == "VTIMEZONE"):
+                self._collecting = comp
+                self._raw = []
+                self._uid = ""
+                self._recurrence_id = None
+                self._tzids = []
+        elif name == "END":
+            if self._stack:
+                self._stack.pop()
+            if self._collecting is not None and len(self._stack) == 1:
+                self._raw.append(raw)
+                return self._finish()
+        elif self._collecting is None:
+            if len(self._stack) == 1:
+                self.calendar_properties[name] = raw
+            return None
+        elif len(self._stack) == 2:
+            if name == "UID":
+                self._uid = property_value(line)
+            elif name == "TZID" and self._collecting == "VTIMEZONE":
+                self._uid = property_value(line)
+            elif name == "RECURRENCE-ID":
+                self._recurrence_id = property_value(line)
+            self._tzids.extend(_param_tzids(line))
+        if self._collecting is not None:
+            self._raw.append(raw)
+        return None
+
+    def _finish(self) -> Optional[StreamComponent]:
+        comp = self._collecting
+        raw = "".join(self._raw)
+        self._collecting = None
+        self._raw = []
+        if comp == "VTIMEZONE":
+            self.timezones[self._uid] = raw
+            return None
+        return StreamComponent(
+            name=comp,
+            uid=self._uid,
+            raw=raw,
+            recurrence_id=self._recurrence_id,
+            timezones={
+                tzid: self.timezones[tzid]
+                for tzid in dict.fromkeys(self._tzids)
+                if tzid in self.timezones
+            },
+        )
+
+
+def iter_text(
+    ical_data: str, names: Sequence[str] = ("VEVENT", "VTODO")
+) -> Iterator[StreamComponent]:
+    """拆分一段完整的日历文本，按原文产出组件（不重新序列化）"""
+    unfolder = LineUnfolder()
+    assembler = ComponentAssembler(names)
+    for line, raw in unfolder.feed(ical_data) + unfolder.close():
+        component = assembler.feed(line, raw)
+        if component is not None:
+            yield component
+
+
+def iter_ics(
+    source: Union[BinaryIO, Iterable[bytes]],
+    names: Sequence[str] = ("VEVENT", "VTODO"),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[StreamComponent]:
+    """从二进制文件对象（或字节块迭代器）流式解析组件"""
+    if hasattr(source, "read"):
+        chunks: Iterable[bytes] = iter(lambda: source.read(chunk_size), b"")
+    else:
+        chunks = source
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    unfolder = LineUnfolder()
+    assembler = ComponentAssembler(names)
+    for chunk in chunks:
+        for line, raw in unfolder.feed(decoder.decode(chunk)):
+            component = assembler.feed(line, raw)
+            if component is not None:
+                yield component
+    for line, raw in unfolder.feed(decoder.decode(b"", final=True)) + unfolder.close():
+        component = assembler.feed(line, raw)
+        if component is not None:
+            yield component
+
+
+async def aiter_ics(
+    stream: AsyncIterable[bytes],
+    names: Sequence[str] = ("VEVENT", "VTODO"),
+) -> AsyncIterator[StreamComponent]:
+    """从异步字节流解析组件，每收到一块数据就解析并产出已完成的组件"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    unfolder = LineUnfolder()
+    assembler = ComponentAssembler(names)
+    async for chunk in stream:
+        for line, raw in unfolder.feed(decoder.decode(chunk)):
+            component = assembler.feed(line, raw)
+            if component is not None:
+                yield component
+    for line, raw in unfolder.feed(decoder.decode(b"", final=True)) + unfolder.close():
+        component = assembler.feed(line, raw)
+        if component is not None:
+            yield component
+
+
+async def aiter_file(
+    path: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """在线程中分块读取文件，使磁盘读取与解析、上传交替进行"""
+    with open(path, "rb") as fp:
+        while True:
+            chunk = await asyncio.to_thread(fp.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,168 @@
+"""
+时区解析缓存
+
+进程级缓存：
+- TZID -> zoneinfo 时区对象（只缓存 IANA 名称和 Windows 名称）
+- VTIMEZONE 定义内容哈希 -> 已解析的 VTIMEZONE 组件和时区对象
+
+自定义 TZID 不是全局唯一的：不同日历可能用同一名称给出不同的定义，
+因此自定义时区只按定义内容哈希缓存，事件中的时间按所在对象的定义解释。
+已见过的 VTIMEZONE 在解析日历数据前即被剔除，不再交给
+``Calendar.from_ical`` 重复解析；事件入库时预先计算 UTC 纪元秒，
+后续排序、范围过滤和合并只需整数比较。
+"""
+
+import hashlib
+from datetime import date, datetime, time, timedelta, tzinfo
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from icalendar import Calendar as ICalendar
+from icalendar.cal import Component
+from icalendar.timezone import tzp
+from icalendar.timezone.windows_to_olson import WINDOWS_TO_OLSON
+
+from ..config import get_config
+from .patcher import property_name, property_value, split_content_lines
+
+_BEGIN = "BEGIN:VTIMEZONE"
+
+# 内容哈希 -> (TZID, VTIMEZONE 组件, 时区对象)
+_definitions: Dict[str, Tuple[str, Component, Optional[tzinfo]]] = {}
+# TZID -> 时区对象（只缓存解析成功的 IANA / Windows 名称）
+_zones: Dict[str, tzinfo] = {}
+# id(自定义时区对象) -> 定义的内容哈希（时区对象保存在 _definitions 中，不会被回收）
+_custom_keys: Dict[int, str] = {}
+
+
+def _zoneinfo(name: str) -> Optional[tzinfo]:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError, OSError):
+        return None
+
+
+def resolve_tzid(tzid: str) -> Optional[tzinfo]:
+    """
+    按 TZID 解析时区（IANA 名称或 Windows 名称），无法识别返回 None
+
+    自定义 TZID 不按名称解析，见 register_timezone / definition_timezone
+    """
+    tz = _zones.get(tzid)
+    if tz is not None:
+        return tz
+    tz = _zoneinfo(tzid)
+    if tz is None:
+        olson = WINDOWS_TO_OLSON.get(tzp.clean_timezone_id(tzid))
+        tz = _zoneinfo(olson) if olson else None
+    if tz is not None:
+        _zones[tzid] = tz
+    return tz
+
+
+@lru_cache(maxsize=1)
+def _default_timezone(tzid: str) -> tzinfo:
+    return resolve_tzid(tzid) or ZoneInfo("UTC")
+
+
+def default_timezone() -> tzinfo:
+    """浮动时间和全天事件使用的默认时区"""
+    return _default_timezone(get_config().default_timezone)
+
+
+def register_timezone(definition: str) -> Tuple[str, Component, Optional[tzinfo]]:
+    """
+    解析并缓存一段 VTIMEZONE 文本，已缓存时直接返回
+
+    IANA / Windows 名称使用标准时区，自定义 TZID 使用该定义构造的时区
+    """
+    key = hashlib.sha1(definition.encode("utf-8")).hexdigest()
+    cached = _definitions.get(key)
+    if cached is not None:
+        return cached
+    component = ICalendar.from_ical(
+        f"BEGIN:VCALENDAR\r\n{definition}END:VCALENDAR\r\n"
+    ).subcomponents[0]
+    tzid = str(component.get("tzid", ""))
+    tz = resolve_tzid(tzid)
+    if tz is None:
+        # 不按名称查找：icalendar 按 TZID 缓存第一次见到的自定义定义
+        tz = tzp.create_timezone(component)
+        _custom_keys[id(tz)] = key
+    _definitions[key] = (tzid, component, tz)
+    return _definitions[key]
+
+
+def timezone_key(tz: Optional[tzinfo]) -> Optional[str]:
+    """自定义时区对应的定义内容哈希，标准时区返回 None"""
+    return _custom_keys.get(id(tz)) if tz is not None else None
+
+
+def definition_timezone(key: str) -> Optional[tzinfo]:
+    """按定义内容哈希获取自定义时区，未注册时返回 None"""
+    cached = _definitions.get(key)
+    return cached[2] if cached is not None else None
+
+
+def extract_timezones(
+    ical_data: str,
+) -> Tuple[str, Dict[str, Component], Dict[str, tzinfo]]:
+    """
+    从日历文本中剔除 VTIMEZONE 块
+
+    返回 (剩余文本, {TZID: VTIMEZONE 组件}, {TZID: 该定义对应的时区对象})。
+    按内容行（展开折行后）跟踪组件嵌套，只有 VCALENDAR 下的
+    BEGIN:VTIMEZONE 内容行才开始一个块，属性值中出现的同样文本不受影响。
+    每个块按内容哈希缓存，同样的定义在进程内只会被解析一次。
+    """
+    if _BEGIN not in ical_data:
+        return ical_data, {}, {}
+    timezones: Dict[str, Component] = {}
+    zones: Dict[str, tzinfo] = {}
+    kept: List[str] = []
+    block: Optional[List[str]] = None
+    depth = 0
+    for line, raw in split_content_lines(ical_data):
+        name = property_name(line)
+        if name == "BEGIN":
+            depth += 1
+            if depth == 2 and property_value(line).upper() == "VTIMEZONE":
+                block = []
+        if block is not None:
+            block.append(raw)
+        else:
+            kept.append(raw)
+        if name == "END":
+            depth -= 1
+            if depth == 1 and block is not None:
+                tzid, component, tz = register_timezone("".join(block))
+                timezones[tzid] = component
+                if tz is not None:
+                    zones[tzid] = tz
+                block = None
+    if block is not None:
+        # 未闭合的块原样保留，交给 from_ical 处理
+        kept.extend(block)
+    return "".join(kept), timezones, zones
+
+
+def to_epoch(value: Any) -> Optional[int]:
+    """
+    转换为 UTC 纪元秒
+
+    带时区的 datetime 直接换算；浮动时间和 date（全天）按默认时区解释。
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=default_timezone())
+        return int(value.timestamp())
+    if isinstance(value, date):
+        return int(
+            datetime.combine(value, time(), tzinfo=default_timezone()).timestamp()
+        )
+    if isinstance(value, timedelta):
+        return int(value.total_seconds())
+    return None
@@ -0,0 +1,130 @@
+"""
+日程视图索引
+
+按本地日期把事件实例（重复事件展开后）放入每日的桶中，桶内按开始时间排序。
+跨天的实例放入它覆盖的每一天。订阅同步存储增量维护：对象变化时只移除该对象
+原有的条目并重新展开插入，日/周/月视图直接读取连续若干天的桶。
+查询的日期超出重复事件的展开范围（或日期推移后范围过期）时重新展开重复事件。
+"""
+
+from bisect import insort
+from datetime import date, datetime, time, tzinfo
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..caldav.sync import get_sync_store
+from ..icalendar.recurrence import (
+    covering_horizon,
+    default_horizon,
+    expand_object,
+    occurrence,
+)
+from ..icalendar.timezones import default_timezone
+
+# (开始, 结束, 对象 URL, 事件下标)
+Entry = Tuple[int, int, str, int]
+
+
+class AgendaIndex:
+    """本地日期（序数）-> 当天的事件实例"""
+
+    def __init__(self, horizon: Optional[Tuple[int, int]] = None, tz: Optional[tzinfo] = None):
+        # 重复事件展开的时间范围（不重复的事件不受限制），未指定时按配置相对当前时间计算
+        self._fixed_horizon = horizon
+        # 当前条目实际展开到的范围
+        self._horizon: Optional[Tuple[int, int]] = None
+        self._tz = tz
+        self._days: Dict[int, List[Entry]] = {}
+        self._objects: Dict[str, List[Dict[str, Any]]] = {}
+        # 对象 URL -> 其条目所在的日期
+        self._by_url: Dict[str, Set[int]] = {}
+
+    @property
+    def horizon(self) -> Tuple[int, int]:
+        if self._horizon is None:
+            self._horizon = self._fixed_horizon or default_horizon()
+        return self._horizon
+
+    @property
+    def timezone(self) -> tzinfo:
+        return self._tz or default_timezone()
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def _day(self, epoch: int) -> int:
+        return datetime.fromtimestamp(epoch, self.timezone).toordinal()
+
+    def _midnight(self, day: int) -> int:
+        return int(datetime.combine(date.fromordinal(day), time(), self.timezone).timestamp())
+
+    def cover(self, start: Optional[int] = None, end: Optional[int] = None) -> None:
+        """确保重复事件已展开到基础范围和查询窗口 [start, end)，否则重新展开"""
+        horizon = covering_horizon(
+            self.horizon, self._fixed_horizon or default_horizon(), start, end
+        )
+        if horizon is None:
+            return
+        self._horizon = horizon
+        stale = [
+            (url, events)
+            for url, events in self._objects.items()
+            if any(event.get("recurrence") for event in events)
+        ]
+        for url, events in stale:
+            self.update(url, events)
+
+    def update(self, url: str, events: List[Dict[str, Any]]) -> None:
+        """用对象的最新事件替换旧条目，events 为空表示删除（同步存储的订阅者）"""
+        for day in self._by_url.pop(url, ()):
+            remaining = [entry for entry in self._days[day] if entry[2] != url]
+            if remaining:
+                self._days[day] = remaining
+            else:
+                del self._days[day]
+        self._objects.pop(url, None)
+        if not events:
+            return
+        self._objects[url] = events
+        days: Set[int] = set()
+        for row, start, end in expand_object(events, *self.horizon):
+            first = self._day(start)
+            # 结束时刻不属于实例本身，零时长实例只放入开始那天
+            last = max(first, self._day(end - 1)) if end > start else first
+            for day in range(first, last + 1):
+                insort(self._days.setdefault(day, []), (start, end, url, row))
+                days.add(day)
+        self._by_url[url] = days
+
+    def days(
+        self, first: date, count: int, calendars: Optional[Iterable[str]] = None
+    ) -> List[Tuple[date, List[Dict[str, Any]]]]:
+        """
+        从 first 开始连续 count 天的 [(日期, 当天实例), ...]，可按日历名称过滤
+
+        查询前先确保重复事件已展开到这几天（本地日期）
+        """
+        wanted = set(calendars) if calendars is not None else None
+        result = []
+        start = first.toordinal()
+        self.cover(self._midnight(start), self._midnight(start + count))
+        for day in range(start, start + count):
+            events = []
+            for begin, end, url, row in self._days.get(day, ()):
+                event = self._objects[url][row]
+                if wanted is not None and event.get("calendar") not in wanted:
+                    continue
+                events.append(occurrence(event, begin, end))
+            result.append((date.fromordinal(day), events))
+        return result
+
+
+_agenda_index: Optional[AgendaIndex] = None
+
+
+def get_agenda_index() -> AgendaIndex:
+    """获取日程视图索引实例（单例），创建时订阅同步存储"""
+    global _agenda_index
+    if _agenda_index is None:
+        _agenda_index = AgendaIndex()
+        get_sync_store().subscribe(_agenda_index.update)
+    return _agenda_index
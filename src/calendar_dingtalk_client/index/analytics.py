@@ -0,0 +1,263 @@
+"""
+时间利用率统计
+
+在列式快照上按日历和周期（天/周）统计已安排时长、最忙的时段和专注时间占比。
+所有时间先换算为本地墙上时间的秒数（按窗口内的时区偏移表向量化换算），
+天、周、小时的边界和工作时间都成为简单的算术；各周期的时长由区间的
+累计覆盖函数在边界上求差得到，整个统计是一次向量化计算。
+结果按 (日历 ctag, 窗口, 参数) 缓存。
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from .slots import Intervals, WorkingHours, complement, intersect, merge
+
+_DAY = 86400
+_HOUR = 3600
+# 纪元第 0 天（1970-01-01）是周四，+3 后按周一对齐
+_MONDAY_SHIFT = 3
+
+
+def utc_offsets(tz: tzinfo, start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    窗口内的时区偏移表 (切换时刻, 偏移)
+
+    offsets[i] 适用于 transitions[i-1] <= t < transitions[i]（len(offsets) = len(transitions) + 1）
+    """
+    def offset(t: int) -> int:
+        return int(datetime.fromtimestamp(t, tz).utcoffset().total_seconds())
+
+    transitions: List[int] = []
+    offsets = [offset(start - _DAY)]
+    for sample in range(start, end + 2 * _DAY, _DAY):
+        current = offset(sample)
+        if current == offsets[-1]:
+            continue
+        # 二分找到切换的那一秒
+        low, high = sample - _DAY, sample
+        while high - low > 1:
+            middle = (low + high) // 2
+            if offset(middle) == offsets[-1]:
+                low = middle
+            else:
+                high = middle
+        transitions.append(high)
+        offsets.append(current)
+    return np.array(transitions, dtype=np.int64), np.array(offsets, dtype=np.int64)
+
+
+def to_local(values: np.ndarray, table: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """UTC 纪元秒换算为本地墙上时间的秒数"""
+    transitions, offsets = table
+    return values + offsets[np.searchsorted(transitions, values, side="right")]
+
+
+def coverage(intervals: Intervals, points: np.ndarray) -> np.ndarray:
+    """各时刻之前被区间覆盖的总秒数，intervals 需已合并"""
+    starts, ends = intervals
+    if not len(starts):
+        return np.zeros(len(points), dtype=np.int64)
+    lengths = np.concatenate(([0], np.cumsum(ends - starts)))
+    index = np.searchsorted(starts, points, side="right")
+    # 完全在时刻之前的区间之和，减去最后一个区间在时刻之后的部分
+    covered = lengths[index]
+    tail = np.where(index > 0, ends[np.maximum(index - 1, 0)] - points, 0)
+    return covered - np.maximum(tail, 0)
+
+
+def per_period(intervals: Intervals, boundaries: np.ndarray) -> np.ndarray:
+    return np.diff(coverage(intervals, boundaries))
+
+
+def local_working_hours(hours: WorkingHours, local_start: int, local_end: int) -> Intervals:
+    """本地时间轴上窗口内的工作时间"""
+    days = np.arange(local_start // _DAY, local_end // _DAY + 1, dtype=np.int64)
+    weekdays = (days + _MONDAY_SHIFT) % 7 + 1
+    days = days[np.isin(weekdays, sorted(hours.weekdays))]
+    begin = hours.start.hour * _HOUR + hours.start.minute * 60
+    finish = hours.end.hour * _HOUR + hours.end.minute * 60
+    starts = np.clip(days * _DAY + begin, local_start, local_end)
+    ends = np.clip(days * _DAY + finish, local_start, local_end)
+    return merge(starts, ends)
+
+
+def period_boundaries(local_start: int, local_end: int, period: str) -> np.ndarray:
+    """周期边界（本地秒），首尾为窗口边界"""
+    if period == "week":
+        first = (local_start // _DAY + _MONDAY_SHIFT) // 7 * 7 - _MONDAY_SHIFT
+        step = 7
+    else:
+        first = local_start // _DAY
+        step = 1
+    inner = np.arange(first + step, local_end // _DAY + 1, step, dtype=np.int64) * _DAY
+    inner = inner[(inner > local_start) & (inner < local_end)]
+    return np.concatenate(([local_start], inner, [local_end]))
+
+
+@dataclass(frozen=True)
+class UtilizationQuery:
+    """统计参数，同时作为缓存键的一部分"""
+
+    start: int
+    end: int
+    period: str = "day"
+    working_hours: WorkingHours = WorkingHours()
+    focus_minutes: int = 120
+    include_all_day: bool = False
+
+
+def _hours(seconds: Any) -> Any:
+    return np.round(np.asarray(seconds) / _HOUR, 2).tolist()
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> List[Optional[float]]:
+    return [
+        round(float(n) / float(d), 4) if d else None for n, d in zip(numerator, denominator)
+    ]
+
+
+def utilization(
+    starts: np.ndarray, ends: np.ndarray, query: UtilizationQuery, tz: tzinfo
+) -> Dict[str, Any]:
+    """
+    单个日历的统计
+
+    starts/ends 为窗口内实例的 UTC 纪元秒（可重叠，重叠部分只计一次）
+    """
+    table = utc_offsets(tz, query.start, query.end)
+    local_start, local_end = (int(v) for v in to_local(np.array([query.start, query.end]), table))
+    busy = merge(
+        np.clip(to_local(starts, table), local_start, local_end),
+        np.clip(to_local(ends, table), local_start, local_end),
+    )
+    work = local_working_hours(query.working_hours, local_start, local_end)
+    booked_at_work = intersect(busy, work)
+    free_starts, free_ends = intersect(complement(busy, local_start, local_end), work)
+    long_enough = free_ends - free_starts >= query.focus_minutes * 60
+    focus = (free_starts[long_enough], free_ends[long_enough])
+
+    boundaries = period_boundaries(local_start, local_end, query.period)
+    booked = per_period(busy, boundaries)
+    working = per_period(work, boundaries)
+    busy_at_work = per_period(booked_at_work, boundaries)
+    focused = per_period(focus, boundaries)
+    # 每个周期开始的实例数（窗口开始前已开始的计入第一个周期）
+    local_starts = np.clip(to_local(starts, table), local_start, local_end - 1)
+    counts = np.bincount(
+        np.searchsorted(boundaries, local_starts, side="right") - 1,
+        minlength=len(boundaries) - 1,
+    )
+
+    # 按本地小时统计已安排时长
+    hour_points = np.arange(
+        local_start // _HOUR * _HOUR, local_end + _HOUR, _HOUR, dtype=np.int64
+    )
+    hour_points = np.clip(hour_points, local_start, local_end)
+    by_hour = np.bincount(
+        (hour_points[:-1] // _HOUR) % 24, weights=per_period(busy, hour_points), minlength=24
+    )
+    busiest = [int(h) for h in np.argsort(-by_hour, kind="stable")[:3] if by_hour[h] > 0]
+
+    labels = [str(date(1970, 1, 1) + timedelta(days=int(b // _DAY))) for b in boundaries[:-1]]
+    return {
+        "events": int(len(starts)),
+        "booked_hours": _hours(booked.sum()),
+        "working_hours": _hours(working.sum()),
+        "utilization": _ratio([busy_at_work.sum()], [working.sum()])[0],
+        "focus_hours": _hours(focused.sum()),
+        "focus_ratio": _ratio([focused.sum()], [working.sum()])[0],
+        "periods": [
+            {
+                "period": label,
+                "events": int(count),
+                "booked_hours": booked_hours,
+                "working_hours": working_hours,
+                "utilization": util,
+                "focus_hours": focus_hours,
+                "focus_ratio": focus_ratio,
+            }
+            for label, count, booked_hours, working_hours, util, focus_hours, focus_ratio in zip(
+                labels,
+                counts,
+                _hours(booked),
+                _hours(working),
+                _ratio(busy_at_work, working),
+                _hours(focused),
+                _ratio(focused, working),
+            )
+        ],
+        "by_hour": _hours(by_hour),
+        "busiest_hours": [{"hour": h, "booked_hours": _hours(by_hour[h])} for h in busiest],
+    }
+
+
+# 占用时间的事件状态（未设置 STATUS 视为占用）
+BUSY_STATUSES = (None, "TENTATIVE", "CONFIRMED")
+
+
+def calendar_utilization(
+    snapshot: Any,
+    calendar: str,
+    ctag: Optional[str],
+    query: UtilizationQuery,
+    tz: tzinfo,
+    cache: Optional["UtilizationCache"] = None,
+) -> Dict[str, Any]:
+    """
+    从快照统计单个日历，结果按 (日历, ctag, 参数) 缓存
+
+    没有 ctag 时以快照版本代替（任何日历变化都会失效）
+    """
+    key = (calendar, ctag if ctag is not None else ("version", snapshot.version), query, str(tz))
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    mask = snapshot.mask(
+        query.start,
+        query.end,
+        calendars=[calendar],
+        statuses=BUSY_STATUSES,
+        all_day=None if query.include_all_day else False,
+    )
+    starts, ends = snapshot.intervals(mask)
+    result = {"calendar": calendar, **utilization(starts, ends, query, tz)}
+    if cache is not None:
+        cache.put(key, result)
+    return result
+
+
+class UtilizationCache:
+    """统计结果的 LRU 缓存，键为 (日历, ctag, 统计参数)"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, value: Dict[str, Any]) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_utilization_cache: Optional[UtilizationCache] = None
+
+
+def get_utilization_cache() -> UtilizationCache:
+    """获取统计缓存实例（单例）"""
+    global _utilization_cache
+    if _utilization_cache is None:
+        _utilization_cache = UtilizationCache()
+    return _utilization_cache
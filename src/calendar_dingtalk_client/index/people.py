@@ -0,0 +1,227 @@
+"""
+人员索引
+
+按人员（组织者和参与者的规范地址）索引事件，订阅同步存储增量维护。
+同一事件出现在多个日历中（例如邀请同时存在于双方日历）时只计一次。
+每人的日程按开始时间排序（变化后按需重建），时间窗口用二分定位，
+"某人本周日程"、"某人忙闲"、"谁有时间冲突"都只读内存。
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..caldav.sync import get_sync_store
+from ..icalendar.parser import person_id
+
+# 不占用时间的参与状态
+FREE_PARTSTATS = frozenset({"DECLINED"})
+
+EventKey = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class Booking:
+    """某人在某个事件中的安排"""
+
+    start: int
+    end: int
+    key: EventKey
+    role: str
+    partstat: str
+
+    @property
+    def busy(self) -> bool:
+        return self.partstat not in FREE_PARTSTATS
+
+
+def _event_key(event: Dict[str, Any]) -> EventKey:
+    return event.get("uid") or event.get("url") or "", event.get("recurrence_id") or ""
+
+
+def _participants(event: Dict[str, Any]) -> Dict[str, Tuple[str, str, Optional[str]]]:
+    """{人员: (角色, 参与状态, 名称)}，组织者同时出现在参与者中时以组织者为准"""
+    people: Dict[str, Tuple[str, str, Optional[str]]] = {}
+    for attendee in event.get("attendees") or ():
+        people[attendee["id"]] = (attendee["role"], attendee["partstat"], attendee["name"])
+    organizer = event.get("organizer")
+    if organizer:
+        people[organizer["id"]] = ("ORGANIZER", "ACCEPTED", organizer["name"])
+    return people
+
+
+class PeopleIndex:
+    """人员 -> 日程"""
+
+    def __init__(self):
+        self._bookings: Dict[str, Dict[EventKey, Booking]] = {}
+        # 事件 -> {对象 URL: 事件}，同一事件可能来自多个日历
+        self._events: Dict[EventKey, Dict[str, Dict[str, Any]]] = {}
+        self._by_url: Dict[str, List[EventKey]] = {}
+        # 事件 -> 当前用于安排的副本
+        self._booked: Dict[EventKey, Dict[str, Any]] = {}
+        self._names: Dict[str, str] = {}
+        # 人员 -> (开始时间列表, 按开始时间排序的安排, 最长时长)
+        self._timelines: Dict[str, Tuple[List[int], List[Booking], int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._bookings)
+
+    def update(self, url: str, events: List[Dict[str, Any]]) -> None:
+        """用对象的最新事件替换旧索引，events 为空表示删除（同步存储的订阅者）"""
+        touched: Set[EventKey] = set()
+        for key in self._by_url.pop(url, ()):
+            sources = self._events.get(key)
+            if sources is not None:
+                sources.pop(url, None)
+                touched.add(key)
+        keys = []
+        for event in events:
+            if event.get("dtstart_epoch") is None:
+                continue
+            key = _event_key(event)
+            self._events.setdefault(key, {})[url] = event
+            keys.append(key)
+            touched.add(key)
+        if keys:
+            self._by_url[url] = keys
+        for key in touched:
+            booked = self._booked.pop(key, None)
+            if booked is not None:
+                self._unbook(key, booked)
+            sources = self._events.get(key)
+            if not sources:
+                self._events.pop(key, None)
+                continue
+            # 以最近更新的副本为准
+            latest = next(reversed(sources.values()))
+            self._booked[key] = latest
+            self._book(key, latest)
+
+    def _book(self, key: EventKey, event: Dict[str, Any]) -> None:
+        start = event["dtstart_epoch"]
+        end = event.get("dtend_epoch")
+        end = start if end is None or end < start else end
+        for person, (role, partstat, name) in _participants(event).items():
+            self._bookings.setdefault(person, {})[key] = Booking(start, end, key, role, partstat)
+            self._timelines.pop(person, None)
+            if name:
+                self._names[person] = name
+
+    def _unbook(self, key: EventKey, event: Dict[str, Any]) -> None:
+        for person in _participants(event):
+            bookings = self._bookings.get(person)
+            if bookings is None or bookings.pop(key, None) is None:
+                continue
+            self._timelines.pop(person, None)
+            if not bookings:
+                del self._bookings[person]
+                self._names.pop(person, None)
+
+    def _timeline(self, person: str) -> Tuple[List[int], List[Booking], int]:
+        timeline = self._timelines.get(person)
+        if timeline is None:
+            bookings = sorted(
+                self._bookings.get(person, {}).values(), key=lambda b: (b.start, b.end, b.key)
+            )
+            longest = max((b.end - b.start for b in bookings), default=0)
+            timeline = ([b.start for b in bookings], bookings, longest)
+            self._timelines[person] = timeline
+        return timeline
+
+    def resolve(self, person: str) -> Optional[str]:
+        """按地址或名称（不区分大小写，名称需唯一）查找人员标识"""
+        candidate = person_id(person)
+        if candidate in self._bookings:
+            return candidate
+        if "@" not in candidate:
+            matches = [pid for pid, name in self._names.items() if name.casefold() == person.casefold()]
+            if len(matches) == 1:
+                return matches[0]
+        return None
+
+    def _in_calendars(self, key: EventKey, calendars: Set[str]) -> bool:
+        """事件是否（至少有一个副本）来自这些日历"""
+        return any(event.get("calendar") in calendars for event in self._events.get(key, {}).values())
+
+    def people(self, calendars: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """人员及其事件数，指定 calendars（日历名称）时只统计这些日历中的事件"""
+        wanted = set(calendars) if calendars is not None else None
+        result = []
+        for person, bookings in sorted(self._bookings.items()):
+            if wanted is None:
+                count = len(bookings)
+            else:
+                count = sum(1 for key in bookings if self._in_calendars(key, wanted))
+            if count:
+                result.append({"id": person, "name": self._names.get(person), "events": count})
+        return result
+
+    def bookings(self, person: str, start: int, end: int) -> List[Booking]:
+        """与 [start, end) 有交集的安排，按开始时间排序"""
+        starts, bookings, longest = self._timeline(person)
+        # 开始时间早于 start - longest 的安排不可能延续到窗口内
+        low = bisect_left(starts, start - longest)
+        high = bisect_left(starts, end)
+        return [
+            booking
+            for booking in bookings[low:high]
+            if booking.end > start or (booking.start == booking.end and booking.start >= start)
+        ]
+
+    def agenda(self, person: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """某人在窗口内的事件，附带其角色和参与状态"""
+        return [
+            {**self.event(booking.key), "role": booking.role, "partstat": booking.partstat}
+            for booking in self.bookings(person, start, end)
+        ]
+
+    def event(self, key: EventKey) -> Dict[str, Any]:
+        return self._booked[key]
+
+    def busy(self, person: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """窗口内合并后的忙碌区间（不含已拒绝的事件），裁剪到窗口内"""
+        merged: List[List[int]] = []
+        for booking in self.bookings(person, start, end):
+            if not booking.busy or booking.start == booking.end:
+                continue
+            interval_start, interval_end = max(booking.start, start), min(booking.end, end)
+            if merged and interval_start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], interval_end)
+            else:
+                merged.append([interval_start, interval_end])
+        return [(a, b) for a, b in merged]
+
+    def conflicts(
+        self, start: int, end: int, people: Optional[Set[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        窗口内日程重叠的人员
+
+        返回 [{"person", "name", "overlaps": [(事件键, 事件键), ...]}]
+        """
+        result = []
+        for person in sorted(people if people is not None else self._bookings):
+            overlaps = []
+            active: List[Booking] = []
+            for booking in self.bookings(person, start, end):
+                if not booking.busy or booking.start == booking.end:
+                    continue
+                active = [other for other in active if other.end > booking.start]
+                overlaps.extend((other.key, booking.key) for other in active)
+                active.append(booking)
+            if overlaps:
+                result.append({"person": person, "name": self._names.get(person), "overlaps": overlaps})
+        return result
+
+
+_people_index: Optional[PeopleIndex] = None
+
+
+def get_people_index() -> PeopleIndex:
+    """获取人员索引实例（单例），创建时订阅同步存储"""
+    global _people_index
+    if _people_index is None:
+        _people_index = PeopleIndex()
+        get_sync_store().subscribe(_people_index.update)
+    return _people_index
@@ -0,0 +1,305 @@
+"""
+事件全文检索
+
+对标题、地点和描述建立内存倒排索引：中日韩文字按单字和相邻二字切分，
+其他文字按词切分（最后一个词按前缀匹配）。索引订阅同步存储，
+对象 ETag 变化时只替换该对象的事件。查询先按倒排表求交集，
+再用 BM25 打分，标题权重最高。
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..caldav.sync import get_sync_store
+
+# 字段权重
+FIELD_WEIGHTS = {"summary": 3.0, "location": 1.5, "description": 1.0}
+
+# BM25 参数，文档长度按固定基准归一化
+_K1 = 1.2
+_B = 0.75
+_PIVOT_LENGTH = 40.0
+
+# 前缀匹配最多展开的词数
+_MAX_PREFIX_EXPANSION = 64
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_CJK_RUN = re.compile(f"[{_CJK}]+")
+_TOKEN = re.compile(f"[{_CJK}]+|[^\\W_{_CJK}]+")
+
+
+def normalize(text: str) -> str:
+    """全角转半角并忽略大小写"""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def _bigrams(run: str) -> List[str]:
+    return [run[i : i + 2] for i in range(len(run) - 1)]
+
+
+def index_terms(text: str) -> List[str]:
+    """文档切词：中日韩文字产出单字和二字，其他文字产出整词"""
+    terms: List[str] = []
+    for token in _TOKEN.findall(normalize(text)):
+        if _CJK_RUN.fullmatch(token):
+            terms.extend(token)
+            terms.extend(_bigrams(token))
+        else:
+            terms.append(token)
+    return terms
+
+
+def query_terms(text: str) -> Tuple[List[str], List[str], Optional[str]]:
+    """
+    查询切词
+
+    返回 (必须全部出现的词, 需要原样出现的中文短语, 按前缀匹配的最后一个词)
+    """
+    tokens = _TOKEN.findall(normalize(text))
+    prefix = None
+    if tokens and not _CJK_RUN.fullmatch(tokens[-1]) and not text[-1:].isspace():
+        prefix = tokens.pop()
+    terms: List[str] = []
+    phrases: List[str] = []
+    for token in tokens:
+        if _CJK_RUN.fullmatch(token):
+            terms.extend(_bigrams(token) if len(token) > 1 else [token])
+            if len(token) > 2:
+                phrases.append(token)
+        else:
+            terms.append(token)
+    return list(dict.fromkeys(terms)), phrases, prefix
+
+
+class SearchIndex:
+    """
+    增量维护的倒排索引
+
+    倒排表中直接保存每个文档的 BM25 词频分量（文档长度以固定基准归一化，
+    不随索引变化），查询时只需乘以 idf 求和；单个词的查询按分量
+    降序遍历（排好序的列表按需生成，该词变化后失效），取前 limit 个即可停止
+    """
+
+    def __init__(self):
+        # 词 -> {文档编号: 词频分量}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        # 词 -> 按词频分量降序的 [(分量, 开始时间, 文档编号)]
+        self._ranked: Dict[str, List[Tuple[float, int, int]]] = {}
+        self._documents: Dict[int, Dict[str, Any]] = {}
+        self._texts: Dict[int, str] = {}
+        self._terms: Dict[int, Tuple[str, ...]] = {}
+        self._by_url: Dict[str, List[int]] = {}
+        self._calendar_sizes: Dict[Any, int] = {}
+        self._next_id = 0
+        self._vocabulary: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def update(self, url: str, events: List[Dict[str, Any]]) -> None:
+        """用对象的最新事件替换旧索引，events 为空表示删除（同步存储的订阅者）"""
+        for doc_id in self._by_url.pop(url, ()):
+            self._remove(doc_id)
+        doc_ids = [self._add(event) for event in events]
+        if doc_ids:
+            self._by_url[url] = doc_ids
+
+    def _add(self, event: Dict[str, Any]) -> int:
+        doc_id = self._next_id
+        self._next_id += 1
+        frequencies: Dict[str, float] = {}
+        texts = []
+        for name, weight in FIELD_WEIGHTS.items():
+            value = event.get(name)
+            if not value:
+                continue
+            texts.append(normalize(value))
+            for term in index_terms(value):
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+        norm = _K1 * (1 - _B + _B * sum(frequencies.values()) / _PIVOT_LENGTH)
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._vocabulary = None
+            postings[doc_id] = frequency * (_K1 + 1) / (frequency + norm)
+            self._ranked.pop(term, None)
+        calendar = event.get("calendar")
+        self._calendar_sizes[calendar] = self._calendar_sizes.get(calendar, 0) + 1
+        self._documents[doc_id] = event
+        self._texts[doc_id] = "\n".join(texts)
+        self._terms[doc_id] = tuple(frequencies)
+        return doc_id
+
+    def _remove(self, doc_id: int) -> None:
+        for term in self._terms.pop(doc_id):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            self._ranked.pop(term, None)
+            if not postings:
+                del self._postings[term]
+                self._vocabulary = None
+        calendar = self._documents.pop(doc_id).get("calendar")
+        self._calendar_sizes[calendar] -= 1
+        if not self._calendar_sizes[calendar]:
+            del self._calendar_sizes[calendar]
+        del self._texts[doc_id]
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        start = bisect_left(self._vocabulary, prefix)
+        expanded = []
+        for term in self._vocabulary[start : start + _MAX_PREFIX_EXPANSION]:
+            if not term.startswith(prefix):
+                break
+            expanded.append(term)
+        return expanded
+
+    def _idf(self, term: str) -> float:
+        df = len(self._postings[term])
+        return math.log(1 + (len(self._documents) - df + 0.5) / (df + 0.5))
+
+    def _ranked_postings(self, term: str) -> List[Tuple[float, int, int]]:
+        ranked = self._ranked.get(term)
+        if ranked is None:
+            documents = self._documents
+            ranked = sorted(
+                (
+                    (impact, documents[doc_id].get("dtstart_epoch") or 0, doc_id)
+                    for doc_id, impact in self._postings[term].items()
+                ),
+                reverse=True,
+            )
+            self._ranked[term] = ranked
+        return ranked
+
+    def _result(self, doc_id: int, score: float) -> Dict[str, Any]:
+        return {**self._documents[doc_id], "score": round(score, 4)}
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = 20,
+        calendars: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        检索事件
+
+        返回 (按相关度排序的前 limit 个事件（附 score）, 匹配总数)
+        """
+        terms, phrases, prefix = query_terms(query)
+        # 每组词至少命中一个，组与组之间求交集
+        groups: List[List[str]] = [[term] for term in terms if term in self._postings]
+        if len(groups) < len(terms):
+            return [], 0
+        if prefix is not None:
+            groups.append(self._expand_prefix(prefix))
+        if not groups or not all(groups):
+            return [], 0
+
+        selected = set(calendars) if calendars is not None else None
+        if selected is not None and selected.issuperset(self._calendar_sizes):
+            selected = None
+        documents = self._documents
+
+        if len(groups) == 1:
+            return self._search_group(groups[0], limit, selected, phrases)
+
+        weighted = [
+            [(self._postings[term], self._idf(term)) for term in group] for group in groups
+        ]
+        # 先在 C 层求交集，只对交集中的文档打分
+        keys = [
+            group[0][0].keys() if len(group) == 1 else set().union(*(p for p, _ in group))
+            for group in weighted
+        ]
+        keys.sort(key=len)
+        candidates: Set[int] = set(keys[0])
+        for other in keys[1:]:
+            candidates &= other
+
+        scored: List[Tuple[float, int, int]] = []
+        for doc_id in candidates:
+            event = documents[doc_id]
+            if selected is not None and event.get("calendar") not in selected:
+                continue
+            # 二字切分可能误配，较长的中文短语需要原样出现
+            if phrases and any(phrase not in self._texts[doc_id] for phrase in phrases):
+                continue
+            score = 0.0
+            for group in weighted:
+                score += max(
+                    postings[doc_id] * idf for postings, idf in group if doc_id in postings
+                )
+            scored.append((score, event.get("dtstart_epoch") or 0, doc_id))
+
+        top = sorted(scored, reverse=True) if limit is None else heapq.nlargest(limit, scored)
+        return [self._result(doc_id, score) for score, _, doc_id in top], len(scored)
+
+    def _search_group(
+        self,
+        group: List[str],
+        limit: Optional[int],
+        selected: Optional[Set[str]],
+        phrases: List[str],
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        只有一组词（单个词或一个前缀）：按 idf × 词频分量降序归并各词的
+        有序倒排表，凑满 limit 即停
+
+        较长的中文短语去重后可能只剩一个二字词（如"哈哈哈"），同样需要原样出现
+        """
+        documents = self._documents
+
+        def keep(doc_id: int) -> bool:
+            if selected is not None and documents[doc_id].get("calendar") not in selected:
+                return False
+            return not phrases or all(phrase in self._texts[doc_id] for phrase in phrases)
+        runs = []
+        for term in group:
+            idf = self._idf(term)
+            runs.append(
+                (-impact * idf, -start, doc_id)
+                for impact, start, doc_id in self._ranked_postings(term)
+            )
+        results = []
+        seen: Set[int] = set()
+        for negative_score, _, doc_id in heapq.merge(*runs):
+            if limit is not None and len(results) == limit:
+                break
+            # 同一文档命中多个前缀展开词时取最高分
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            if keep(doc_id):
+                results.append(self._result(doc_id, -negative_score))
+
+        matched = (
+            self._postings[group[0]].keys()
+            if len(group) == 1
+            else set().union(*(self._postings[term] for term in group))
+        )
+        if selected is None and not phrases:
+            total = len(matched)
+        else:
+            total = sum(1 for doc_id in matched if keep(doc_id))
+        return results, total
+
+
+_search_index: Optional[SearchIndex] = None
+
+
+def get_search_index() -> SearchIndex:
+    """获取检索索引实例（单例），创建时订阅同步存储"""
+    global _search_index
+    if _search_index is None:
+        _search_index = SearchIndex()
+        get_sync_store().subscribe(_search_index.update)
+    return _search_index
@@ -0,0 +1,139 @@
+"""
+空闲时段计算
+
+忙碌区间以 epoch 秒编码为 int64 数组，合并、求补和求交都是向量化运算：
+合并时按开始时间排序，用累计最大结束时间找出相互重叠的段；
+求交时把各区间集合的端点按 +1/-1 累加，覆盖数等于集合数的段即为交集。
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta, tzinfo
+from typing import FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..icalendar.timezones import default_timezone
+
+# (开始时间数组, 结束时间数组)，按开始时间排序且互不重叠
+Intervals = Tuple[np.ndarray, np.ndarray]
+
+# 建议时段的开始时间对齐到 15 分钟
+DEFAULT_GRANULARITY = 15 * 60
+
+
+def as_intervals(pairs: Iterable[Tuple[int, int]]) -> Intervals:
+    """[(开始, 结束), ...] 转为数组（不排序、不合并）"""
+    flat = np.fromiter((value for pair in pairs for value in pair), dtype=np.int64)
+    return flat[0::2], flat[1::2]
+
+
+def merge(starts: np.ndarray, ends: np.ndarray) -> Intervals:
+    """合并重叠或相接的区间"""
+    keep = ends > starts
+    starts, ends = starts[keep], ends[keep]
+    if not len(starts):
+        return starts, ends
+    order = np.argsort(starts, kind="stable")
+    starts = starts[order]
+    reach = np.maximum.accumulate(ends[order])
+    # 开始时间晚于此前所有区间的最大结束时间，即为新的一段
+    first = np.empty(len(starts), dtype=bool)
+    first[0] = True
+    first[1:] = starts[1:] > reach[:-1]
+    heads = np.flatnonzero(first)
+    tails = np.append(heads[1:] - 1, len(starts) - 1)
+    return starts[heads], reach[tails]
+
+
+def complement(intervals: Intervals, window_start: int, window_end: int) -> Intervals:
+    """窗口内未被区间覆盖的部分，intervals 需已合并"""
+    starts, ends = intervals
+    starts = np.clip(starts, window_start, window_end)
+    ends = np.clip(ends, window_start, window_end)
+    gap_starts = np.concatenate(([window_start], ends))
+    gap_ends = np.concatenate((starts, [window_end]))
+    keep = gap_ends > gap_starts
+    return gap_starts[keep], gap_ends[keep]
+
+
+def intersect(*sets: Intervals) -> Intervals:
+    """多个已合并区间集合的交集"""
+    points = np.concatenate([part for starts, ends in sets for part in (starts, ends)])
+    deltas = np.concatenate(
+        [
+            part
+            for starts, ends in sets
+            for part in (np.ones(len(starts), np.int64), -np.ones(len(ends), np.int64))
+        ]
+    )
+    if not len(points):
+        return points, points
+    # 同一时刻先结束再开始，相接的区间不会被误算为覆盖
+    order = np.lexsort((deltas, points))
+    points = points[order]
+    coverage = np.cumsum(deltas[order])
+    inside = coverage[:-1] == len(sets)
+    return merge(points[:-1][inside], points[1:][inside])
+
+
+@dataclass(frozen=True)
+class WorkingHours:
+    """工作时间：每个工作日（ISO 星期 1-7）的 [start, end)"""
+
+    start: time = time(9)
+    end: time = time(18)
+    weekdays: FrozenSet[int] = frozenset(range(1, 6))
+    timezone: Optional[tzinfo] = field(default=None, compare=False)
+
+    def intervals(self, window_start: int, window_end: int) -> Intervals:
+        """窗口内的工作时间区间，按各自日期换算时区偏移（跨夏令时也正确），裁剪到窗口内"""
+        tz = self.timezone or default_timezone()
+        day = datetime.fromtimestamp(window_start, tz).date()
+        last = datetime.fromtimestamp(window_end, tz).date()
+        pairs = []
+        while day <= last:
+            if day.isoweekday() in self.weekdays:
+                pairs.append(
+                    (
+                        int(datetime.combine(day, self.start, tz).timestamp()),
+                        int(datetime.combine(day, self.end, tz).timestamp()),
+                    )
+                )
+            day += timedelta(days=1)
+        starts, ends = as_intervals(pairs)
+        return merge(
+            np.clip(starts, window_start, window_end), np.clip(ends, window_start, window_end)
+        )
+
+
+def find_free_slots(
+    busy: Sequence[Intervals],
+    window_start: int,
+    window_end: int,
+    duration: int,
+    working_hours: Optional[WorkingHours] = None,
+    granularity: int = DEFAULT_GRANULARITY,
+    limit: Optional[int] = None,
+) -> List[Tuple[int, int]]:
+    """
+    所有参与者都空闲、且能容纳 duration 秒的时段
+
+    busy 为每个参与者（或日历）的忙碌区间；返回 [(开始, 结束), ...]，
+    开始时间向后对齐到 granularity 秒，会议可安排在该时段内任意位置
+    """
+    if busy:
+        starts = np.concatenate([starts for starts, _ in busy])
+        ends = np.concatenate([ends for _, ends in busy])
+    else:
+        starts = ends = np.empty(0, dtype=np.int64)
+    free = complement(merge(starts, ends), window_start, window_end)
+    if working_hours is not None:
+        free = intersect(free, working_hours.intervals(window_start, window_end))
+    free_starts, free_ends = free
+    if granularity > 1:
+        free_starts = -(-free_starts // granularity) * granularity
+    fits = free_ends - free_starts >= duration
+    free_starts, free_ends = free_starts[fits], free_ends[fits]
+    if limit is not None:
+        free_starts, free_ends = free_starts[:limit], free_ends[:limit]
+    return list(zip(free_starts.tolist(), free_ends.tolist()))
@@ -0,0 +1,230 @@
+"""
+列式事件快照
+
+把同步存储中的事件（重复事件展开为实例）保存为并行数组：开始/结束纪元秒、
+全天标记、日历编号（日历名称驻留为整数）和状态码。时间窗口、日历和状态
+过滤都是数组上的布尔掩码，排序和计数也不再逐个访问事件字典。
+快照订阅同步存储：对象变化时只重新展开该对象并生成该对象的各列，
+变化后首次查询时把各对象的列拼接为整体。重复事件只展开到一个有限范围，
+查询窗口超出该范围或默认范围随日期前移时，重新展开含重复事件的对象。
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..caldav.sync import get_sync_store
+from ..icalendar.recurrence import (
+    covering_horizon,
+    default_horizon,
+    expand_object,
+    occurrence,
+)
+
+# STATUS 属性 -> 状态码，未设置或无法识别为 0
+STATUS_CODES = {"TENTATIVE": 1, "CONFIRMED": 2, "CANCELLED": 3}
+
+
+def status_code(status: Optional[str]) -> int:
+    return STATUS_CODES.get((status or "").upper(), 0)
+
+
+@dataclass
+class _Segment:
+    """单个对象展开后的实例，row 为实例所属事件在 events 中的下标"""
+
+    calendar: int
+    recurring: bool
+    events: List[Dict[str, Any]]
+    start: np.ndarray
+    end: np.ndarray
+    row: np.ndarray
+    all_day: np.ndarray
+    status: np.ndarray
+
+
+class EventSnapshot:
+    """事件实例的列式快照"""
+
+    def __init__(self, horizon: Optional[Tuple[int, int]] = None):
+        # 重复事件展开的基础范围（不重复的事件不受限制），未指定时按配置相对当前时间计算
+        self._fixed_horizon = horizon
+        # 各对象当前实际展开的范围
+        self._horizon: Optional[Tuple[int, int]] = None
+        self._segments: Dict[str, _Segment] = {}
+        self._calendar_ids: Dict[str, int] = {}
+        self._calendar_names: List[str] = []
+        self._columns: Optional[Dict[str, np.ndarray]] = None
+        self._events: List[Dict[str, Any]] = []
+        # 每次变化加一，供依赖快照的缓存判断是否失效
+        self.version = 0
+
+    @property
+    def horizon(self) -> Tuple[int, int]:
+        """重复事件当前的展开范围"""
+        if self._horizon is None:
+            self._horizon = self._fixed_horizon or default_horizon()
+        return self._horizon
+
+    def cover(self, start: Optional[int] = None, end: Optional[int] = None) -> None:
+        """确保重复事件已展开到基础范围和查询窗口 [start, end)，否则重新展开"""
+        horizon = covering_horizon(
+            self.horizon, self._fixed_horizon or default_horizon(), start, end
+        )
+        if horizon is None:
+            return
+        self._horizon = horizon
+        stale = [url for url, segment in self._segments.items() if segment.recurring]
+        for url in stale:
+            self._segments[url] = self._expand(self._segments[url].events)
+        if stale:
+            self._columns = None
+            self.version += 1
+
+    def calendar_id(self, name: Optional[str]) -> int:
+        """日历名称驻留为整数编号"""
+        key = name or ""
+        calendar = self._calendar_ids.get(key)
+        if calendar is None:
+            calendar = self._calendar_ids[key] = len(self._calendar_names)
+            self._calendar_names.append(key)
+        return calendar
+
+    def calendar_name(self, calendar: int) -> str:
+        return self._calendar_names[calendar]
+
+    def update(self, url: str, events: List[Dict[str, Any]]) -> None:
+        """重新展开对象的事件，events 为空表示删除（同步存储的订阅者）"""
+        removed = self._segments.pop(url, None)
+        if events:
+            self._segments[url] = self._expand(events)
+        if removed is not None or events:
+            self._columns = None
+            self.version += 1
+
+    def _expand(self, events: List[Dict[str, Any]]) -> _Segment:
+        expanded = expand_object(events, *self.horizon)
+        rows = [row for row, _, _ in expanded]
+        row_array = np.array(rows, dtype=np.int32)
+        all_day = np.array([bool(e.get("all_day")) for e in events], dtype=bool)
+        status = np.array([status_code(e.get("status")) for e in events], dtype=np.int8)
+        return _Segment(
+            calendar=self.calendar_id(events[0].get("calendar")),
+            recurring=any(e.get("recurrence") for e in events),
+            events=events,
+            start=np.array([start for _, start, _ in expanded], dtype=np.int64),
+            end=np.array([end for _, _, end in expanded], dtype=np.int64),
+            row=row_array,
+            all_day=all_day[row_array],
+            status=status[row_array],
+        )
+
+    def _build(self) -> Dict[str, np.ndarray]:
+        columns = self._columns
+        if columns is not None:
+            return columns
+        segments = list(self._segments.values())
+        events: List[Dict[str, Any]] = []
+        offsets = []
+        for segment in segments:
+            offsets.append(len(events))
+            events.extend(segment.events)
+        if segments:
+            row = np.concatenate([s.row + offset for s, offset in zip(segments, offsets)])
+            columns = {
+                "start": np.concatenate([s.start for s in segments]),
+                "end": np.concatenate([s.end for s in segments]),
+                "row": row,
+                "calendar": np.concatenate(
+                    [np.full(len(s.start), s.calendar, dtype=np.int32) for s in segments]
+                ),
+                "all_day": np.concatenate([s.all_day for s in segments]),
+                "status": np.concatenate([s.status for s in segments]),
+            }
+        else:
+            columns = {
+                "start": np.empty(0, dtype=np.int64),
+                "end": np.empty(0, dtype=np.int64),
+                "row": np.empty(0, dtype=np.int32),
+                "calendar": np.empty(0, dtype=np.int32),
+                "all_day": np.empty(0, dtype=bool),
+                "status": np.empty(0, dtype=np.int8),
+            }
+        self._events = events
+        self._columns = columns
+        return columns
+
+    def __len__(self) -> int:
+        return len(self._build()["start"])
+
+    def column(self, name: str) -> np.ndarray:
+        """start、end、all_day、calendar（编号）、status（状态码）或 row"""
+        return self._build()[name]
+
+    def mask(
+        self,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        calendars: Optional[Iterable[str]] = None,
+        statuses: Optional[Iterable[Optional[str]]] = None,
+        all_day: Optional[bool] = None,
+    ) -> np.ndarray:
+        """
+        满足条件的实例掩码
+
+        时间窗口 [start, end) 内有交集的实例（零时长实例在窗口内即可），
+        calendars 为日历名称，statuses 为 STATUS 值（None 表示未设置）；
+        窗口超出重复事件的展开范围时先重新展开
+        """
+        self.cover(start, end)
+        columns = self._build()
+        selected = np.ones(len(columns["start"]), dtype=bool)
+        if end is not None:
+            selected &= columns["start"] < end
+        if start is not None:
+            selected &= (columns["end"] > start) | (
+                (columns["start"] == columns["end"]) & (columns["start"] >= start)
+            )
+        if calendars is not None:
+            ids = [self._calendar_ids[name] for name in calendars if name in self._calendar_ids]
+            selected &= np.isin(columns["calendar"], ids)
+        if statuses is not None:
+            selected &= np.isin(columns["status"], [status_code(s) for s in statuses])
+        if all_day is not None:
+            selected &= columns["all_day"] == all_day
+        return selected
+
+    def select(self, mask: np.ndarray, limit: Optional[int] = None) -> np.ndarray:
+        """掩码选中的实例下标，按开始时间（相同时按结束时间）排序"""
+        columns = self._build()
+        indices = np.flatnonzero(mask)
+        order = np.lexsort((columns["end"][indices], columns["start"][indices]))
+        indices = indices[order]
+        return indices if limit is None else indices[:limit]
+
+    def intervals(self, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """掩码选中实例的 (开始, 结束) 数组"""
+        columns = self._build()
+        return columns["start"][mask], columns["end"][mask]
+
+    def occurrence(self, index: int) -> Dict[str, Any]:
+        """实例对应的事件字典，重复事件的实例替换为该次的时间和 RECURRENCE-ID"""
+        columns = self._build()
+        event = self._events[columns["row"][index]]
+        return occurrence(event, int(columns["start"][index]), int(columns["end"][index]))
+
+    def occurrences(self, indices: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self.occurrence(index) for index in indices]
+
+
+_event_snapshot: Optional[EventSnapshot] = None
+
+
+def get_event_snapshot() -> EventSnapshot:
+    """获取事件快照实例（单例），创建时订阅同步存储"""
+    global _event_snapshot
+    if _event_snapshot is None:
+        _event_snapshot = EventSnapshot()
+        get_sync_store().subscribe(_event_snapshot.update)
+    return _event_snapshot
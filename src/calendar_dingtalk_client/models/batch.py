@@ -0,0 +1,40 @@
+"""
+批量操作请求模型
+"""
+
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+# 写操作并发数上限
+MAX_CONCURRENCY = 32
+
+BatchOp = Literal[
+    "get_event",
+    "create_event",
+    "update_event",
+    "delete_event",
+    "get_todo",
+    "create_todo",
+    "update_todo",
+    "delete_todo",
+]
+
+
+class BatchOperation(BaseModel):
+    """单个操作"""
+
+    id: Optional[str] = Field(None, description="调用方自定义的操作标识，原样返回")
+    op: BatchOp
+    uid: Optional[str] = Field(None, description="事件/待办 UID（创建时可选）")
+    params: Dict[str, Any] = Field(default_factory=dict, description="与单个接口相同的参数")
+    if_match: Optional[str] = None
+
+
+class BatchRequest(BaseModel):
+    """批量请求：各操作相互独立，不保证执行顺序"""
+
+    operations: List[BatchOperation] = Field(..., min_length=1)
+    concurrency: Optional[int] = Field(
+        None, ge=1, le=MAX_CONCURRENCY, description="并发上限，默认 BATCH_CONCURRENCY"
+    )
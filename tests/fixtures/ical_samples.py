@@ -0,0 +1,35 @@
+"""
+iCalendar 测试样例
+"""
+
+# 带 VTIMEZONE、重复实例覆盖和待办的日历对象
+RECURRING = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "PRODID:-//Test//CN\r\n"
+    "BEGIN:VTIMEZONE\r\n"
+    "TZID:Asia/Shanghai\r\n"
+    "BEGIN:STANDARD\r\n"
+    "DTSTART:19700101T000000\r\n"
+    "TZOFFSETFROM:+0800\r\n"
+    "TZOFFSETTO:+0800\r\n"
+    "END:STANDARD\r\n"
+    "END:VTIMEZONE\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:evt-1\r\n"
+    "SUMMARY:周会\r\n"
+    "DTSTART;TZID=Asia/Shanghai:20240105T100000\r\n"
+    "RRULE:FREQ=WEEKLY\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:evt-1\r\n"
+    "RECURRENCE-ID;TZID=Asia/Shanghai:20240112T100000\r\n"
+    "SUMMARY:周会（改期）\r\n"
+    "DTSTART:20240112T060000Z\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VTODO\r\n"
+    "UID:todo-1\r\n"
+    "SUMMARY:写周报\r\n"
+    "END:VTODO\r\n"
+    "END:VCALENDAR\r\n"
+)
@@ -0,0 +1,104 @@
+"""
+批量接口测试
+"""
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from lxml import etree
+
+from calendar_dingtalk_client import http_server
+from calendar_dingtalk_client.caldav.client import CalDAVClient
+from tests.fixtures.ical_samples import RECURRING
+from tests.unit.test_caldav.test_client import multistatus
+
+NS = {"D": "DAV:", "C": "urn:ietf:params:xml:ns:caldav"}
+BASE = "https://calendar.example.com/dav/u1"
+
+
+@pytest.fixture
+def api(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.method == "REPORT":
+            hrefs = [h.text for h in etree.fromstring(request.content).findall("D:href", NS)]
+            # 只有 primary 日历里有 evt-1
+            objects = [(h, "e1", RECURRING) for h in hrefs if h == "/dav/u1/primary/evt-1.ics"]
+            return httpx.Response(207, text=multistatus(*objects))
+        if request.method == "PUT":
+            return httpx.Response(201)
+        return httpx.Response(404)
+
+    client = CalDAVClient(BASE, "user", "pass")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_server, "_caldav_client", client)
+    monkeypatch.setattr(
+        http_server,
+        "_calendars_cache",
+        [
+            {"name": "primary", "displayname": "主日历", "url": f"{BASE}/primary/"},
+            {"name": "work", "displayname": "工作", "url": f"{BASE}/work/"},
+        ],
+    )
+    return TestClient(http_server.app), requests
+
+
+def test_batch_groups_reads_into_multiget(api):
+    client, requests = api
+    response = client.post(
+        "/api/batch",
+        json={
+            "operations": [
+                {"id": "a", "op": "get_event", "uid": "evt-1", "params": {"fields": "uid,summary"}},
+                {"id": "b", "op": "get_event", "uid": "missing"},
+                {"id": "c", "op": "create_todo", "uid": "todo-9", "params": {"summary": "写周报"}},
+                {"id": "d", "op": "create_event", "params": {"summary": "缺少时间"}},
+                {"id": "e", "op": "delete_event"},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    results = {r["id"]: r for r in response.json()["results"]}
+    assert results["a"]["status"] == 200
+    assert results["a"]["body"] == {"event": {"uid": "evt-1", "summary": "周会"}}
+    assert results["b"]["status"] == 404
+    assert results["c"]["status"] == 201
+    assert results["d"]["status"] == 400
+    assert results["e"]["status"] == 400
+    assert response.json()["succeeded"] == 2
+
+    # 两个读操作合并为每个日历一次 multiget
+    reports = [r for r in requests if r.method == "REPORT"]
+    assert len(reports) == 2
+    assert all(b"calendar-multiget" in r.content for r in reports)
+
+
+def test_batch_rejects_oversized_requests(api, monkeypatch):
+    client, _ = api
+    monkeypatch.setenv("BATCH_MAX_OPERATIONS", "1")
+    operations = [{"op": "get_event", "uid": "evt-1"}] * 2
+    assert client.post("/api/batch", json={"operations": operations}).status_code == 413
+
+
+def test_batch_limits_concurrency(api):
+    client, _ = api
+    operations = [{"op": "get_event", "uid": "evt-1"}]
+    response = client.post("/api/batch", json={"operations": operations, "concurrency": 10**6})
+    assert response.status_code == 422
+
+
+def test_batch_reports_invalid_values_as_client_errors(api, monkeypatch):
+    client, _ = api
+    params = {"summary": "周会", "dtstart": "garbage", "dtend": "2024-01-01T10:00:00Z"}
+    operations = [{"id": "a", "op": "create_event", "params": params}]
+    results = client.post("/api/batch", json={"operations": operations}).json()["results"]
+    assert results[0]["status"] == 400
+
+    def build_todo(todo):
+        raise ValueError("priority must be between 0 and 9")
+
+    monkeypatch.setattr(http_server, "build_todo", build_todo)
+    operations = [{"id": "b", "op": "create_todo", "params": {"summary": "写周报", "priority": 99}}]
+    results = client.post("/api/batch", json={"operations": operations}).json()["results"]
+    assert (results[0]["status"], results[0]["error"]) == (400, "priority must be between 0 and 9")
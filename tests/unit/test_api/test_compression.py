@@ -0,0 +1,88 @@
+"""
+响应压缩与 MessagePack 测试
+"""
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from calendar_dingtalk_client.api import responses
+from calendar_dingtalk_client.api.compression import (
+    CompressionMiddleware,
+    available_encodings,
+    negotiate_encoding,
+)
+from calendar_dingtalk_client.api.responses import FragmentCache, list_response
+
+PAYLOAD = json.dumps([{"uid": f"evt-{i}", "summary": "周会"} for i in range(200)]).encode()
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/big")
+    async def big():
+        return Response(PAYLOAD, media_type="application/json", headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    async def small():
+        return Response(b"{}", media_type="application/json")
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(3):
+                yield f'{{"i":{i}}}\n'.encode()
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+def test_negotiate_encoding():
+    supported = ["zstd", "br", "gzip"]
+    assert negotiate_encoding("gzip, deflate", supported) == "gzip"
+    assert negotiate_encoding("gzip, br", supported) == "br"
+    assert negotiate_encoding("gzip;q=1, br;q=0.5", supported) == "gzip"
+    assert negotiate_encoding("*", supported) == "zstd"
+    assert negotiate_encoding("gzip;q=0", supported) is None
+    assert negotiate_encoding("identity", supported) is None
+    assert negotiate_encoding(None, supported) is None
+
+
+@pytest.mark.parametrize("encoding", list(available_encodings()))
+def test_large_responses_are_compressed(client, encoding):
+    response = client.get("/big", headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert int(response.headers["content-length"]) < len(PAYLOAD)
+    assert response.content == PAYLOAD
+    assert response.headers["etag"] == 'W/"v1"'
+    assert "Accept-Encoding" in response.headers["vary"]
+
+
+def test_small_responses_are_not_compressed(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == b"{}"
+
+
+def test_streaming_responses_are_compressed(client):
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text.splitlines() == ['{"i":0}', '{"i":1}', '{"i":2}']
+
+
+def test_msgpack_list_response_matches_json(monkeypatch):
+    msgpack = pytest.importorskip("msgpack")
+    monkeypatch.setattr(responses, "_fragment_cache", FragmentCache())
+    items = [{"url": "/a.ics", "etag": "1", "uid": "a", "summary": "周会"}]
+    as_json = json.loads(list_response("events", items, next_cursor=None).body)
+    packed = list_response("events", items, fmt="msgpack", next_cursor=None)
+    assert packed.media_type == "application/msgpack"
+    assert msgpack.unpackb(packed.body) == as_json
+    assert responses.response_format("application/msgpack") == "msgpack"
+    assert responses.response_format("application/json") == "json"
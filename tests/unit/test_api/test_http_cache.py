@@ -0,0 +1,110 @@
+"""
+HTTP 条件请求测试
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from calendar_dingtalk_client import http_server
+from calendar_dingtalk_client.api.http_cache import etag_matches, objects_etag, strong_etag
+from calendar_dingtalk_client.caldav.client import CalDAVClient
+from tests.fixtures.ical_samples import RECURRING
+from tests.unit.test_caldav.test_client import multistatus
+
+NDJSON = "application/x-ndjson"
+
+CTAG = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<D:multistatus xmlns:D="DAV:" xmlns:CS="http://calendarserver.org/ns/">'
+    "<D:response><D:href>/dav/u1/primary/</D:href><D:propstat><D:prop>"
+    "<CS:getctag>{ctag}</CS:getctag>"
+    "</D:prop><D:status>HTTP/1.1 200 OK</D:status></D:propstat></D:response>"
+    "</D:multistatus>"
+)
+
+
+def test_strong_etag_is_stable_and_quoted():
+    assert strong_etag("a", 1) == strong_etag("a", 1)
+    assert strong_etag("a", 1) != strong_etag("a", 2)
+    assert strong_etag("a").startswith('"')
+
+
+def test_etag_matches():
+    assert etag_matches('"x"', '"x"')
+    assert etag_matches('"y", W/"x"', '"x"')
+    assert etag_matches("*", '"x"')
+    assert not etag_matches('"y"', '"x"')
+    assert not etag_matches(None, '"x"')
+    assert not etag_matches('"x"', None)
+
+
+def test_objects_etag_requires_every_etag():
+    items = [{"url": "/a.ics", "etag": "1"}, {"url": "/b.ics", "etag": "2"}]
+    assert objects_etag(items) == objects_etag(list(reversed(items)))
+    assert objects_etag(items + [{"url": "/c.ics", "etag": None}]) is None
+
+
+@pytest.fixture
+def api(monkeypatch):
+    state = {"ctag": "c1", "reports": 0, "log": []}
+
+    async def handler(request):
+        if request.method == "PROPFIND":
+            await asyncio.sleep(0.01)
+            state["log"].append("ctag")
+            return httpx.Response(207, text=CTAG.format(ctag=state["ctag"]))
+        state["log"].append("report")
+        state["reports"] += 1
+        return httpx.Response(
+            207, text=multistatus(("/dav/u1/primary/evt-1.ics", "e1", RECURRING))
+        )
+
+    client = CalDAVClient("https://calendar.example.com/dav/u1", "user", "pass")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_server, "_caldav_client", client)
+    monkeypatch.setattr(
+        http_server,
+        "_calendars_cache",
+        [{"name": "primary", "displayname": "主日历", "url": "https://calendar.example.com/dav/u1/primary/"}],
+    )
+    return TestClient(http_server.app), state
+
+
+def test_list_events_returns_304_until_ctag_changes(api):
+    client, state = api
+    first = client.get("/api/events")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    again = client.get("/api/events", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert state["reports"] == 1
+
+    # 不同查询参数使用不同的 ETag
+    assert client.get("/api/events?fields=uid", headers={"If-None-Match": etag}).status_code == 200
+
+    state["ctag"] = "c2"
+    changed = client.get("/api/events", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_unconditional_request_fetches_ctag_concurrently(api):
+    client, state = api
+    assert "ETag" in client.get("/api/events").headers
+    # 没有 If-None-Match 时不等待 ctag 再查询事件
+    assert state["log"] == ["report", "ctag"]
+
+    state["log"].clear()
+    assert "ETag" in client.get("/api/events", headers={"Accept": NDJSON}).headers
+    assert state["log"] == ["report", "ctag"]
+
+
+def test_calendars_conditional_get(api):
+    client, _ = api
+    etag = client.get("/api/calendars").headers["ETag"]
+    assert client.get("/api/calendars", headers={"If-None-Match": etag}).status_code == 304
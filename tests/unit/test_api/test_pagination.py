@@ -0,0 +1,109 @@
+"""
+游标分页测试
+"""
+import json
+from datetime import date
+
+import pytest
+
+from calendar_dingtalk_client.api.pagination import (
+    decode_cursor,
+    ndjson_lines,
+    event_sort_key,
+    iterate,
+    paginate_sorted,
+    todo_sort_key,
+    wants_ndjson,
+)
+
+
+def make_events(n):
+    return [{"uid": f"evt-{i}", "dtstart_epoch": 1000 - i, "recurrence_id": None} for i in range(n)]
+
+
+def walk(items, limit, key=event_sort_key):
+    """按排序键排好序后逐页取完，返回各页的 UID"""
+    items = sorted(items, key=key)
+    pages = []
+    cursor = None
+    while True:
+        page, cursor = paginate_sorted(items, limit=limit, cursor=cursor, key=key)
+        pages.append([item["uid"] for item in page])
+        if cursor is None:
+            return pages
+
+
+def test_paginate_walks_all_pages_in_start_order():
+    assert walk(make_events(7), 3) == [
+        ["evt-6", "evt-5", "evt-4"],
+        ["evt-3", "evt-2", "evt-1"],
+        ["evt-0"],
+    ]
+
+
+def test_paginate_without_limit_returns_everything():
+    page, cursor = paginate_sorted(make_events(4))
+    assert len(page) == 4
+    assert cursor is None
+
+
+def test_paginate_ties_broken_by_uid():
+    events = [{"uid": uid, "dtstart_epoch": 5} for uid in ("c", "a", "b")]
+    assert walk(events, 2) == [["a", "b"], ["c"]]
+
+
+def test_paginate_keeps_copies_with_the_same_key():
+    # 同一邀请在两个日历中各有一份，没有 UID 的事件同时开始
+    events = [
+        {"uid": "a", "dtstart_epoch": 5, "url": "/work/a.ics"},
+        {"uid": "a", "dtstart_epoch": 5, "url": "/home/a.ics"},
+        {"uid": None, "dtstart_epoch": 7, "url": "/work/x.ics"},
+        {"uid": None, "dtstart_epoch": 7, "url": "/work/y.ics"},
+    ]
+    items = sorted(events, key=event_sort_key)
+    urls = []
+    cursor = None
+    for _ in items:
+        page, cursor = paginate_sorted(items, limit=1, cursor=cursor)
+        urls.extend(event["url"] for event in page)
+    assert urls == ["/home/a.ics", "/work/a.ics", "/work/x.ics", "/work/y.ics"]
+    assert cursor is None
+
+
+def test_invalid_cursor_raises():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_todo_sort_key_puts_undated_first():
+    todos = [{"uid": "b", "due": date(2024, 1, 2)}, {"uid": "a", "due": None}]
+    assert walk(todos, 1, key=todo_sort_key) == [["a"], ["b"]]
+
+
+def test_wants_ndjson():
+    assert wants_ndjson("application/x-ndjson")
+    assert not wants_ndjson("application/json")
+    assert not wants_ndjson(None)
+
+
+@pytest.mark.asyncio
+async def test_ndjson_lines():
+    lines = [line async for line in ndjson_lines(iterate([{"uid": "会议"}, {"due": date(2024, 1, 2)}]))]
+    assert [json.loads(line) for line in lines] == [{"uid": "会议"}, {"due": "2024-01-02"}]
+    assert all(line.endswith(b"\n") for line in lines)
+
+
+def test_paginate_sorted_consumes_lazily():
+    consumed = []
+
+    def events():
+        for i in range(100):
+            consumed.append(i)
+            yield {"uid": f"evt-{i:03d}", "dtstart_epoch": i}
+
+    page, cursor = paginate_sorted(events(), limit=2)
+    assert [e["dtstart_epoch"] for e in page] == [0, 1]
+    assert len(consumed) == 3
+
+    page, cursor = paginate_sorted(events(), limit=2, cursor=cursor)
+    assert [e["dtstart_epoch"] for e in page] == [2, 3]
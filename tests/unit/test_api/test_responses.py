@@ -0,0 +1,81 @@
+"""
+JSON 片段缓存测试
+"""
+import json
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict
+
+from calendar_dingtalk_client.api import responses
+from calendar_dingtalk_client.api.responses import FragmentCache, dumps
+
+EVENT = {
+    "url": "https://calendar.example.com/dav/u1/primary/evt-1.ics",
+    "etag": "e1",
+    "uid": "evt-1",
+    "summary": "周会",
+    "recurrence_id": None,
+    "description": "长描述",
+}
+
+
+def test_dumps_matches_stdlib_output(monkeypatch):
+    value = {"summary": "周会", "due": datetime(2024, 1, 2, 3, 4, tzinfo=timezone.utc), "day": date(2024, 1, 2)}
+    encoded = dumps(value)
+    monkeypatch.setattr(responses, "orjson", None)
+    assert dumps(value) == encoded
+    assert json.loads(encoded) == {"summary": "周会", "due": "2024-01-02T03:04:00Z", "day": "2024-01-02"}
+
+
+def test_dumps_keeps_fastapi_datetime_format():
+    """直接返回日期时间的接口与 FastAPI 默认序列化一致（UTC 为 Z，其余带偏移）"""
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    shanghai = timezone(timedelta(hours=8))
+    value = {
+        "dtstart": datetime(2024, 1, 1, 10, tzinfo=timezone.utc),
+        "dtend": datetime(2024, 1, 1, 18, tzinfo=shanghai),
+        "floating": datetime(2024, 1, 1, 10),
+        "day": date(2024, 1, 1),
+    }
+    assert dumps(value) == TypeAdapter(Dict[str, Any]).dump_json(value)
+    assert json.loads(dumps(value))["dtstart"] == "2024-01-01T10:00:00Z"
+    assert json.loads(dumps(value))["dtend"] == jsonable_encoder(value)["dtend"]
+
+
+def test_fragment_cache_reuses_encoding_until_etag_changes():
+    cache = FragmentCache()
+    first = cache.encode(EVENT)
+    assert cache.encode(dict(EVENT)) is first
+    assert cache.hits == 1
+
+    changed = dict(EVENT, etag="e2", summary="周会（改）")
+    assert json.loads(cache.encode(changed))["summary"] == "周会（改）"
+    assert cache.misses == 2
+
+
+def test_fragment_cache_keys_on_fields():
+    cache = FragmentCache()
+    full = json.loads(cache.encode(EVENT))
+    sparse = json.loads(cache.encode(EVENT, frozenset({"uid"})))
+    assert "description" in full
+    assert sparse == {"uid": "evt-1"}
+
+
+def test_fragment_cache_evicts_least_recently_used():
+    cache = FragmentCache(max_entries=2)
+    for i in range(3):
+        cache.encode(dict(EVENT, url=f"/e{i}.ics"))
+    assert len(cache) == 2
+
+
+def test_items_without_etag_are_not_cached():
+    cache = FragmentCache()
+    cache.encode(dict(EVENT, etag=None))
+    assert len(cache) == 0
+
+
+def test_list_response_body(monkeypatch):
+    monkeypatch.setattr(responses, "_fragment_cache", FragmentCache())
+    response = responses.list_response("events", [EVENT], frozenset({"uid"}), next_cursor=None)
+    assert json.loads(response.body) == {"events": [{"uid": "evt-1"}], "count": 1, "next_cursor": None}
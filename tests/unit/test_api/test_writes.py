@@ -0,0 +1,120 @@
+"""
+写接口测试
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from calendar_dingtalk_client import http_server
+from calendar_dingtalk_client.caldav.client import CalDAVClient
+from calendar_dingtalk_client.caldav.sync import SyncStore
+from tests.fixtures.ical_samples import RECURRING
+from tests.unit.test_caldav.test_client import TODO
+
+BASE = "https://calendar.example.com/dav/u1"
+
+
+@pytest.fixture
+def api(monkeypatch):
+    # 写请求的响应状态码，由各测试设置
+    server = {"status": 204}
+
+    def handler(request):
+        # 示例对象同时包含 evt-1 和 todo-1
+        if request.method == "GET" and request.url.path.endswith(("/evt-1.ics", "/todo-1.ics")):
+            return httpx.Response(200, text=RECURRING, headers={"ETag": '"e1"'})
+        if request.method == "GET" and request.url.path.endswith("/todo-2.ics"):
+            return httpx.Response(200, text=TODO, headers={"ETag": '"t2"'})
+        if request.headers.get("If-None-Match") == "*" and request.url.path.endswith("/evt-1.ics"):
+            return httpx.Response(412)
+        if request.method in ("PUT", "DELETE"):
+            return httpx.Response(server["status"], headers={"ETag": '"e2"'})
+        return httpx.Response(404)
+
+    client = CalDAVClient(BASE, "user", "pass")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_server, "_caldav_client", client)
+    monkeypatch.setattr(
+        http_server,
+        "_calendars_cache",
+        [{"name": "primary", "displayname": "主日历", "url": f"{BASE}/primary/"}],
+    )
+    return TestClient(http_server.app), server
+
+
+def test_successful_update_reports_new_etag(api):
+    client, _ = api
+    response = client.put("/api/events/evt-1", params={"summary": "周会（新）"})
+    assert response.status_code == 200
+    assert response.json()["changed"] is True
+    assert response.json()["etag"] == "e2"
+
+
+@pytest.mark.parametrize(
+    "method, path, params",
+    [
+        ("PUT", "/api/events/evt-1", {"summary": "周会（新）"}),
+        ("DELETE", "/api/events/evt-1", {}),
+        ("PUT", "/api/todos/todo-1", {"summary": "写月报"}),
+        ("DELETE", "/api/todos/todo-1", {}),
+    ],
+)
+def test_rejected_writes_are_reported(api, method, path, params):
+    client, server = api
+    server["status"] = 412
+    assert client.request(method, path, params=params).status_code == 412
+    server["status"] = 503
+    assert client.request(method, path, params=params).status_code == 502
+
+
+def test_create_does_not_overwrite_existing_objects(api):
+    client, _ = api
+    params = {"summary": "周会", "dtstart": "2024-01-05T10:00:00", "dtend": "2024-01-05T11:00:00"}
+    response = client.post("/api/events", params={**params, "uid": "evt-1"})
+    assert response.status_code == 412
+    assert "already exists" in response.json()["detail"]
+    assert client.post("/api/events", params={**params, "uid": "evt-9"}).status_code == 200
+
+
+def test_invalid_update_params_are_client_errors(api):
+    client, _ = api
+    response = client.put("/api/events/evt-1", params={"dtstart": "garbage"})
+    assert response.status_code == 400
+    assert client.put("/api/todos/todo-1", params={"due": "garbage"}).status_code == 400
+    # UID 对应的是待办而不是事件
+    response = client.put("/api/events/todo-2", params={"summary": "周会"})
+    assert response.status_code == 404
+
+
+class SyncedServer:
+    """已同步的服务器状态：primary 日历中只有 evt-1"""
+
+    async def get_ctag(self, calendar_url):
+        return "1"
+
+    async def get_etags(self, calendar_url):
+        return {f"{BASE}/primary/evt-1.ics": "e1"}
+
+    async def multiget(self, calendar_url, urls):
+        return [(url, "e1", RECURRING) for url in urls]
+
+
+def test_local_copy_changes_only_after_confirmed_writes(api, monkeypatch):
+    client, server = api
+    store = SyncStore()
+    asyncio.run(store.sync_calendar(SyncedServer(), {"name": "primary", "url": f"{BASE}/primary/"}))
+    monkeypatch.setattr(http_server, "get_sync_store", lambda: store)
+    summaries = lambda: sorted(e["summary"] for e in store.events())
+
+    server["status"] = 412
+    client.put("/api/events/evt-1", params={"summary": "周会（新）"})
+    client.delete("/api/events/evt-1")
+    assert summaries() == ["周会", "周会（改期）"]
+
+    server["status"] = 204
+    client.put("/api/events/evt-1", params={"summary": "周会（新）"})
+    assert "周会（新）" in summaries()
+    client.delete("/api/events/evt-1")
+    assert summaries() == []
@@ -0,0 +1,93 @@
+"""
+CALDAV 客户端响应解析测试
+"""
+import asyncio
+from xml.sax.saxutils import escape
+
+import httpx
+
+from calendar_dingtalk_client.caldav.client import CalDAVClient
+from tests.fixtures.ical_samples import RECURRING
+
+
+def multistatus(*responses):
+    """构造 REPORT multistatus 响应"""
+    body = "".join(
+        "<D:response>"
+        f"<D:href>{href}</D:href>"
+        "<D:propstat><D:prop>"
+        f'<D:getetag>"{etag}"</D:getetag>'
+        f"<C:calendar-data>{escape(data)}</C:calendar-data>"
+        "</D:prop><D:status>HTTP/1.1 200 OK</D:status></D:propstat>"
+        "</D:response>"
+        for href, etag, data in responses
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<D:multistatus xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">'
+        f"{body}</D:multistatus>"
+    )
+
+
+def test_parse_report_returns_every_component():
+    """测试同一资源中的主事件和覆盖实例都被返回"""
+    client = CalDAVClient("https://calendar.example.com/dav/u1", "user", "pass")
+    xml = multistatus(("/dav/u1/primary/evt-1.ics", "e1", RECURRING))
+    events = asyncio.run(client._parse_events_from_report(xml, "/dav/u1/primary/"))
+
+    assert [e["summary"] for e in events] == ["周会", "周会（改期）"]
+    assert events[0]["recurrence_id"] is None
+    assert events[1]["recurrence_id"] == "2024-01-12 10:00:00+08:00"
+    assert {e["url"] for e in events} == {
+        "https://calendar.example.com/dav/u1/primary/evt-1.ics"
+    }
+    assert {e["etag"] for e in events} == {"e1"}
+    # 2024-01-05 10:00 +08:00 / 2024-01-12 06:00 UTC
+    assert events[0]["dtstart_epoch"] == 1704420000
+    assert events[1]["dtstart_epoch"] == 1705039200
+
+
+TODO = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "BEGIN:VTODO\r\n"
+    "UID:todo-2\r\n"
+    "SUMMARY:提交报销\r\n"
+    "STATUS:COMPLETED\r\n"
+    "DUE:20240110T100000Z\r\n"
+    "PRIORITY:1\r\n"
+    "COMPLETED:20240109T080000Z\r\n"
+    "PERCENT-COMPLETE:100\r\n"
+    "END:VTODO\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def test_get_todos_parses_report_in_one_request():
+    """测试待办字段直接从 VTODO REPORT 解析，只发一次请求"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(
+            207,
+            text=multistatus(
+                ("/dav/u1/primary/todo-1.ics", "t1", RECURRING),
+                ("/dav/u1/primary/todo-2.ics", "t2", TODO),
+            ),
+        )
+
+    client = CalDAVClient("https://calendar.example.com/dav/u1", "user", "pass")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    todos = asyncio.run(client.get_todos("https://calendar.example.com/dav/u1/primary/"))
+
+    assert [r.method for r in requests] == ["REPORT"]
+    assert b'name="VTODO"' in requests[0].content
+    assert [t["uid"] for t in todos] == ["todo-1", "todo-2"]
+    assert todos[0]["status"] == "NEEDS-ACTION"
+    assert todos[1]["status"] == "COMPLETED"
+    assert todos[1]["priority"] == 1
+    assert todos[1]["percent_complete"] == 100
+    assert todos[1]["completed"] == "2024-01-09 08:00:00+00:00"
+    assert todos[1]["due_epoch"] == 1704880800
+    assert todos[1]["etag"] == "t2"
@@ -0,0 +1,92 @@
+"""
+流式导出测试
+"""
+import asyncio
+import csv
+import io
+import json
+
+import httpx
+from icalendar import Calendar
+
+from calendar_dingtalk_client.caldav.client import CalDAVClient
+from calendar_dingtalk_client.caldav.operations.export import (
+    export_csv,
+    export_ics,
+    export_ndjson,
+)
+from tests.fixtures.ical_samples import RECURRING
+from tests.unit.test_caldav.test_client import multistatus
+
+SINGLE = (
+    "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Test//CN\r\n"
+    "BEGIN:VEVENT\r\nUID:evt-2\r\nSUMMARY:评审, 第二轮\r\n"
+    "DTSTART:20240110T020000Z\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n"
+)
+
+
+def mock_client(body: str) -> CalDAVClient:
+    """返回使用模拟传输层的客户端，响应体分小块发送"""
+
+    async def chunks():
+        data = body.encode("utf-8")
+        for i in range(0, len(data), 50):
+            yield data[i : i + 50]
+
+    def handler(request):
+        assert request.method == "REPORT"
+        return httpx.Response(207, content=chunks())
+
+    client = CalDAVClient("https://calendar.example.com/dav/u1", "user", "pass")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+# 导出只关心 VEVENT，把样例中的 VTODO 换成不会被导出的 VJOURNAL
+RECURRING_EVENTS = RECURRING.replace("VTODO", "VJOURNAL")
+REPORT = multistatus(
+    ("/dav/u1/primary/evt-1.ics", "e1", RECURRING_EVENTS),
+    ("/dav/u1/primary/evt-2.ics", "e2", SINGLE),
+)
+
+
+async def collect(stream):
+    return "".join([chunk async for chunk in stream])
+
+
+def test_iter_calendar_objects_streams_responses():
+    """测试流式 REPORT 逐个产出对象"""
+    client = mock_client(REPORT)
+
+    async def run():
+        url = "https://calendar.example.com/dav/u1/primary/"
+        return [item async for item in client.iter_calendar_objects(url)]
+
+    items = asyncio.run(run())
+    assert [(url.rsplit("/", 1)[-1], etag) for url, etag, _ in items] == [
+        ("evt-1.ics", "e1"),
+        ("evt-2.ics", "e2"),
+    ]
+
+
+def test_export_ics_passes_components_through():
+    """测试 ICS 导出原样输出组件且只输出一次时区"""
+    client = mock_client(REPORT)
+    text = asyncio.run(collect(export_ics(client.iter_calendar_objects("https://x/cal/"))))
+    assert text.count("BEGIN:VTIMEZONE") == 1
+    assert "SUMMARY:评审, 第二轮\r\n" in text
+    cal = Calendar.from_ical(text)
+    assert [c.name for c in cal.subcomponents] == ["VTIMEZONE", "VEVENT", "VEVENT", "VEVENT"]
+
+
+def test_export_ndjson_and_csv():
+    """测试 NDJSON 与 CSV 导出"""
+    events = mock_client(REPORT).iter_events("https://x/cal/")
+    lines = asyncio.run(collect(export_ndjson(events))).splitlines()
+    assert [json.loads(line)["uid"] for line in lines] == ["evt-1", "evt-1", "evt-2"]
+
+    events = mock_client(REPORT).iter_events("https://x/cal/")
+    text = asyncio.run(collect(export_csv(events)))
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert rows[2]["summary"] == "评审, 第二轮"
+    assert rows[1]["recurrence_id"] == "2024-01-12 10:00:00+08:00"
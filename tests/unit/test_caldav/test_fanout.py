@@ -0,0 +1,52 @@
+"""
+多日历并发查询测试
+"""
+import asyncio
+import time
+
+from calendar_dingtalk_client.api.pagination import event_sort_key
+from calendar_dingtalk_client.caldav.operations.fanout import fan_out_events, merge_sorted
+
+CALENDARS = [
+    {"name": "work", "url": "/dav/u1/work/"},
+    {"name": "home", "url": "/dav/u1/home/"},
+    {"name": "slow", "url": "/dav/u1/slow/"},
+    {"name": "broken", "url": "/dav/u1/broken/"},
+]
+
+
+class FakeClient:
+    """按日历返回固定事件的客户端"""
+
+    def __init__(self):
+        self.events = {
+            "/dav/u1/work/": [30, 10, 50],
+            "/dav/u1/home/": [20, 40],
+        }
+
+    async def iter_events(self, calendar_url, start=None, end=None, properties=None, filters=()):
+        if "slow" in calendar_url:
+            await asyncio.sleep(5)
+        if "broken" in calendar_url:
+            raise RuntimeError("upstream 500")
+        await asyncio.sleep(0.05)
+        for epoch in self.events[calendar_url]:
+            yield {"uid": f"{calendar_url}{epoch}", "dtstart_epoch": epoch}
+
+
+def test_fan_out_merges_by_start_and_isolates_failures():
+    started = time.monotonic()
+    runs, errors = asyncio.run(
+        fan_out_events(FakeClient(), CALENDARS, key=event_sort_key, timeout=0.3)
+    )
+    elapsed = time.monotonic() - started
+
+    merged = list(merge_sorted(runs, event_sort_key))
+    assert [e["dtstart_epoch"] for e in merged] == [10, 20, 30, 40, 50]
+    assert [e["calendar"] for e in merged] == ["work", "home", "work", "home", "work"]
+    assert {e["calendar"]: e["error"] for e in errors} == {
+        "slow": "Timed out after 0.3s",
+        "broken": "upstream 500",
+    }
+    # 并发执行：总耗时约等于超时时间，而不是各日历耗时之和
+    assert elapsed < 1
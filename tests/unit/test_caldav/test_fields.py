@@ -0,0 +1,70 @@
+"""
+稀疏字段选择测试
+"""
+import asyncio
+
+import httpx
+import pytest
+from lxml import etree
+
+from calendar_dingtalk_client.caldav.client import CalDAVClient
+from calendar_dingtalk_client.caldav.fields import (
+    TODO_FIELDS,
+    parse_fields,
+    project,
+    required_properties,
+)
+from tests.fixtures.ical_samples import RECURRING
+from tests.unit.test_caldav.test_client import multistatus
+
+NS = {"D": "DAV:", "C": "urn:ietf:params:xml:ns:caldav"}
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields(" ") is None
+    assert parse_fields("uid, dtstart") == {"uid", "dtstart"}
+    assert parse_fields("status", TODO_FIELDS) == {"status"}
+    with pytest.raises(ValueError):
+        parse_fields("uid,body")
+
+
+def test_required_properties_keeps_sort_keys():
+    assert required_properties(None) is None
+    props = required_properties({"url", "dtend"})
+    assert "DESCRIPTION" not in props
+    assert {"UID", "DTSTART", "RECURRENCE-ID", "DTEND", "DURATION"} <= set(props)
+
+
+def test_project():
+    event = {"uid": "a", "description": "x" * 100, "dtstart": "2024-01-01"}
+    assert project(event, None) is event
+    assert project(event, {"uid", "dtstart"}) == {"uid": "a", "dtstart": "2024-01-01"}
+
+
+def test_query_requests_only_selected_properties():
+    """测试 REPORT 请求体包含 C:prop 投影"""
+    bodies = []
+
+    def handler(request):
+        bodies.append(request.content)
+        return httpx.Response(
+            207, text=multistatus(("/dav/u1/primary/evt-1.ics", "e1", RECURRING))
+        )
+
+    client = CalDAVClient("https://calendar.example.com/dav/u1", "user", "pass")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    props = required_properties({"uid", "dtstart"})
+    events = asyncio.run(
+        client.get_calendar_events(
+            "https://calendar.example.com/dav/u1/primary/", properties=props
+        )
+    )
+
+    assert len(events) == 2
+    root = etree.fromstring(bodies[0])
+    vevent = root.find(".//C:calendar-data/C:comp/C:comp[@name='VEVENT']", NS)
+    names = {prop.get("name") for prop in vevent.findall("C:prop", NS)}
+    assert names == set(props)
+    assert "DESCRIPTION" not in names
+    assert root.find(".//C:comp[@name='VTIMEZONE']/C:allprop", NS) is not None
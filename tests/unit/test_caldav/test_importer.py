@@ -0,0 +1,120 @@
+"""
+批量导入测试
+"""
+import asyncio
+
+import httpx
+from icalendar import Calendar
+
+from calendar_dingtalk_client.caldav.operations.importer import MAX_CONCURRENCY, import_ics
+from tests.fixtures.ical_samples import RECURRING
+
+
+class FakeClient:
+    """记录 PUT 请求的假客户端"""
+
+    def __init__(self, fail_uids=(), existing_uids=()):
+        self.created = {}
+        self.fail_uids = set(fail_uids)
+        self.existing_uids = set(existing_uids)
+        self.active = 0
+        self.max_active = 0
+
+    async def create_object(self, calendar_url, uid, ical_data):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0)
+        self.active -= 1
+        if uid in self.fail_uids:
+            raise RuntimeError("503 Service Unavailable")
+        if uid in self.existing_uids:
+            # 服务器对 If-None-Match: * 的响应
+            request = httpx.Request("PUT", f"{calendar_url}/{uid}.ics")
+            raise httpx.HTTPStatusError(
+                "412", request=request, response=httpx.Response(412, request=request)
+            )
+        url = f"{calendar_url}/{uid}.ics"
+        self.created[url] = ical_data
+        return url
+
+
+def ics_stream(data: str, size: int = 100):
+    async def stream():
+        raw = data.encode("utf-8")
+        for i in range(0, len(raw), size):
+            yield raw[i : i + size]
+
+    return stream()
+
+
+def many_events(count: int) -> str:
+    events = "".join(
+        f"BEGIN:VEVENT\r\nUID:evt-{i}\r\nSUMMARY:事件 {i}\r\n"
+        f"DTSTART:20240101T{i % 24:02}0000Z\r\nEND:VEVENT\r\n"
+        for i in range(count)
+    )
+    return f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Test//CN\r\n{events}END:VCALENDAR\r\n"
+
+
+def test_import_groups_overrides_with_master():
+    """测试主事件与覆盖实例写入同一资源，并附带时区定义"""
+    client = FakeClient()
+    report = asyncio.run(import_ics(client, "https://dav/cal/", ics_stream(RECURRING)))
+
+    assert (report["total"], report["created"], report["failed"]) == (2, 2, 0)
+    assert [(i["uid"], i["components"]) for i in report["items"]] == [
+        ("evt-1", 2),
+        ("todo-1", 1),
+    ]
+    cal = Calendar.from_ical(client.created["https://dav/cal/evt-1.ics"])
+    assert [c.name for c in cal.subcomponents] == ["VTIMEZONE", "VEVENT", "VEVENT"]
+
+
+def test_import_bounded_concurrency_and_failures():
+    """测试并发数受限，并逐条报告失败"""
+    client = FakeClient(fail_uids={"evt-3"})
+    report = asyncio.run(
+        import_ics(client, "https://dav/cal", ics_stream(many_events(50)), concurrency=4)
+    )
+    assert report["total"] == 50
+    assert report["failed"] == 1
+    failed = [i for i in report["items"] if i["status"] == "failed"]
+    assert failed[0]["uid"] == "evt-3"
+    assert "503" in failed[0]["error"]
+    assert [i["index"] for i in report["items"]] == list(range(50))
+    assert client.max_active <= 4
+
+
+def test_import_caps_concurrency():
+    """测试过大的并发数被限制在上限内"""
+    client = FakeClient()
+    report = asyncio.run(
+        import_ics(client, "https://dav/cal", ics_stream(many_events(100)), concurrency=10**6)
+    )
+    assert report["created"] == 100
+    assert client.max_active <= MAX_CONCURRENCY
+
+
+def test_import_endpoint_rejects_unbounded_concurrency():
+    from fastapi.testclient import TestClient
+
+    from calendar_dingtalk_client import http_server
+
+    response = TestClient(http_server.app).post("/api/import?concurrency=1000000", content=b"")
+    assert response.status_code == 422
+
+
+def test_import_rejects_non_adjacent_duplicate_uid():
+    """测试不相邻的重复 UID 被报告为失败"""
+    data = many_events(3).replace("UID:evt-2", "UID:evt-0")
+    report = asyncio.run(import_ics(FakeClient(), "https://dav/cal", ics_stream(data)))
+    assert [i["status"] for i in report["items"]] == ["created", "created", "failed"]
+
+
+def test_import_reports_existing_uids():
+    """测试日历中已有的 UID 不被覆盖，报告为 exists"""
+    client = FakeClient(existing_uids={"evt-1"})
+    report = asyncio.run(import_ics(client, "https://dav/cal", ics_stream(many_events(3))))
+    assert [i["status"] for i in report["items"]] == ["created", "exists", "created"]
+    assert (report["created"], report["failed"]) == (2, 1)
+    assert "https://dav/cal/evt-1.ics" not in client.created
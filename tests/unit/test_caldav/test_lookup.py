@@ -0,0 +1,70 @@
+"""
+UID 并发定位测试
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from calendar_dingtalk_client.caldav.operations.lookup import locate
+
+CALENDARS = ["/dav/u1/a/", "/dav/u1/b/", "/dav/u1/c/"]
+
+
+def status_error(code):
+    request = httpx.Request("GET", "https://calendar.example.com/")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(code, request=request))
+
+
+class FakeClient:
+    """按 URL 配置延迟和结果的客户端"""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.cancelled = []
+
+    async def get_object(self, url):
+        delay, outcome = self.outcomes[url]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(url)
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_first_hit_wins_and_cancels_the_rest():
+    client = FakeClient(
+        {
+            "/dav/u1/a/evt-1.ics": (0.01, status_error(404)),
+            "/dav/u1/b/evt-1.ics": (0.02, ("BEGIN:VCALENDAR", "e1")),
+            "/dav/u1/c/evt-1.ics": (5, status_error(404)),
+        }
+    )
+    started = time.monotonic()
+    hit = asyncio.run(locate(client, CALENDARS, "evt-1"))
+    assert hit == ("/dav/u1/b/evt-1.ics", ("BEGIN:VCALENDAR", "e1"))
+    assert client.cancelled == ["/dav/u1/c/evt-1.ics"]
+    assert time.monotonic() - started < 1
+
+
+def test_miss_probes_all_calendars_in_parallel():
+    client = FakeClient({f"{url}evt-1.ics": (0.2, status_error(404)) for url in CALENDARS})
+    started = time.monotonic()
+    assert asyncio.run(locate(client, CALENDARS, "evt-1")) is None
+    assert time.monotonic() - started < 0.5
+
+
+def test_upstream_error_without_hit_is_raised():
+    client = FakeClient(
+        {
+            "/dav/u1/a/evt-1.ics": (0, status_error(404)),
+            "/dav/u1/b/evt-1.ics": (0, status_error(503)),
+            "/dav/u1/c/evt-1.ics": (0, status_error(404)),
+        }
+    )
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(locate(client, CALENDARS, "evt-1"))
@@ -0,0 +1,123 @@
+"""
+calendar-query 过滤条件测试
+"""
+import asyncio
+
+import httpx
+from icalendar import Calendar
+
+from calendar_dingtalk_client.caldav.client import CalDAVClient
+from calendar_dingtalk_client.caldav.query import (
+    ParamFilter,
+    PropFilter,
+    TextMatch,
+    prop_filters_xml,
+)
+from tests.unit.test_caldav.test_client import multistatus
+
+MEETINGS = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:m-1\r\n"
+    "SUMMARY:Weekly 周会\r\n"
+    "LOCATION:3F 会议室\r\n"
+    "CATEGORIES:工作,Review\r\n"
+    "DTSTART:20240105T020000Z\r\n"
+    "ATTENDEE;PARTSTAT=ACCEPTED:mailto:alice@example.com\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+LUNCH = MEETINGS.replace("UID:m-1", "UID:m-2").replace("Weekly 周会", "午餐").replace(
+    "PARTSTAT=ACCEPTED", "PARTSTAT=DECLINED"
+)
+
+
+def component(data):
+    return Calendar.from_ical(data).walk("VEVENT")[0]
+
+
+def test_compiles_rfc4791_filters():
+    xml = prop_filters_xml(
+        [
+            PropFilter("summary", text_match=TextMatch("周会 & <review>", negate=True)),
+            PropFilter(
+                "ATTENDEE",
+                param_filters=(ParamFilter("PARTSTAT", text_match=TextMatch("ACCEPTED")),),
+            ),
+            PropFilter("LOCATION", is_not_defined=True),
+        ]
+    )
+    assert (
+        '<C:prop-filter name="SUMMARY">'
+        '<C:text-match collation="i;ascii-casemap" negate-condition="yes">'
+        "周会 &amp; &lt;review&gt;</C:text-match></C:prop-filter>"
+    ) in xml
+    assert '<C:param-filter name="PARTSTAT"><C:text-match' in xml
+    assert '<C:prop-filter name="LOCATION"><C:is-not-defined/></C:prop-filter>' in xml
+
+
+def test_local_evaluation_matches_server_semantics():
+    event = component(MEETINGS)
+    assert PropFilter("SUMMARY", text_match=TextMatch("weekly")).matches(event)
+    assert not PropFilter(
+        "SUMMARY", text_match=TextMatch("weekly", collation="i;octet")
+    ).matches(event)
+    assert PropFilter("CATEGORIES", text_match=TextMatch("review")).matches(event)
+    assert PropFilter("DESCRIPTION", is_not_defined=True).matches(event)
+    assert not PropFilter("DESCRIPTION", text_match=TextMatch("x", negate=True)).matches(event)
+    accepted = ParamFilter("PARTSTAT", text_match=TextMatch("accepted"))
+    assert PropFilter("ATTENDEE", param_filters=(accepted,)).matches(event)
+    assert not PropFilter("ATTENDEE", param_filters=(accepted,)).matches(component(LUNCH))
+    assert PropFilter("DTSTART", time_range=(1704420000, 1704420001)).matches(event)
+
+
+def make_client(handler):
+    client = CalDAVClient("https://calendar.example.com/dav/u1", "user", "pass")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def report(request):
+    return httpx.Response(
+        207,
+        text=multistatus(
+            ("/dav/u1/primary/m-1.ics", "e1", MEETINGS),
+            ("/dav/u1/primary/m-2.ics", "e2", LUNCH),
+        ),
+    )
+
+
+def test_query_pushes_filters_into_report():
+    bodies = []
+
+    def handler(request):
+        bodies.append(request.content.decode())
+        return report(request)
+
+    query = make_client(handler).query("https://calendar.example.com/dav/u1/primary/")
+    query.where("SUMMARY", "周会").where_param("ATTENDEE", "PARTSTAT", "ACCEPTED")
+    events = asyncio.run(query.fetch())
+
+    # 服务器忽略了过滤条件，本地求值兜底
+    assert [e["uid"] for e in events] == ["m-1"]
+    assert query.pushed_down is True
+    assert len(bodies) == 1
+    assert '<C:prop-filter name="SUMMARY">' in bodies[0]
+
+
+def test_query_falls_back_to_local_filtering_when_rejected():
+    bodies = []
+
+    def handler(request):
+        bodies.append(request.content.decode())
+        if "prop-filter" in bodies[-1]:
+            return httpx.Response(403, text="<D:error><C:supported-filter/></D:error>")
+        return report(request)
+
+    query = make_client(handler).query("https://calendar.example.com/dav/u1/primary/")
+    events = asyncio.run(query.where("LOCATION", "会议室").where("SUMMARY", "午餐", negate=True).fetch())
+
+    assert [e["uid"] for e in events] == ["m-1"]
+    assert query.pushed_down is False
+    assert ["prop-filter" in body for body in bodies] == [True, False]
@@ -0,0 +1,94 @@
+"""
+增量同步测试
+"""
+import asyncio
+
+from calendar_dingtalk_client.caldav.sync import SyncStore
+
+CALENDAR = {"name": "work", "url": "https://example.com/work/"}
+
+
+def ics(uid, summary):
+    return (
+        "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nBEGIN:VEVENT\r\n"
+        f"UID:{uid}\r\nSUMMARY:{summary}\r\nDTSTART:20240105T020000Z\r\n"
+        "END:VEVENT\r\nEND:VCALENDAR\r\n"
+    )
+
+
+class FakeClient:
+    """内存中的日历服务器"""
+
+    def __init__(self):
+        self.ctag = "1"
+        self.objects = {
+            "https://example.com/work/a.ics": ("e1", ics("a", "周会")),
+            "https://example.com/work/b.ics": ("e1", ics("b", "复盘")),
+        }
+        self.fetched = []
+
+    async def get_ctag(self, calendar_url):
+        return self.ctag
+
+    async def get_etags(self, calendar_url):
+        return {url: etag for url, (etag, _) in self.objects.items()}
+
+    async def multiget(self, calendar_url, urls):
+        self.fetched.append(sorted(urls))
+        return [(url, *self.objects[url]) for url in urls]
+
+
+def test_sync_fetches_only_changed_objects_and_notifies():
+    client = FakeClient()
+    store = SyncStore()
+    changes = []
+    store.subscribe(lambda url, events: changes.append((url[-5:], [e["summary"] for e in events])))
+
+    async def run():
+        first = await store.sync_calendar(client, CALENDAR)
+        unchanged = await store.sync_calendar(client, CALENDAR)
+        client.ctag = "2"
+        client.objects["https://example.com/work/a.ics"] = ("e2", ics("a", "周会（改期）"))
+        del client.objects["https://example.com/work/b.ics"]
+        second = await store.sync_calendar(client, CALENDAR)
+        return first, unchanged, second
+
+    first, unchanged, second = asyncio.run(run())
+    assert (first.changed, unchanged.changed, second.changed, second.removed) == (2, 0, 1, 1)
+    assert client.fetched == [
+        ["https://example.com/work/a.ics", "https://example.com/work/b.ics"],
+        ["https://example.com/work/a.ics"],
+    ]
+    assert changes[2:] == [("a.ics", ["周会（改期）"]), ("b.ics", [])]
+    assert [e["calendar"] for e in store.events()] == ["work"]
+
+    # 新订阅者会收到已同步对象的回放
+    replayed = []
+    store.subscribe(lambda url, events: replayed.append(url))
+    assert replayed == ["https://example.com/work/a.ics"]
+
+
+def test_apply_and_discard_update_synced_calendar_in_place():
+    client = FakeClient()
+    store = SyncStore()
+    changes = []
+    store.subscribe(lambda url, events: changes.append((url, [e["summary"] for e in events])))
+    # 尚未同步的日历不接受本地更新
+    assert not store.apply("https://example.com/work/c.ics", None, ics("c", "面试"))
+
+    asyncio.run(store.sync_calendar(client, CALENDAR))
+    assert store.apply("/work//c.ics", None, ics("c", "面试"))
+    assert store.discard("https://example.com/work/b.ics")
+    assert not store.discard("https://example.com/work/b.ics")
+    assert changes[2:] == [
+        ("https://example.com/work/c.ics", ["面试"]),
+        ("https://example.com/work/b.ics", []),
+    ]
+    assert sorted(e["summary"] for e in store.events()) == ["周会", "面试"]
+
+    # etag 未知的对象在下次同步时重新获取
+    client.ctag = "2"
+    client.objects["https://example.com/work/c.ics"] = ("e1", ics("c", "面试"))
+    del client.objects["https://example.com/work/b.ics"]
+    asyncio.run(store.sync_calendar(client, CALENDAR))
+    assert client.fetched[-1] == ["https://example.com/work/c.ics"]
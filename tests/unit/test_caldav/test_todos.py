@@ -0,0 +1,128 @@
+"""
+待办查询测试
+"""
+import asyncio
+
+import pytest
+
+from calendar_dingtalk_client.caldav.operations.todos import (
+    OPEN_STATUSES,
+    TodoIndex,
+    TodoIndexCache,
+    TodoQuery,
+    parse_status,
+    query_todos,
+    todo_prop_filters,
+)
+from calendar_dingtalk_client.caldav.query import prop_filters_xml
+
+TODOS = [
+    {"uid": "a", "status": "NEEDS-ACTION", "due_epoch": 300, "priority": 5},
+    {"uid": "b", "status": "COMPLETED", "due_epoch": 100, "priority": 1},
+    {"uid": "c", "status": "IN-PROCESS", "due_epoch": 200, "priority": 1},
+    {"uid": "d", "status": None, "due_epoch": None, "priority": 0},
+    {"uid": "e", "status": "NEEDS-ACTION", "due_epoch": 150, "priority": 9},
+]
+
+
+def uids(todos):
+    return [t["uid"] for t in todos]
+
+
+def test_index_filters_due_range_and_status():
+    index = TodoIndex(TODOS)
+    assert uids(index.query(TodoQuery())) == ["d", "b", "e", "c", "a"]
+    # 逾期：未完成且截止时间早于 250
+    overdue = TodoQuery(status=OPEN_STATUSES, due_before=250)
+    assert uids(index.query(overdue)) == ["e", "c"]
+    # 没有 STATUS 的待办视为 NEEDS-ACTION
+    assert uids(index.query(TodoQuery(status=frozenset({"NEEDS-ACTION"})))) == ["d", "e", "a"]
+
+
+def test_index_sorts_by_priority_with_undefined_last():
+    index = TodoIndex(TODOS)
+    query = TodoQuery(sort="priority")
+    assert uids(index.query(query)) == ["b", "c", "a", "e", "d"]
+    high = TodoQuery(status=OPEN_STATUSES, max_priority=5, sort="priority")
+    assert uids(index.query(high)) == ["c", "a"]
+
+
+def test_parse_status():
+    assert parse_status(None) is None
+    assert parse_status("open") == OPEN_STATUSES
+    assert parse_status("completed, cancelled") == {"COMPLETED", "CANCELLED"}
+    with pytest.raises(ValueError):
+        parse_status("done")
+
+
+def test_prop_filters_push_down_single_status_and_due_range():
+    xml = prop_filters_xml(
+        todo_prop_filters(
+            TodoQuery(status=frozenset({"COMPLETED"}), due_after=0, due_before=86400)
+        )
+    )
+    assert '<C:prop-filter name="STATUS">' in xml
+    assert '<C:time-range start="19700101T000000Z" end="19700102T000000Z"/>' in xml
+    # NEEDS-ACTION 的待办可能没有 STATUS 属性，不能下推
+    assert todo_prop_filters(TodoQuery(status=OPEN_STATUSES)) == []
+
+
+class FakeClient:
+    def __init__(self, ctag):
+        self.ctag = ctag
+        self.calls = []
+        self.properties = []
+
+    async def get_ctag(self, calendar_url):
+        return self.ctag
+
+    async def get_todos(self, calendar_url, properties=None, filters=()):
+        self.calls.append(list(filters))
+        self.properties.append(properties)
+        return list(TODOS)
+
+
+def test_query_reuses_index_until_ctag_changes():
+    client = FakeClient("1")
+    cache = TodoIndexCache()
+    query = TodoQuery(status=frozenset({"COMPLETED"}))
+
+    async def run():
+        for _ in range(3):
+            assert uids(await query_todos(client, "/cal/", query, cache)) == ["b"]
+        client.ctag = "2"
+        await query_todos(client, "/cal/", query, cache)
+
+    asyncio.run(run())
+    assert client.calls == [[], []]
+
+
+def test_query_pushes_filters_down_without_ctag():
+    client = FakeClient(None)
+    query = TodoQuery(status=frozenset({"COMPLETED"}))
+    result = asyncio.run(query_todos(client, "/cal/", query, TodoIndexCache()))
+    assert uids(result) == ["b"]
+    assert [f.name for f in client.calls[0]] == ["STATUS"]
+
+
+def test_query_narrows_requested_properties():
+    query = TodoQuery(status=frozenset({"COMPLETED"}))
+    # 只要标题时不请求 DESCRIPTION 等属性，过滤和排序需要的属性仍然请求
+    for ctag in (None, "1"):
+        client = FakeClient(ctag)
+        result = asyncio.run(
+            query_todos(client, "/cal/", query, TodoIndexCache(), properties=("SUMMARY", "UID"))
+        )
+        assert uids(result) == ["b"]
+        assert client.properties == [("DUE", "PRIORITY", "STATUS", "SUMMARY", "UID")]
+
+    # 同一 ctag 已有完整索引时直接复用
+    client = FakeClient("1")
+    cache = TodoIndexCache()
+
+    async def run():
+        await query_todos(client, "/cal/", query, cache)
+        await query_todos(client, "/cal/", query, cache, properties=("SUMMARY",))
+
+    asyncio.run(run())
+    assert client.properties == [None]
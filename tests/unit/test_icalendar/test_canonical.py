@@ -0,0 +1,56 @@
+"""
+iCalendar 规范化哈希测试
+"""
+from calendar_dingtalk_client.icalendar.canonical import canonical_hash
+
+STORED = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "PRODID:-//Server//CN\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:evt-1\r\n"
+    "DTSTAMP:20240101T000000Z\r\n"
+    "SUMMARY:周会\r\n"
+    "DTSTART;TZID=Asia/Shanghai:20240105T100000\r\n"
+    "ATTENDEE;ROLE=REQ-PARTICIPANT;CN=Alice:mailto:alice@example.com\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def test_volatile_and_formatting_differences_are_ignored():
+    """测试易变属性、参数顺序、折行和时区写法不影响哈希"""
+    proposed = (
+        "BEGIN:VCALENDAR\n"
+        "PRODID:-//DingTalk CalDAV Client//CN\n"
+        "VERSION:2.0\n"
+        "BEGIN:VEVENT\n"
+        "DTSTART:20240105T020000Z\n"
+        "SUMMARY:周\n"
+        " 会\n"
+        "UID:evt-1\n"
+        'ATTENDEE;CN="Alice";ROLE=REQ-PARTICIPANT:mailto:alice@example.com\n'
+        "DTSTAMP:20250101T000000Z\n"
+        "END:VEVENT\n"
+        "END:VCALENDAR\n"
+    )
+    assert canonical_hash(proposed) == canonical_hash(STORED)
+
+
+def test_semantic_change_changes_hash():
+    """测试有语义的修改会改变哈希"""
+    assert canonical_hash(STORED.replace("周会", "月会")) != canonical_hash(STORED)
+    assert canonical_hash(STORED.replace("T100000", "T110000")) != canonical_hash(STORED)
+
+
+def test_recurring_events_keep_their_timezone():
+    """测试重复事件改用其他时区表示同一时刻会改变哈希（夏令时后的实例会偏移）"""
+    berlin = STORED.replace("UID:evt-1\r\n", "UID:evt-1\r\nRRULE:FREQ=WEEKLY\r\n").replace(
+        "TZID=Asia/Shanghai:20240105T100000", "TZID=Europe/Berlin:20240105T100000"
+    )
+    utc = berlin.replace(
+        "DTSTART;TZID=Europe/Berlin:20240105T100000", "DTSTART:20240105T090000Z"
+    )
+    assert canonical_hash(utc) != canonical_hash(berlin)
+    # 参数顺序等写法差异仍被忽略
+    assert canonical_hash(berlin.replace("\r\n", "\n")) == canonical_hash(berlin)
@@ -0,0 +1,55 @@
+"""
+iCalendar 解析器测试
+"""
+from calendar_dingtalk_client.icalendar.parser import (
+    event_people,
+    iter_components,
+    parse_event,
+    parse_todo,
+)
+from tests.fixtures.ical_samples import RECURRING
+
+
+def test_iter_components_yields_master_and_overrides():
+    """测试返回主事件和所有重复实例覆盖"""
+    items = list(iter_components(RECURRING, ("VEVENT",)))
+    assert [str(c.get("summary")) for c, _ in items] == ["周会", "周会（改期）"]
+    # 两个实例都引用了 Asia/Shanghai（覆盖实例通过 RECURRENCE-ID 引用）
+    assert all(list(tz) == ["Asia/Shanghai"] for _, tz in items)
+
+
+def test_iter_components_default_names():
+    """测试默认同时返回事件和待办"""
+    names = [c.name for c, _ in iter_components(RECURRING)]
+    assert names == ["VEVENT", "VEVENT", "VTODO"]
+
+
+def test_parse_first_component():
+    """测试 parse_event/parse_todo 仍返回第一个组件"""
+    assert parse_event(RECURRING)["summary"] == "周会"
+    assert parse_todo(RECURRING)["uid"] == "todo-1"
+    assert parse_todo(RECURRING.replace("VTODO", "VJOURNAL")) == {}
+
+
+def test_event_people_normalizes_addresses():
+    """测试组织者和参与者地址去掉 mailto: 并转小写，同一地址共享同一个字符串"""
+    component = next(iter_components(
+        "BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nUID:p-1\r\n"
+        "ORGANIZER;CN=张三:MAILTO:ZhangSan@Example.com\r\n"
+        "ATTENDEE;CN=李四;PARTSTAT=accepted:mailto:lisi@example.com\r\n"
+        "ATTENDEE;ROLE=OPT-PARTICIPANT:mailto:zhangsan@example.com\r\n"
+        "END:VEVENT\r\nEND:VCALENDAR\r\n",
+        ("VEVENT",),
+    ))[0]
+    organizer, attendees = event_people(component)
+    assert organizer == {
+        "id": "zhangsan@example.com",
+        "name": "张三",
+        "partstat": "NEEDS-ACTION",
+        "role": "REQ-PARTICIPANT",
+    }
+    assert [(a["id"], a["name"], a["partstat"], a["role"]) for a in attendees] == [
+        ("lisi@example.com", "李四", "ACCEPTED", "REQ-PARTICIPANT"),
+        ("zhangsan@example.com", None, "NEEDS-ACTION", "OPT-PARTICIPANT"),
+    ]
+    assert organizer["id"] is attendees[1]["id"]
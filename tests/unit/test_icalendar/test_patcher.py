@@ -0,0 +1,102 @@
+"""
+iCalendar 属性补丁测试
+"""
+from datetime import datetime, timezone
+
+import pytest
+from icalendar import Calendar
+
+from calendar_dingtalk_client.icalendar.patcher import (
+    get_property,
+    patch_component,
+    split_content_lines,
+)
+
+ORIGINAL = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "PRODID:-//Other Client//EN\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:evt-1\r\n"
+    "SUMMARY:项目周会\r\n"
+    "DTSTART;TZID=Asia/Shanghai:20240105T100000\r\n"
+    "DURATION:PT1H\r\n"
+    "RRULE:FREQ=WEEKLY;BYDAY=FR\r\n"
+    "ATTENDEE;CN=Alice;ROLE=REQ-PARTICIPANT:mailto:alice@example.com\r\n"
+    "DESCRIPTION:a very long description that definitely needs folding because i\r\n"
+    " t is longer than seventy five octets\r\n"
+    "BEGIN:VALARM\r\n"
+    "ACTION:DISPLAY\r\n"
+    "DESCRIPTION:Reminder\r\n"
+    "TRIGGER:-PT15M\r\n"
+    "END:VALARM\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:evt-1\r\n"
+    "RECURRENCE-ID;TZID=Asia/Shanghai:20240112T100000\r\n"
+    "SUMMARY:项目周会（改期）\r\n"
+    "DTSTART;TZID=Asia/Shanghai:20240112T140000\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def test_split_content_lines_roundtrip():
+    """测试拆分后可以无损拼回"""
+    entries = split_content_lines(ORIGINAL)
+    assert "".join(raw for _, raw in entries) == ORIGINAL
+    assert any(line.endswith("it is longer than seventy five octets") for line, _ in entries)
+
+
+def test_empty_patch_is_byte_identical():
+    """测试空补丁不改变任何字节"""
+    assert patch_component(ORIGINAL, {}) == ORIGINAL
+
+
+def test_replace_keeps_other_lines():
+    """测试替换属性时其他内容行不变"""
+    patched = patch_component(ORIGINAL, {"summary": "新标题"})
+    assert "SUMMARY:新标题\r\n" in patched
+    assert patched.replace("SUMMARY:新标题\r\n", "SUMMARY:项目周会\r\n", 1) == ORIGINAL
+    # 例外实例的标题不受影响
+    assert "SUMMARY:项目周会（改期）\r\n" in patched
+
+
+def test_dtend_replaces_duration_and_inserts_before_alarm():
+    """测试设置 DTEND 时删除 DURATION 并插入到 VALARM 之前"""
+    patched = patch_component(
+        ORIGINAL, {"DTEND": datetime(2024, 1, 5, 3, tzinfo=timezone.utc)}
+    )
+    assert "DURATION" not in patched
+    assert patched.index("DTEND:20240105T030000Z\r\n") < patched.index("BEGIN:VALARM")
+    assert "RRULE:FREQ=WEEKLY;BYDAY=FR\r\n" in patched
+    assert "TRIGGER:-PT15M\r\n" in patched
+    Calendar.from_ical(patched)
+
+
+def test_remove_property_and_folded_line():
+    """测试删除折行属性，VALARM 内同名属性不受影响"""
+    patched = patch_component(ORIGINAL, {"DESCRIPTION": None})
+    assert "seventy five" not in patched
+    assert "DESCRIPTION:Reminder\r\n" in patched
+
+
+def test_get_property_unescapes_text():
+    """测试读取属性时反转义"""
+    patched = patch_component(ORIGINAL, {"LOCATION": "Room 1, Floor 2; East"})
+    assert "LOCATION:Room 1\\, Floor 2\\; East\r\n" in patched
+    assert get_property(patched, "location") == "Room 1, Floor 2; East"
+    assert get_property(patched, "SUMMARY") == "项目周会"
+
+
+def test_lf_line_endings_are_preserved():
+    """测试保留 LF 换行风格"""
+    original = ORIGINAL.replace("\r\n", "\n")
+    patched = patch_component(original, {"SUMMARY": "x", "LOCATION": "y"})
+    assert "\r" not in patched
+
+
+def test_missing_component():
+    """测试组件不存在时抛出 ValueError"""
+    with pytest.raises(ValueError):
+        patch_component(ORIGINAL, {"SUMMARY": "x"}, "VTODO")
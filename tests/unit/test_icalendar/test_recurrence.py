@@ -0,0 +1,45 @@
+"""
+重复事件展开测试
+"""
+from datetime import datetime, timezone
+
+from calendar_dingtalk_client.caldav.sync import parse_object
+from calendar_dingtalk_client.icalendar.recurrence import expand
+from tests.fixtures.ical_samples import RECURRING
+
+BERLIN = (
+    "BEGIN:VCALENDAR\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:standup\r\n"
+    "DTSTART;TZID=Europe/Berlin:20240325T090000\r\n"
+    "DTEND;TZID=Europe/Berlin:20240325T091500\r\n"
+    "RRULE:FREQ=DAILY;UNTIL=20240328T080000Z\r\n"
+    "EXDATE;TZID=Europe/Berlin:20240326T090000\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def epoch(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+def test_expands_in_local_time_across_dst_with_exdate_and_until():
+    (event,) = parse_object("work", "/standup.ics", None, BERLIN)
+    assert event["recurrence"]["rrule"] == "FREQ=DAILY;UNTIL=20240328T080000Z"
+    occurrences = expand(event, epoch(2024, 1, 1), epoch(2025, 1, 1))
+    # 3 月 31 日切换夏令时之前仍是 UTC+1；UNTIL 恰好包含 28 日 09:00（UTC 08:00）
+    assert occurrences == [
+        (epoch(2024, 3, 25, 8), epoch(2024, 3, 25, 8, 15)),
+        (epoch(2024, 3, 27, 8), epoch(2024, 3, 27, 8, 15)),
+        (epoch(2024, 3, 28, 8), epoch(2024, 3, 28, 8, 15)),
+    ]
+    assert expand(event, epoch(2024, 3, 27, 8, 10), epoch(2024, 3, 28)) == occurrences[1:2]
+
+
+def test_skips_overridden_instances():
+    master, override = parse_object("work", "/evt-1.ics", None, RECURRING)
+    assert override["recurrence"] is None
+    skip = [epoch(2024, 1, 12, 2)]
+    starts = [s for s, _ in expand(master, epoch(2024, 1, 1), epoch(2024, 1, 27), skip=skip)]
+    assert starts == [epoch(2024, 1, 5, 2), epoch(2024, 1, 19, 2), epoch(2024, 1, 26, 2)]
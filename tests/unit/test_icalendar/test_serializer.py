@@ -0,0 +1,118 @@
+"""
+iCalendar 快速序列化器测试
+"""
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from dateutil import tz
+from icalendar import Calendar, Event as IEvent, Todo as ITodo
+
+from calendar_dingtalk_client.icalendar.builder import build_event, build_todo
+from calendar_dingtalk_client.icalendar.serializer import (
+    ICalWriter,
+    fold_line,
+    serialize_calendar,
+)
+
+
+def reference_calendar(events=(), todos=()):
+    """使用 icalendar 库生成参考输出"""
+    cal = Calendar()
+    cal.add("prodid", "-//DingTalk CalDAV Client//CN")
+    cal.add("version", "2.0")
+    for event in events:
+        ie = IEvent()
+        ie.add("uid", event["uid"])
+        ie.add("summary", event["summary"])
+        for key in ("dtstart", "dtend", "description", "location"):
+            if event.get(key):
+                ie.add(key, event[key])
+        cal.add_component(ie)
+    for todo in todos:
+        it = ITodo()
+        it.add("uid", todo["uid"])
+        it.add("summary", todo["summary"])
+        for key in ("due", "priority", "status"):
+            if todo.get(key):
+                it.add(key, todo[key])
+        cal.add_component(it)
+    return cal.to_ical()
+
+
+DATETIMES = [
+    datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc),
+    datetime(2024, 1, 1, 10, 0, 0, 123456, tzinfo=timezone.utc),
+    datetime.fromisoformat("2024-01-01T10:00:00+08:00"),
+    datetime.fromisoformat("2024-01-01T10:00:00-05:30"),
+    datetime(2024, 1, 1, 10),
+    datetime(2024, 7, 1, 10, tzinfo=ZoneInfo("Asia/Shanghai")),
+    datetime(2024, 7, 1, 10, tzinfo=ZoneInfo("Europe/Berlin")),
+    datetime(2024, 7, 1, 10, tzinfo=ZoneInfo("Etc/UTC")),
+    datetime(2024, 7, 1, 10, tzinfo=tz.gettz("America/New_York")),
+    datetime(2024, 7, 1, 10, tzinfo=tz.UTC),
+    date(2024, 2, 29),
+]
+
+TEXTS = [
+    "",
+    "周会",
+    "a,b;c\\d\nnext line\r\nwindows",
+    "literal \\N marker",
+    "x" * 73,
+    "x" * 74,
+    "x" * 75,
+    "x" * 300,
+    "中文" * 50,
+    "mixed 中 text " * 20,
+    "emoji 😀" * 30,
+]
+
+
+@pytest.mark.parametrize("dt", DATETIMES)
+def test_event_datetimes_match_library(dt):
+    """测试时间格式与库逐字节一致"""
+    event = {"uid": "u-1", "summary": "s", "dtstart": dt, "dtend": dt + timedelta(hours=1)}
+    assert build_event(event) == reference_calendar(events=[event])
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_event_text_match_library(text):
+    """测试转义和折行与库逐字节一致"""
+    event = {
+        "uid": "uid-" + text[:10],
+        "summary": text,
+        "dtstart": DATETIMES[0],
+        "description": text,
+        "location": text,
+    }
+    assert build_event(event) == reference_calendar(events=[event])
+
+
+@pytest.mark.parametrize("due", DATETIMES)
+def test_todo_match_library(due):
+    """测试待办与库逐字节一致"""
+    todo = {"uid": "t-1", "summary": "写周报", "due": due, "priority": 3, "status": "COMPLETED"}
+    assert build_todo(todo) == reference_calendar(todos=[todo])
+    minimal = {"uid": "t-2", "summary": "s"}
+    assert build_todo(minimal) == reference_calendar(todos=[minimal])
+
+
+def test_many_components_per_call():
+    """测试一次写入多个组件"""
+    events = [
+        {"uid": f"e-{i}", "summary": TEXTS[i % len(TEXTS)], "dtstart": DATETIMES[i % len(DATETIMES)]}
+        for i in range(50)
+    ]
+    todos = [{"uid": f"t-{i}", "summary": f"todo {i}", "priority": i % 10} for i in range(20)]
+    writer = ICalWriter()
+    assert serialize_calendar(events, todos, writer=writer) == reference_calendar(events, todos)
+    # 缓冲区复用后输出不受上一次影响
+    assert serialize_calendar(events[:1], writer=writer) == reference_calendar(events[:1])
+
+
+def test_fold_line_never_exceeds_75_octets():
+    """测试折行后每行不超过 75 字节"""
+    for text in TEXTS:
+        for physical in fold_line("SUMMARY:" + text).split("\r\n"):
+            assert len(physical.encode("utf-8")) <= 75
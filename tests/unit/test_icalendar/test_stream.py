@@ -0,0 +1,57 @@
+"""
+iCalendar 流式解析器测试
+"""
+import asyncio
+import io
+
+from icalendar import Calendar
+
+from calendar_dingtalk_client.icalendar.stream import aiter_ics, iter_ics
+from tests.fixtures.ical_samples import RECURRING
+
+
+def chunked(data: bytes, size: int):
+    """按固定大小切块，模拟网络/文件分块读取"""
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_iter_ics_components_and_timezones():
+    """测试逐个产出组件并附带引用的 VTIMEZONE"""
+    components = list(iter_ics(io.BytesIO(RECURRING.encode("utf-8"))))
+    assert [(c.name, c.uid) for c in components] == [
+        ("VEVENT", "evt-1"),
+        ("VEVENT", "evt-1"),
+        ("VTODO", "todo-1"),
+    ]
+    assert components[1].recurrence_id == "20240112T100000"
+    assert list(components[0].timezones) == ["Asia/Shanghai"]
+    assert components[2].timezones == {}
+    # 包装后的单组件日历可以被 icalendar 正常解析
+    cal = Calendar.from_ical(components[0].to_ical())
+    assert [c.name for c in cal.subcomponents] == ["VTIMEZONE", "VEVENT"]
+
+
+def test_chunk_boundaries_do_not_matter():
+    """测试任意切块（包括切开多字节字符和折行）结果一致"""
+    data = RECURRING.replace("SUMMARY:周会\r\n", "SUMMARY:周会" + "长" * 40 + "\r\n")
+    folded = data.replace("长" * 20, "长" * 20 + "\r\n ", 1).encode("utf-8")
+    expected = [c.raw for c in iter_ics(io.BytesIO(folded))]
+    assert "\r\n " in expected[0]
+    for size in (1, 3, 7, 64):
+        assert [c.raw for c in iter_ics(chunked(folded, size))] == expected
+
+
+def test_aiter_ics_lf_input():
+    """测试异步字节流和 LF 换行输入"""
+    data = RECURRING.replace("\r\n", "\n").encode("utf-8")
+
+    async def stream():
+        for chunk in chunked(data, 5):
+            yield chunk
+
+    async def collect():
+        return [c async for c in aiter_ics(stream(), names=("VTODO",))]
+
+    components = asyncio.run(collect())
+    assert [c.uid for c in components] == ["todo-1"]
+    assert components[0].raw.endswith("END:VTODO\r\n")
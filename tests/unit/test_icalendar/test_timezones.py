@@ -0,0 +1,84 @@
+"""
+时区解析缓存测试
+"""
+from datetime import date, datetime, timezone
+
+from calendar_dingtalk_client.caldav.sync import parse_object
+from calendar_dingtalk_client.icalendar.parser import event_epochs, iter_components
+from calendar_dingtalk_client.icalendar.recurrence import expand
+from calendar_dingtalk_client.icalendar.timezones import (
+    extract_timezones,
+    resolve_tzid,
+    to_epoch,
+)
+from tests.fixtures.ical_samples import RECURRING
+
+CUSTOM = RECURRING.replace("Asia/Shanghai", "Custom Beijing Time")
+
+
+def test_extract_timezones_strips_and_caches():
+    """测试 VTIMEZONE 被剔除且同一定义只解析一次"""
+    stripped, first, zones = extract_timezones(CUSTOM)
+    assert "VTIMEZONE" not in stripped
+    assert stripped.startswith("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n")
+    _, second, _ = extract_timezones(CUSTOM)
+    assert first["Custom Beijing Time"] is second["Custom Beijing Time"]
+
+
+def test_extract_timezones_ignores_property_values():
+    """测试属性值（含折行）中的 BEGIN:VTIMEZONE 文本不被当作时区块"""
+    description = (
+        "DESCRIPTION:导出格式示例：\r\n"
+        " BEGIN:VTIMEZONE\\nTZID:Fake\\n\r\n"
+        " END:VTIMEZONE 结束\r\n"
+    )
+    data = RECURRING.replace("SUMMARY:周会\r\n", "SUMMARY:周会\r\n" + description, 1)
+    stripped, timezones, _ = extract_timezones(data)
+    assert list(timezones) == ["Asia/Shanghai"]
+    assert description in stripped
+    event = next(iter_components(data, ("VEVENT",)))[0]
+    assert str(event.get("summary")) == "周会"
+    assert "BEGIN:VTIMEZONE" in str(event.get("description"))
+
+
+def test_custom_tzid_resolves_from_its_definition():
+    """测试自定义 TZID 按所在对象的 VTIMEZONE 定义解析，不按名称全局解析"""
+    components = list(iter_components(CUSTOM, ("VEVENT",)))
+    start = components[0][0].get("dtstart").dt
+    assert start.utcoffset().total_seconds() == 8 * 3600
+    assert list(components[0][1]) == ["Custom Beijing Time"]
+    assert resolve_tzid("Custom Beijing Time") is None
+    assert resolve_tzid("Asia/Shanghai") is resolve_tzid("Asia/Shanghai")
+    assert resolve_tzid("China Standard Time") is resolve_tzid("Asia/Shanghai")
+    assert resolve_tzid("No/Such_Zone") is None
+
+
+def test_same_custom_tzid_with_different_definitions():
+    """测试两个日历用同一自定义 TZID 给出不同定义时各自按自己的定义换算"""
+    shared = RECURRING.replace("Asia/Shanghai", "Office Time")
+    other = shared.replace("+0800", "+0200")
+    events = [parse_object("work", "/a.ics", None, shared)[0]]
+    events.append(parse_object("home", "/b.ics", None, other)[0])
+    # 北京时间 10:00 为 UTC 02:00，UTC+2 的 10:00 为 UTC 08:00
+    assert [e["dtstart_epoch"] for e in events] == [1704420000, 1704441600]
+    # 重复实例同样按各自的定义展开
+    week = 7 * 86400
+    starts = [s for e in events for s, _ in expand(e, 1704420000 - 1, 1704441600 + week + 1)]
+    assert starts == [1704420000, 1704420000 + week, 1704441600, 1704441600 + week]
+
+
+def test_to_epoch():
+    """测试纪元秒换算（浮动时间和全天事件使用默认时区 Asia/Shanghai）"""
+    assert to_epoch(datetime(2024, 1, 1, tzinfo=timezone.utc)) == 1704067200
+    assert to_epoch(datetime(2024, 1, 1, 8)) == 1704067200
+    assert to_epoch(date(2024, 1, 1)) == 1704038400
+    assert to_epoch(None) is None
+
+
+def test_event_epochs_defaults_end():
+    """测试无 DTEND 时的结束时间"""
+    component, _ = next(iter_components(RECURRING, ("VEVENT",)))
+    start = {"dtstart": date(2024, 1, 1), "dtend": None}
+    assert event_epochs(component, start) == (1704038400, 1704038400 + 86400)
+    start = {"dtstart": datetime(2024, 1, 1, tzinfo=timezone.utc), "dtend": None}
+    assert event_epochs(component, start) == (1704067200, 1704067200)
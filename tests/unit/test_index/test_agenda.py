@@ -0,0 +1,83 @@
+"""
+日程视图索引测试
+"""
+from datetime import date, datetime, timezone
+
+from calendar_dingtalk_client.caldav.sync import parse_object
+from calendar_dingtalk_client.icalendar.timezones import resolve_tzid
+from calendar_dingtalk_client.index.agenda import AgendaIndex
+from tests.fixtures.ical_samples import RECURRING
+
+SHANGHAI = resolve_tzid("Asia/Shanghai")
+
+
+def epoch(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+def event(uid, start, end, calendar="work"):
+    return {
+        "url": f"/{calendar}/{uid}.ics",
+        "uid": uid,
+        "summary": uid,
+        "calendar": calendar,
+        "dtstart_epoch": start,
+        "dtend_epoch": end,
+        "recurrence": None,
+    }
+
+
+def agenda_index():
+    return AgendaIndex(horizon=(epoch(2024, 1, 1), epoch(2024, 2, 1)), tz=SHANGHAI)
+
+
+def summaries(index, first, count, calendars=None):
+    return [
+        (str(day), [e["summary"] for e in events])
+        for day, events in index.days(first, count, calendars)
+    ]
+
+
+def test_buckets_follow_local_dates_and_span_days():
+    index = agenda_index()
+    # 北京时间 1 月 8 日 07:00-09:00，UTC 仍是 1 月 7 日
+    index.update("/work/a.ics", [event("a", epoch(2024, 1, 7, 23), epoch(2024, 1, 8, 1))])
+    # 跨两天，结束于 1 月 10 日零点（不计入 10 日）
+    index.update("/work/b.ics", [event("b", epoch(2024, 1, 8, 2), epoch(2024, 1, 9, 16))])
+    index.update("/home/c.ics", [event("c", epoch(2024, 1, 8, 0), epoch(2024, 1, 8, 0), "home")])
+    assert summaries(index, date(2024, 1, 7), 4) == [
+        ("2024-01-07", []),
+        ("2024-01-08", ["a", "c", "b"]),
+        ("2024-01-09", ["b"]),
+        ("2024-01-10", []),
+    ]
+    assert summaries(index, date(2024, 1, 8), 1, ["work"]) == [("2024-01-08", ["a", "b"])]
+
+
+def test_updates_replace_and_remove_object_entries():
+    index = agenda_index()
+    index.update("/work/a.ics", [event("a", epoch(2024, 1, 8, 2), epoch(2024, 1, 8, 3))])
+    index.update("/work/a.ics", [event("a", epoch(2024, 1, 9, 2), epoch(2024, 1, 9, 3))])
+    assert summaries(index, date(2024, 1, 8), 2) == [("2024-01-08", []), ("2024-01-09", ["a"])]
+    index.update("/work/a.ics", [])
+    assert summaries(index, date(2024, 1, 9), 1) == [("2024-01-09", [])]
+    assert len(index) == 0
+
+
+def test_recurring_instances_land_in_their_days():
+    index = agenda_index()
+    index.update("/evt-1.ics", parse_object("work", "/evt-1.ics", None, RECURRING))
+    week = index.days(date(2024, 1, 8), 7)
+    friday = week[4][1] + week[3][1]
+    assert [e["summary"] for e in friday] == ["周会（改期）"]
+    [(day, events)] = index.days(date(2024, 1, 19), 1)
+    assert events[0]["dtstart"] == "2024-01-19 10:00:00+08:00"
+    assert events[0]["recurrence_id"] == "2024-01-19 10:00:00+08:00"
+
+
+def test_reexpands_recurring_objects_outside_horizon():
+    index = agenda_index()
+    index.update("/evt-1.ics", parse_object("work", "/evt-1.ics", None, RECURRING))
+    # 展开范围只到 1 月，查询 6 月时重新展开
+    assert summaries(index, date(2024, 6, 7), 1) == [("2024-06-07", ["周会"])]
+    assert summaries(index, date(2024, 1, 12), 1) == [("2024-01-12", ["周会（改期）"])]
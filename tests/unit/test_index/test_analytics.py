@@ -0,0 +1,82 @@
+"""
+时间利用率统计测试
+"""
+from datetime import datetime, time, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from calendar_dingtalk_client.index.analytics import (
+    UtilizationCache,
+    UtilizationQuery,
+    calendar_utilization,
+    to_local,
+    utc_offsets,
+    utilization,
+)
+from calendar_dingtalk_client.index.slots import WorkingHours
+from calendar_dingtalk_client.index.snapshot import EventSnapshot
+
+HOUR = 3600
+MONDAY = int(datetime(2024, 1, 8, tzinfo=timezone.utc).timestamp())
+
+
+def test_local_time_conversion_follows_dst():
+    berlin = ZoneInfo("Europe/Berlin")
+    start = int(datetime(2024, 3, 30, tzinfo=timezone.utc).timestamp())
+    table = utc_offsets(berlin, start, start + 3 * 86400)
+    # 2024-03-31 01:00 UTC 切换为夏令时
+    switch = int(datetime(2024, 3, 31, 1, tzinfo=timezone.utc).timestamp())
+    assert table[0].tolist() == [switch]
+    local = to_local(np.array([switch - 1, switch]), table)
+    assert (local - np.array([switch - 1, switch])).tolist() == [HOUR, 2 * HOUR]
+
+
+def test_aggregates_booked_focus_and_busiest_hours_per_period():
+    starts = MONDAY + HOUR * np.array([9, 10, 14, 24 + 10])
+    ends = MONDAY + HOUR * np.array([11, 12, 15, 24 + 11])
+    query = UtilizationQuery(
+        start=MONDAY,
+        end=MONDAY + 2 * 86400,
+        working_hours=WorkingHours(start=time(9), end=time(18)),
+        focus_minutes=150,
+    )
+    result = utilization(starts, ends, query, timezone.utc)
+
+    # 周一 9-12 点重叠只计一次，加上 14-15 点
+    assert [p["booked_hours"] for p in result["periods"]] == [4.0, 1.0]
+    assert [p["events"] for p in result["periods"]] == [3, 1]
+    # 周一空闲 12-14、15-18（只有后者达到 150 分钟）；周二 9-10、11-18
+    assert [p["focus_hours"] for p in result["periods"]] == [3.0, 7.0]
+    assert result["utilization"] == round(5 / 18, 4)
+    assert result["focus_ratio"] == round(10 / 18, 4)
+    assert [h["hour"] for h in result["busiest_hours"]] == [10, 9, 11]
+    assert result["by_hour"][10] == 2.0
+
+    weekly_query = UtilizationQuery(start=MONDAY, end=MONDAY + 2 * 86400, period="week")
+    weekly = utilization(starts, ends, weekly_query, timezone.utc)
+    assert [(p["period"], p["booked_hours"]) for p in weekly["periods"]] == [("2024-01-08", 5.0)]
+
+
+def test_results_are_cached_per_ctag():
+    snapshot = EventSnapshot(horizon=(0, 2**40))
+    event = {
+        "uid": "a",
+        "calendar": "work",
+        "dtstart_epoch": MONDAY + 9 * HOUR,
+        "dtend_epoch": MONDAY + 10 * HOUR,
+        "status": None,
+        "all_day": False,
+        "recurrence": None,
+    }
+    snapshot.update("/a.ics", [event])
+    cache = UtilizationCache()
+    query = UtilizationQuery(start=MONDAY, end=MONDAY + 86400)
+
+    first = calendar_utilization(snapshot, "work", "c1", query, timezone.utc, cache)
+    assert first["booked_hours"] == 1.0
+    snapshot.update("/a.ics", [dict(event, dtend_epoch=MONDAY + 12 * HOUR)])
+    # ctag 未变时直接返回缓存
+    assert calendar_utilization(snapshot, "work", "c1", query, timezone.utc, cache) is first
+    second = calendar_utilization(snapshot, "work", "c2", query, timezone.utc, cache)
+    assert second["booked_hours"] == 3.0
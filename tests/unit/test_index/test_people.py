@@ -0,0 +1,124 @@
+"""
+人员索引测试
+"""
+from calendar_dingtalk_client.index.people import PeopleIndex
+
+HOUR = 3600
+
+
+def person(address, name=None, partstat="ACCEPTED"):
+    return {"id": address, "name": name, "partstat": partstat, "role": "REQ-PARTICIPANT"}
+
+
+def event(uid, start, end, organizer, *attendees, calendar="work"):
+    return {
+        "url": f"https://example.com/{calendar}/{uid}.ics",
+        "uid": uid,
+        "summary": uid,
+        "calendar": calendar,
+        "recurrence_id": None,
+        "dtstart_epoch": start,
+        "dtend_epoch": end,
+        "organizer": person(organizer),
+        "attendees": list(attendees),
+    }
+
+
+def build(*events):
+    index = PeopleIndex()
+    for item in events:
+        index.update(item["url"], [item])
+    return index
+
+
+def uids(events):
+    return [item["uid"] for item in events]
+
+
+ALICE = person("alice@example.com", "Alice")
+BOB_DECLINED = person("bob@example.com", "Bob", partstat="DECLINED")
+
+
+def test_agenda_covers_organized_and_attended_events():
+    index = build(
+        event("standup", 9 * HOUR, 10 * HOUR, "bob@example.com", ALICE),
+        event("review", 14 * HOUR, 16 * HOUR, "alice@example.com", BOB_DECLINED),
+        event("offsite", -48 * HOUR, 48 * HOUR, "carol@example.com", ALICE),
+    )
+    agenda = index.agenda("alice@example.com", 12 * HOUR, 24 * HOUR)
+    # 跨越窗口开始的长事件也要找到
+    assert uids(agenda) == ["offsite", "review"]
+    assert agenda[1]["role"] == "ORGANIZER"
+    assert index.resolve("MAILTO:Alice@Example.com") == "alice@example.com"
+    assert index.resolve("bob") == "bob@example.com"
+    assert index.resolve("nobody@example.com") is None
+
+
+def test_busy_merges_intervals_and_skips_declined():
+    index = build(
+        event("a", 9 * HOUR, 11 * HOUR, "carol@example.com", ALICE, BOB_DECLINED),
+        event("b", 10 * HOUR, 12 * HOUR, "carol@example.com", ALICE),
+        event("c", 13 * HOUR, 14 * HOUR, "carol@example.com", ALICE),
+    )
+    assert index.busy("alice@example.com", 0, 24 * HOUR) == [
+        (9 * HOUR, 12 * HOUR),
+        (13 * HOUR, 14 * HOUR),
+    ]
+    assert index.busy("alice@example.com", 10 * HOUR, 13 * HOUR + 1800) == [
+        (10 * HOUR, 12 * HOUR),
+        (13 * HOUR, 13 * HOUR + 1800),
+    ]
+    assert index.busy("bob@example.com", 0, 24 * HOUR) == []
+    conflicts = index.conflicts(0, 24 * HOUR)
+    assert [(c["person"], c["overlaps"]) for c in conflicts] == [
+        ("alice@example.com", [(("a", ""), ("b", ""))]),
+        ("carol@example.com", [(("a", ""), ("b", ""))]),
+    ]
+
+
+def test_updates_replace_and_deduplicate_copies_across_calendars():
+    invite = event("sync", 9 * HOUR, 10 * HOUR, "bob@example.com", ALICE)
+    copy = event("sync", 9 * HOUR, 10 * HOUR, "bob@example.com", ALICE, calendar="home")
+    index = build(invite, copy)
+    assert uids(index.agenda("alice@example.com", 0, 24 * HOUR)) == ["sync"]
+
+    # 删除一份副本后事件仍在，两份都删除后人员也消失
+    index.update(invite["url"], [])
+    assert uids(index.agenda("alice@example.com", 0, 24 * HOUR)) == ["sync"]
+    index.update(copy["url"], [])
+    assert len(index) == 0
+
+    moved = dict(invite, dtstart_epoch=20 * HOUR, dtend_epoch=21 * HOUR)
+    index.update(invite["url"], [invite])
+    index.update(invite["url"], [moved])
+    assert index.busy("alice@example.com", 0, 24 * HOUR) == [(20 * HOUR, 21 * HOUR)]
+
+
+def test_rebooks_from_latest_copy():
+    invite = event("sync", 9 * HOUR, 10 * HOUR, "bob@example.com", ALICE)
+    copy = event("sync", 9 * HOUR, 10 * HOUR, "bob@example.com", ALICE, calendar="home")
+    index = build(invite, copy)
+    # 改期先同步到一个日历，另一份旧副本不应覆盖
+    index.update(copy["url"], [dict(copy, dtstart_epoch=15 * HOUR, dtend_epoch=16 * HOUR)])
+    assert index.busy("alice@example.com", 0, 24 * HOUR) == [(15 * HOUR, 16 * HOUR)]
+
+
+def test_people_filters_by_calendar():
+    index = build(
+        event("standup", 9 * HOUR, 10 * HOUR, "bob@example.com", ALICE),
+        event("dinner", 19 * HOUR, 21 * HOUR, "carol@example.com", ALICE, calendar="home"),
+        event("sync", 11 * HOUR, 12 * HOUR, "bob@example.com", ALICE, calendar="home"),
+        event("sync", 11 * HOUR, 12 * HOUR, "bob@example.com", ALICE),
+    )
+    counts = lambda people: {p["id"]: p["events"] for p in people}
+    assert counts(index.people()) == {
+        "alice@example.com": 3,
+        "bob@example.com": 2,
+        "carol@example.com": 1,
+    }
+    assert counts(index.people(["work"])) == {"alice@example.com": 2, "bob@example.com": 2}
+    assert counts(index.people(["home"])) == {
+        "alice@example.com": 2,
+        "bob@example.com": 1,
+        "carol@example.com": 1,
+    }
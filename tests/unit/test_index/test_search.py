@@ -0,0 +1,90 @@
+"""
+全文检索索引测试
+"""
+import time
+
+from calendar_dingtalk_client.index.search import SearchIndex, index_terms, query_terms
+
+
+def event(uid, summary, location=None, description=None, calendar="work"):
+    return {
+        "url": f"https://example.com/{uid}.ics",
+        "uid": uid,
+        "summary": summary,
+        "location": location,
+        "description": description,
+        "calendar": calendar,
+        "dtstart_epoch": 0,
+    }
+
+
+def build(*events):
+    index = SearchIndex()
+    for item in events:
+        index.update(item["url"], [item])
+    return index
+
+
+def uids(results):
+    return [item["uid"] for item in results[0]]
+
+
+def test_tokenizes_cjk_as_ngrams_and_latin_as_words():
+    assert index_terms("周会 Design-Review（Ｑ３）") == [
+        "周", "会", "周会", "design", "review", "q3",
+    ]
+    assert query_terms("产品周会 rev") == (["产品", "品周", "周会"], ["产品周会"], "rev")
+
+
+def test_ranks_summary_matches_above_description():
+    index = build(
+        event("a", "午餐", description="讨论周会安排"),
+        event("b", "产品周会", location="3F 会议室"),
+        event("c", "项目复盘"),
+    )
+    assert uids(index.search("周会")) == ["b", "a"]
+    assert uids(index.search("会议室")) == ["b"]
+    # 二字都出现但不连续，不算匹配
+    assert uids(index.search("会安排周")) == []
+
+
+def test_phrase_check_applies_when_query_collapses_to_one_bigram():
+    index = build(event("a", "哈哈"), event("b", "哈哈哈大笑"), event("c", "哈哈，哈哈"))
+    # "哈哈哈" 去重后只剩 "哈哈" 一个二字词，仍需原样出现
+    assert uids(index.search("哈哈哈")) == ["b"]
+    assert index.search("哈哈哈")[1] == 1
+    assert sorted(uids(index.search("哈哈"))) == ["a", "b", "c"]
+
+
+def test_prefix_match_and_calendar_filter():
+    index = build(
+        event("a", "Design review", calendar="work"),
+        event("b", "Designer sync", calendar="home"),
+    )
+    assert sorted(uids(index.search("desig"))) == ["a", "b"]
+    assert uids(index.search("design ")) == ["a"]
+    assert uids(index.search("desig", calendars=["home"])) == ["b"]
+
+
+def test_updates_incrementally_when_object_changes():
+    index = build(event("a", "周会"), event("b", "周会"))
+    index.update("https://example.com/a.ics", [event("a", "复盘")])
+    assert uids(index.search("周会")) == ["b"]
+    assert uids(index.search("复盘")) == ["a"]
+    index.update("https://example.com/b.ics", [])
+    assert index.search("周会") == ([], 0)
+    assert len(index) == 1
+
+
+def test_search_is_fast_on_large_index():
+    words = ["周会", "评审", "复盘", "午餐", "培训", "面试", "Sync", "Planning"]
+    index = SearchIndex()
+    for i in range(20000):
+        summary = f"{words[i % 8]}{words[(i // 8) % 8]} 第{i}次"
+        index.update(f"https://example.com/{i}.ics", [event(str(i), summary)])
+    started = time.perf_counter()
+    results, total = index.search("评审复盘", limit=10)
+    elapsed = time.perf_counter() - started
+    assert total > 0 and len(results) == 10
+    assert all("评审复盘" in item["summary"] for item in results)
+    assert elapsed < 0.5
@@ -0,0 +1,79 @@
+"""
+空闲时段计算测试
+"""
+from datetime import datetime, time, timezone
+
+import numpy as np
+
+from calendar_dingtalk_client.index.slots import (
+    WorkingHours,
+    as_intervals,
+    complement,
+    find_free_slots,
+    intersect,
+    merge,
+)
+
+HOUR = 3600
+
+
+def pairs(intervals):
+    starts, ends = intervals
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def test_merge_complement_and_intersect():
+    merged = merge(*as_intervals([(5, 8), (1, 3), (2, 4), (4, 5), (10, 12), (11, 11)]))
+    assert pairs(merged) == [(1, 8), (10, 12)]
+    assert pairs(complement(merged, 0, 11)) == [(0, 1), (8, 10)]
+    assert pairs(complement(merge(*as_intervals([])), 0, 11)) == [(0, 11)]
+
+    a = merge(*as_intervals([(0, 10), (20, 30)]))
+    b = merge(*as_intervals([(5, 15), (15, 25)]))
+    assert pairs(intersect(a, b)) == [(5, 10), (20, 25)]
+    assert pairs(intersect(a, merge(*as_intervals([(10, 20)])))) == []
+
+
+def test_working_hours_follow_daylight_saving():
+    from zoneinfo import ZoneInfo
+
+    hours = WorkingHours(start=time(9), end=time(17), timezone=ZoneInfo("Europe/Berlin"))
+    # 2024-03-29 周五（冬令时）到 2024-04-01 周一（夏令时）
+    window = (
+        int(datetime(2024, 3, 29, tzinfo=timezone.utc).timestamp()),
+        int(datetime(2024, 4, 2, tzinfo=timezone.utc).timestamp()),
+    )
+    days = [
+        (datetime.fromtimestamp(s, timezone.utc).isoformat(), (e - s) // HOUR)
+        for s, e in pairs(hours.intervals(*window))
+    ]
+    assert days == [("2024-03-29T08:00:00+00:00", 8), ("2024-04-01T07:00:00+00:00", 8)]
+
+
+def test_find_free_slots_across_participants():
+    day = int(datetime(2024, 1, 8, tzinfo=timezone.utc).timestamp())  # 周一
+    hours = WorkingHours(start=time(9), end=time(18), timezone=timezone.utc)
+    alice = as_intervals([(day + 9 * HOUR, day + 10 * HOUR), (day + 13 * HOUR, day + 15 * HOUR)])
+    bob = as_intervals([(day + 9 * HOUR + 1800, day + 11 * HOUR + 600)])
+    slots = find_free_slots([alice, bob], day, day + 86400, HOUR, working_hours=hours)
+    # 11:10 对齐到 11:15；15:00-18:00
+    assert [(s - day, e - day) for s, e in slots] == [
+        (11 * HOUR + 900, 13 * HOUR),
+        (15 * HOUR, 18 * HOUR),
+    ]
+    assert len(find_free_slots([alice, bob], day, day + 86400, 3 * HOUR, working_hours=hours)) == 1
+    assert find_free_slots([], day, day + 7200, 1800, limit=1) == [(day, day + 7200)]
+
+
+def test_large_group_stays_vectorized():
+    rng = np.random.default_rng(0)
+    busy = []
+    for _ in range(30):
+        starts = np.sort(rng.integers(0, 90 * 86400, 2000))
+        busy.append((starts, starts + rng.integers(900, 4 * HOUR, 2000)))
+    hours = WorkingHours(timezone=timezone.utc)
+    slots = find_free_slots(busy, 0, 90 * 86400, 1800, working_hours=hours)
+    for start, end in slots:
+        assert end - start >= 1800
+        for starts, ends in busy:
+            assert not np.any((starts < end) & (ends > start))
@@ -0,0 +1,130 @@
+"""
+列式事件快照测试
+"""
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from calendar_dingtalk_client.caldav.sync import parse_object
+from calendar_dingtalk_client.index.snapshot import EventSnapshot
+from tests.fixtures.ical_samples import RECURRING
+
+DAY = 86400
+
+
+def epoch(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+def event(uid, start, end, calendar="work", status=None, all_day=False):
+    return {
+        "url": f"/{calendar}/{uid}.ics",
+        "uid": uid,
+        "calendar": calendar,
+        "dtstart_epoch": start,
+        "dtend_epoch": end,
+        "status": status,
+        "all_day": all_day,
+        "recurrence": None,
+    }
+
+
+def snapshot_of(*events, horizon=(epoch(2024, 1, 1), epoch(2024, 3, 1))):
+    snapshot = EventSnapshot(horizon=horizon)
+    for item in events:
+        snapshot.update(item["url"], [item])
+    return snapshot
+
+
+def test_expands_recurring_objects_and_applies_overrides():
+    snapshot = EventSnapshot(horizon=(epoch(2024, 1, 1), epoch(2024, 2, 1)))
+    snapshot.update("/evt-1.ics", parse_object("work", "/evt-1.ics", None, RECURRING))
+    indices = snapshot.select(snapshot.mask())
+    occurrences = snapshot.occurrences(indices)
+    assert [o["summary"] for o in occurrences] == ["周会", "周会（改期）", "周会", "周会"]
+    assert [o["dtstart"] for o in occurrences[2:4]] == [
+        "2024-01-19 10:00:00+08:00",
+        "2024-01-26 10:00:00+08:00",
+    ]
+    assert occurrences[2]["recurrence_id"] == "2024-01-19 10:00:00+08:00"
+
+
+def test_masks_filter_window_calendar_status_and_all_day():
+    snapshot = snapshot_of(
+        event("a", epoch(2024, 1, 8, 9), epoch(2024, 1, 8, 10)),
+        event("b", epoch(2024, 1, 8, 9), epoch(2024, 1, 8, 11), calendar="home"),
+        event("c", epoch(2024, 1, 9), epoch(2024, 1, 10), status="CANCELLED", all_day=True),
+        event("d", epoch(2024, 1, 8, 12), epoch(2024, 1, 8, 12)),
+    )
+    uids = lambda mask: [o["uid"] for o in snapshot.occurrences(snapshot.select(mask))]
+    assert uids(snapshot.mask(epoch(2024, 1, 8), epoch(2024, 1, 9))) == ["a", "b", "d"]
+    assert uids(snapshot.mask(epoch(2024, 1, 8, 10), epoch(2024, 1, 8, 12))) == ["b"]
+    assert uids(snapshot.mask(calendars=["home", "missing"])) == ["b"]
+    assert uids(snapshot.mask(statuses=[None, "CONFIRMED"])) == ["a", "b", "d"]
+    assert uids(snapshot.mask(all_day=True)) == ["c"]
+
+    # 对象更新只替换该对象的实例
+    version = snapshot.version
+    snapshot.update("/work/a.ics", [])
+    snapshot.update("/home/b.ics", [event("b", epoch(2024, 2, 1), epoch(2024, 2, 1, 1), "home")])
+    assert snapshot.version == version + 2
+    assert uids(snapshot.mask(epoch(2024, 1, 8), epoch(2024, 1, 9))) == ["d"]
+
+
+def test_reexpands_recurring_objects_outside_horizon():
+    snapshot = EventSnapshot(horizon=(epoch(2024, 1, 1), epoch(2024, 2, 1)))
+    snapshot.update("/evt-1.ics", parse_object("work", "/evt-1.ics", None, RECURRING))
+    snapshot.update("/work/a.ics", [event("a", epoch(2024, 1, 8, 9), epoch(2024, 1, 8, 10))])
+    starts = lambda mask: snapshot.intervals(mask)[0].tolist()
+
+    # 窗口超出展开范围时重新展开，不再漏掉重复实例
+    version = snapshot.version
+    assert starts(snapshot.mask(epoch(2024, 6, 1), epoch(2024, 6, 15))) == [
+        epoch(2024, 6, 7, 2),
+        epoch(2024, 6, 14, 2),
+    ]
+    assert snapshot.version == version + 1
+    # 范围内的窗口不再重新展开，不重复的事件保持不变
+    assert len(starts(snapshot.mask(epoch(2024, 1, 1), epoch(2024, 2, 1)))) == 5
+    assert snapshot.version == version + 1
+
+
+def test_default_horizon_moves_with_time(monkeypatch):
+    from calendar_dingtalk_client.index import snapshot as module
+
+    monkeypatch.setattr(module, "default_horizon", lambda: (epoch(2024, 1, 1), epoch(2024, 2, 1)))
+    snapshot = EventSnapshot()
+    snapshot.update("/evt-1.ics", parse_object("work", "/evt-1.ics", None, RECURRING))
+    assert len(snapshot.select(snapshot.mask())) == 4
+
+    # 日期推移后过期的展开结果随之刷新
+    monkeypatch.setattr(module, "default_horizon", lambda: (epoch(2024, 2, 1), epoch(2024, 3, 1)))
+    window = snapshot.mask(epoch(2024, 2, 1), epoch(2024, 3, 1))
+    occurrences = snapshot.occurrences(snapshot.select(window))
+    assert [o["dtstart"] for o in occurrences] == [
+        "2024-02-02 10:00:00+08:00",
+        "2024-02-09 10:00:00+08:00",
+        "2024-02-16 10:00:00+08:00",
+        "2024-02-23 10:00:00+08:00",
+    ]
+
+
+def test_million_occurrence_filter_is_vectorized():
+    snapshot = EventSnapshot(horizon=(0, 10**9))
+    rng = np.random.default_rng(0)
+    objects = []
+    for calendar in range(10):
+        starts = rng.integers(0, 365 * DAY, 10000).tolist()
+        objects.append([event(f"e{j}", s, s + 3600, calendar=f"cal{calendar}") for j, s in enumerate(starts)])
+    # 100 个对象共享 10 组事件，共 100 万个实例
+    for i in range(100):
+        snapshot.update(f"/obj{i}.ics", objects[i % 10])
+    assert len(snapshot) == 1_000_000
+
+    begin = time.perf_counter()
+    mask = snapshot.mask(100 * DAY, 107 * DAY, calendars=["cal1", "cal2"], statuses=[None])
+    count = int(mask.sum())
+    elapsed = time.perf_counter() - begin
+    assert 0 < count < 20000
+    assert elapsed < 0.5